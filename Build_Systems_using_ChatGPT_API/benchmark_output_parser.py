@@ -0,0 +1,148 @@
+"""
+Corpus and benchmark for output_parser.parse_product_list.
+
+build_corpus renders random category/product lists from products.json
+the ways a model writes them: JSON, Python literals, pretty-printed, in
+a code fence, with prose around the list, with apostrophes in names and
+cut off mid-object. Each case has the list the parser should return.
+fuzz_corpus mutates those texts at random; the parser must never raise
+on them. The benchmark compares parse_product_list with the old
+replace-quotes-and-json.loads parser on success rate and time.
+
+Usage: python benchmark_output_parser.py [--size 500] [--seed 0]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from output_parser import parse_product_list
+
+PRODUCTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'products.json')
+
+# Names the catalog does not have, to exercise quotes inside strings
+APOSTROPHE_NAMES = ["Kid's Tablet", "Men's Smartwatch", "O'Brien Speaker"]
+
+KINDS = ('json', 'python', 'pretty', 'fenced', 'prose', 'apostrophe', 'truncated')
+
+
+def legacy_parse(text):
+    """The parser read_string_to_list used to have"""
+    try:
+        return json.loads(text.replace("'", "\""))
+    except json.JSONDecodeError:
+        return None
+
+
+def _random_items(rng, names_by_category):
+    items = []
+    for category in rng.sample(sorted(names_by_category), rng.randint(0, 3)):
+        if rng.random() < 0.3:
+            items.append({'category': category})
+        else:
+            names = names_by_category[category]
+            items.append({'category': category, 'products': rng.sample(names, rng.randint(1, len(names)))})
+    return items
+
+
+def _render(rng, kind, items):
+    # Returns (text, expected list)
+    if kind == 'json':
+        return json.dumps(items), items
+    if kind == 'python':
+        return repr(items), items
+    if kind == 'pretty':
+        return json.dumps(items, indent=rng.choice((2, 4))), items
+    if kind == 'fenced':
+        return f"```{rng.choice(('json', 'python', ''))}\n{json.dumps(items, indent=2)}\n```", items
+    if kind == 'prose':
+        return f"Here are the products I found: {repr(items)}\nLet me know if you need anything else!", items
+    if kind == 'apostrophe':
+        items = items + [{'category': 'Audio Equipment', 'products': [rng.choice(APOSTROPHE_NAMES)]}]
+        return repr(items), items
+    # truncated: cut inside the last object, so only the others come back
+    text = json.dumps(items + [{'category': 'Audio Equipment', 'products': ['WaveSound Soundbar']}])
+    return text[:text.rindex('{') + rng.randint(1, 40)], items
+
+
+def build_corpus(size=500, seed=0):
+    """Return (kind, text, expected) cases rendered from random catalog lists"""
+    with open(PRODUCTS_PATH, 'r', encoding='utf-8') as file:
+        products = json.load(file)
+    names_by_category = {}
+    for product in products.values():
+        names_by_category.setdefault(product['category'], []).append(product['name'])
+
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(size):
+        kind = KINDS[index % len(KINDS)]
+        text, expected = _render(rng, kind, _random_items(rng, names_by_category))
+        corpus.append((kind, text, expected))
+    return corpus
+
+
+def fuzz_corpus(size=500, seed=0):
+    """Return texts from the corpus with random characters deleted, inserted or replaced"""
+    rng = random.Random(seed)
+    texts = []
+    for _, text, _ in build_corpus(size, seed):
+        chars = list(text)
+        for _ in range(rng.randint(1, 5)):
+            position = rng.randrange(len(chars) + 1)
+            action = rng.choice(('delete', 'insert', 'replace'))
+            if action == 'insert' or not chars:
+                chars.insert(position, rng.choice('[]{}\'",:\\ x'))
+            elif position < len(chars):
+                if action == 'delete':
+                    del chars[position]
+                else:
+                    chars[position] = rng.choice('[]{}\'",:\\ x')
+        texts.append(''.join(chars))
+    return texts
+
+
+def run_benchmark(corpus, parsers, repeat=5):
+    """Return {parser name: {'correct': {kind: count}, 'total': {kind: count}, 'microseconds': mean}}"""
+    results = {}
+    for name, parse in parsers.items():
+        correct, total = {}, {}
+        for kind, text, expected in corpus:
+            total[kind] = total.get(kind, 0) + 1
+            if parse(text) == expected:
+                correct[kind] = correct.get(kind, 0) + 1
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, text, _ in corpus:
+                parse(text)
+        seconds = time.perf_counter() - start
+        results[name] = {'correct': correct, 'total': total,
+                         'microseconds': seconds / (repeat * len(corpus)) * 1e6}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the structured-output parser.")
+    parser.add_argument('--size', type=int, default=500, help="number of corpus cases (default 500)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the corpus (default 0)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size, args.seed)
+    results = run_benchmark(corpus, {'legacy': legacy_parse, 'parse_product_list': parse_product_list})
+    for name, result in results.items():
+        print(f"\n{name}: {result['microseconds']:.1f} us per parse")
+        for kind in KINDS:
+            print(f"  {kind:<11} {result['correct'].get(kind, 0):4d} / {result['total'].get(kind, 0)}")
+
+    failures = 0
+    for text in fuzz_corpus(args.size, args.seed):
+        try:
+            parse_product_list(text)
+        except Exception:
+            failures += 1
+    print(f"\nFuzz: {failures} exceptions in {args.size} mutated outputs")
+
+
+if __name__ == "__main__":
+    main()
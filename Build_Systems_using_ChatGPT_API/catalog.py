@@ -0,0 +1,87 @@
+"""
+In-memory product catalog backed by products.json.
+
+The file is parsed once and indexed by product name and by category, so
+lookups are dictionary reads with no disk I/O. The file's mtime is checked
+at most once every check_interval seconds and the catalog reloads itself
+when it changes; a writer that must be seen at once, like create_products(),
+calls reload().
+"""
+
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+
+class ProductCatalog:
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        # Bumped on every reload, so derived data can tell when it is stale
+        self.version = 0
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = float('-inf')
+        self._products = {}
+        self._products_view = MappingProxyType(self._products)
+        self._by_category = {}
+        self._names_by_category = {}
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self._mtime:
+                self._load(mtime)
+            self._checked_at = now
+
+    def _load(self, mtime):
+        with open(self.path, 'r') as file:
+            products = json.load(file)
+        by_category = {}
+        for product in products.values():
+            category = product.get('category')
+            if category:
+                by_category.setdefault(category, []).append(product)
+        self._products = products
+        self._products_view = MappingProxyType(products)
+        self._by_category = by_category
+        self._names_by_category = {category: [product.get('name') for product in items]
+                                   for category, items in by_category.items()}
+        self._mtime = mtime
+        self.version += 1
+
+    def reload(self):
+        """Force the next lookup to re-read the file"""
+        with self._lock:
+            self._mtime = None
+            self._checked_at = float('-inf')
+
+    @property
+    def products(self):
+        """All products, keyed by name, as a read-only view"""
+        self._refresh()
+        return self._products_view
+
+    def get_product(self, name):
+        self._refresh()
+        return self._products.get(name, None)
+
+    def get_products_in_category(self, category):
+        self._refresh()
+        return list(self._by_category.get(category, []))
+
+    def get_names_by_category(self):
+        """Product names grouped by category, as returned by get_products_and_category()"""
+        self._refresh()
+        return {category: list(names) for category, names in self._names_by_category.items()}
+
+    def get_categories(self):
+        self._refresh()
+        return list(self._by_category)
@@ -0,0 +1,220 @@
+"""
+Batch evaluation of the customer-service pipeline (L8/L9).
+
+Reads test cases from a JSONL file, one object per line:
+
+    {"id": 3, "customer_msg": "...", "ideal_answer": {"Category": ["Product", ...]}}
+
+and runs each through get_products_from_query, the product lookup and
+answer_user_msg on a pool of worker threads. Every result is appended to
+the output JSONL file as soon as it finishes, so an interrupted run picks
+up where it stopped: cases already in the output file without an error
+are skipped. When a case has an ideal_answer, the product stage is scored
+against it as in L8. The report gives throughput, p50/p95 latency per
+stage and token usage per stage.
+
+Usage: python eval_runner.py CASES RESULTS [--workers 8] [--cache FILE] [--restart]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import utils
+from output_parser import parse_product_list
+
+STAGES = ('products', 'lookup', 'answer')
+
+# Stages that call the model and so use tokens
+LLM_STAGES = ('products', 'answer')
+
+
+def read_cases(path):
+    """Yield the test cases in path; a case without an id is numbered by its line"""
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if line.strip():
+                case = json.loads(line)
+                case.setdefault('id', line_number)
+                yield case
+
+
+def load_results(path):
+    """
+    Return {id: result} for the results already in path, keeping the last
+    result per case. A partial line left by an interrupted write is cut off.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'rb+') as file:
+        data = file.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            file.truncate(end)
+    for line in data[:end].decode('utf-8').splitlines():
+        if line.strip():
+            result = json.loads(line)
+            results[result['id']] = result
+    return results
+
+
+def score_products(response, ideal):
+    """
+    Fraction of the categories in the response whose products match the
+    ideal answer exactly (eval_response_with_ideal from L8). It grades the
+    model's own output, so the list is parsed but not checked against the
+    catalog as read_string_to_list does
+    """
+    products = parse_product_list(response)
+    if not isinstance(products, list):
+        return 0
+    if products == [] and not ideal:
+        return 1
+    if products == [] or not ideal:
+        return 0
+
+    correct = 0
+    for item in products:
+        if not isinstance(item, dict):
+            continue
+        category = item.get('category')
+        product_names = item.get('products')
+        if category and product_names and ideal.get(category):
+            if set(product_names) == set(ideal[category]):
+                correct += 1
+    return correct / len(products)
+
+
+def evaluate_case(case):
+    """Run one test case through the pipeline and return its result"""
+    user_msg = case['customer_msg']
+    result = {'id': case['id'], 'customer_msg': user_msg}
+    latency = {}
+    usage = {}
+    try:
+        start = time.perf_counter()
+        with utils.track_token_usage() as usage['products']:
+            products_response = utils.get_products_from_query(user_msg)
+        latency['products'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        category_and_product_list = utils.read_string_to_list(products_response)
+        product_info = utils.generate_output_string(category_and_product_list, user_msg)
+        latency['lookup'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with utils.track_token_usage() as usage['answer']:
+            answer = utils.answer_user_msg(user_msg, product_info)
+        latency['answer'] = time.perf_counter() - start
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    else:
+        result['products_response'] = products_response
+        result['answer'] = answer
+        if 'ideal_answer' in case:
+            result['score'] = score_products(products_response, case['ideal_answer'])
+    latency['total'] = sum(latency.values())
+    result['latency'] = latency
+    result['usage'] = usage
+    return result
+
+
+def run_evaluation(cases_path, results_path, workers=8, restart=False):
+    """
+    Evaluate every case in cases_path not yet in results_path, appending
+    results as they finish. Returns (results by id, cases run, seconds).
+    """
+    if restart and os.path.exists(results_path):
+        os.remove(results_path)
+    results = load_results(results_path)
+    pending = [case for case in read_cases(cases_path)
+               if case['id'] not in results or 'error' in results[case['id']]]
+
+    start = time.perf_counter()
+    with open(results_path, 'a', encoding='utf-8') as output, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_case, case) for case in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            results[result['id']] = result
+    return results, len(pending), time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values, or None when there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(results, cases_run=0, seconds=0.0):
+    """Aggregate results into throughput, latency, token usage and score figures"""
+    completed = [result for result in results.values() if 'error' not in result]
+    scores = [result['score'] for result in completed if result.get('score') is not None]
+    summary = {
+        'cases': len(results),
+        'errors': len(results) - len(completed),
+        'cases_run': cases_run,
+        'seconds': seconds,
+        'cases_per_second': cases_run / seconds if seconds > 0 else None,
+        'mean_score': sum(scores) / len(scores) if scores else None,
+        'latency': {},
+        'usage': {},
+    }
+    for stage in STAGES + ('total',):
+        values = [result['latency'][stage] for result in completed]
+        summary['latency'][stage] = {'p50': percentile(values, 0.50), 'p95': percentile(values, 0.95)}
+    for stage in LLM_STAGES:
+        totals = {}
+        for result in completed:
+            for name, count in result['usage'][stage].items():
+                totals[name] = totals.get(name, 0) + count
+        summary['usage'][stage] = totals
+    return summary
+
+
+def print_report(summary):
+    print(f"Cases: {summary['cases']} ({summary['errors']} errors), ran {summary['cases_run']} "
+          f"in {summary['seconds']:.2f} s", end='')
+    if summary['cases_per_second'] is not None:
+        print(f" ({summary['cases_per_second']:.2f} cases/s)", end='')
+    print()
+    if summary['mean_score'] is not None:
+        print(f"Mean product score: {summary['mean_score']:.3f}")
+    print("Latency (p50 / p95):")
+    for stage, latency in summary['latency'].items():
+        if latency['p50'] is not None:
+            print(f"  {stage:<9} {latency['p50'] * 1000:9.1f} ms / {latency['p95'] * 1000:9.1f} ms")
+    print("Token usage:")
+    for stage, usage in summary['usage'].items():
+        print(f"  {stage:<9} {usage.get('total_tokens', 0)} tokens "
+              f"({usage.get('prompt_tokens', 0)} prompt, {usage.get('completion_tokens', 0)} completion), "
+              f"{usage.get('requests', 0)} requests, {usage.get('cached_responses', 0)} cached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the customer-service pipeline over a JSONL test set.")
+    parser.add_argument('cases', help="JSONL file of test cases")
+    parser.add_argument('results', help="JSONL file the results are appended to")
+    parser.add_argument('--workers', type=int, default=8, help="number of cases evaluated at once (default 8)")
+    parser.add_argument('--cache', metavar='FILE', help="SQLite file that caches model responses across runs")
+    parser.add_argument('--restart', action='store_true', help="discard earlier results instead of resuming")
+    args = parser.parse_args()
+
+    if args.cache:
+        utils.configure_response_cache(args.cache)
+    results, cases_run, seconds = run_evaluation(args.cases, args.results, args.workers, args.restart)
+    print_report(summarize(results, cases_run, seconds))
+    matcher = utils.get_product_matcher()
+    if matcher is not None and matcher.calls:
+        stats = matcher.stats()
+        print(f"Product queries answered without the model: {stats['answered_locally']} of {stats['calls']} "
+              f"({stats['avoided_share']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
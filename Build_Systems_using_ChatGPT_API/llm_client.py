@@ -0,0 +1,123 @@
+"""
+Shared OpenAI client with a pooled, keep-alive HTTP connection.
+
+Creating openai.OpenAI() per request builds a new HTTP client and drops
+its TLS/keep-alive connections, so every call pays a fresh handshake.
+ClientManager creates one client on first use with a bounded connection
+pool, explicit timeouts and the SDK's retry policy (exponential backoff
+with jitter on connection errors, 408/409/429 and 5xx responses), and
+hands the same client to every caller. get_async_client() does the same
+for openai.AsyncOpenAI, one client per event loop, and closes it when that
+loop shuts down its async generators (as asyncio.run() does on exit) or on
+await aclose(), whichever comes first.
+"""
+
+import asyncio
+import threading
+import httpx
+import openai
+
+
+class ClientManager:
+    # The settings configure() may change
+    SETTINGS = frozenset(('max_connections', 'max_keepalive_connections', 'keepalive_expiry', 'timeout',
+                          'connect_timeout', 'max_retries'))
+
+    def __init__(self, max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0,
+                 timeout=60.0, connect_timeout=5.0, max_retries=3):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._client = None
+        self._async_client = None
+        self._async_loop = None
+        self._async_closer = None
+        self._lock = threading.Lock()
+
+    def _timeout(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry)
+
+    def get_client(self):
+        """Return the shared openai.OpenAI client, creating it on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http_client = openai.DefaultHttpxClient(limits=self._limits(), timeout=self._timeout())
+                    self._client = openai.OpenAI(http_client=http_client, timeout=self._timeout(),
+                                                 max_retries=self.max_retries)
+        return self._client
+
+    def get_async_client(self):
+        """Return the shared openai.AsyncOpenAI client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            # Connections belong to the loop that opened them, so a new loop
+            # (e.g. another asyncio.run()) gets a new client
+            http_client = openai.DefaultAsyncHttpxClient(limits=self._limits(), timeout=self._timeout())
+            self._async_client = openai.AsyncOpenAI(http_client=http_client, timeout=self._timeout(),
+                                                    max_retries=self.max_retries)
+            self._async_loop = loop
+            # Started here, so the loop finalizes it and closes the client
+            # while it can still run the close, however the caller exits
+            self._async_closer = _close_on_shutdown(self._async_client)
+            try:
+                self._async_closer.asend(None).send(None)
+            except StopIteration:
+                pass
+        return self._async_client
+
+    async def aclose(self):
+        """Close the async client if it belongs to the running event loop"""
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            closer = self._async_closer
+            self._async_client = None
+            self._async_loop = None
+            self._async_closer = None
+            await closer.aclose()
+
+    def configure(self, **settings):
+        """Change pool, timeout or retry settings; the client is rebuilt on next use"""
+        unknown = sorted(set(settings) - self.SETTINGS)
+        if unknown:
+            raise TypeError(f"Unknown client setting: {', '.join(unknown)}")
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            # The async client can only be closed from its own loop, which
+            # finalizes its closer once that is collected or the loop ends
+            self._async_client = None
+            self._async_loop = None
+            self._async_closer = None
+
+
+async def _close_on_shutdown(client):
+    # An async generator, so the event loop's asyncgen hooks track it
+    try:
+        yield
+    finally:
+        await client.close()
+
+
+client_manager = ClientManager()
+
+
+def get_client():
+    return client_manager.get_client()
+
+
+def get_async_client():
+    return client_manager.get_async_client()
@@ -0,0 +1,172 @@
+"""
+Tolerant parser for the model's list of categories and products.
+
+read_string_to_list used to swap every ' for " and call json.loads, so a
+product name with an apostrophe, a code fence or a sentence around the
+list made it fail. parse_product_list tries JSON, then a Python literal,
+and if neither parses the whole text it recovers every complete object
+of the list, for example from output cut off at max_tokens.
+
+StreamingListParser does the same scan on streamed chunks and hands back
+each object as soon as its closing brace arrives, so product lookups can
+start before the completion finishes. ProductSchema checks the objects
+against the catalog: it keeps known categories and products only, fixes
+their case and punctuation, and moves a product to its own category.
+"""
+
+import ast
+import json
+import re
+import warnings
+from product_matcher import normalize
+
+# Characters that change the scanner's state; everything else is skipped
+_SPECIAL = re.compile(r'[\[\]{}"\'\\]')
+
+
+def parse_literal(text):
+    """Parse text as JSON or a Python literal, or return None"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    if '"' not in text and '\\' not in text:
+        # A Python literal of plain single-quoted strings is JSON once the
+        # quotes are swapped, and json is much faster than literal_eval
+        try:
+            return json.loads(text.replace("'", '"'))
+        except ValueError:
+            pass
+    try:
+        with warnings.catch_warnings():
+            # e.g. invalid escape sequences in malformed output
+            warnings.simplefilter('ignore')
+            return ast.literal_eval(text.strip())
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+class StreamingListParser:
+    """
+    Finds the first top-level list in text fed piece by piece and returns
+    each object in it once the object is complete. Text before the list
+    and after its closing bracket is ignored.
+    """
+    def __init__(self):
+        self.items = []
+        self.started = False
+        self.finished = False
+        # Offsets of the list's opening bracket and just past its closing one
+        self.start = None
+        self.end = None
+        self._offset = 0
+        self._depth = 0
+        self._quote = None
+        self._escape = False
+        self._object = None
+
+    def feed(self, chunk):
+        """Scan the next piece of text and return the objects it completed"""
+        completed = []
+        position = 0
+        for match in _SPECIAL.finditer(chunk):
+            if self.finished:
+                break
+            index, char = match.start(), match.group()
+            if self._object is not None:
+                self._object.append(chunk[position:index + 1])
+            position = index + 1
+
+            if self._escape:
+                self._escape = False
+            elif self._quote is not None:
+                if char == '\\':
+                    self._escape = True
+                elif char == self._quote:
+                    self._quote = None
+            elif not self.started:
+                if char == '[':
+                    self.started = True
+                    self.start = self._offset + index
+                    self._depth = 1
+            elif char in '"\'':
+                self._quote = char
+            elif char in '[{':
+                self._depth += 1
+                if char == '{' and self._depth == 2:
+                    self._object = ['{']
+            elif char in ']}':
+                self._depth -= 1
+                if self._depth == 1 and self._object is not None:
+                    item = parse_literal(''.join(self._object))
+                    self._object = None
+                    if item is not None:
+                        completed.append(item)
+                elif self._depth <= 0:
+                    self.finished = True
+                    self.end = self._offset + index + 1
+        if self._object is not None and not self.finished:
+            self._object.append(chunk[position:])
+        self._offset += len(chunk)
+        self.items.extend(completed)
+        return completed
+
+
+def parse_product_list(text):
+    """
+    Return the list in the model's output, or the complete objects that
+    could be recovered from it, or None when there is no list at all
+    """
+    if text is None:
+        return None
+    value = parse_literal(text)
+    if isinstance(value, list):
+        return value
+
+    parser = StreamingListParser()
+    parser.feed(text)
+    if not parser.started:
+        return None
+    if parser.finished:
+        value = parse_literal(text[parser.start:parser.end])
+        if isinstance(value, list):
+            return value
+    return parser.items
+
+
+class ProductSchema:
+    """The categories and products a parsed list may contain"""
+    def __init__(self, names_by_category):
+        self.categories = {normalize(category): category for category in names_by_category}
+        self.products = {normalize(name): (name, category)
+                         for category, names in names_by_category.items() for name in names}
+
+    def validate(self, items):
+        """
+        Return the items as {'category', 'products'} or {'category'} objects
+        naming only known categories and products. Unknown names are
+        dropped, an item whose products are all unknown is dropped, and a
+        product listed under the wrong category moves to its own category.
+        """
+        valid = {}
+        for item in items or ():
+            if not isinstance(item, dict):
+                continue
+            category = self.categories.get(normalize(str(item.get('category') or '')))
+            products = item.get('products')
+            if isinstance(products, str):
+                products = [products]
+            names = []
+            for product in products if isinstance(products, (list, tuple)) else ():
+                known = self.products.get(normalize(product)) if isinstance(product, str) else None
+                if known is not None:
+                    names.append(known)
+            for name, product_category in names:
+                entry = valid.setdefault((product_category, True), {'category': product_category, 'products': []})
+                if name not in entry['products']:
+                    entry['products'].append(name)
+            # A category on its own asks about the whole category; one whose
+            # products are all unknown asked about something else
+            if not products and category is not None:
+                valid.setdefault((category, False), {'category': category})
+        return list(valid.values())
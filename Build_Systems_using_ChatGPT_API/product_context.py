@@ -0,0 +1,142 @@
+"""
+Token-budgeted product context for answer_user_msg.
+
+The product information passed to the model used to be every matched
+product dumped with json.dumps(indent=4), so a category mention put the
+whole category into the prompt. build_product_context writes each product
+as one compact line of fields, ranks the products (ones the customer named
+first, then by how many query words they share, then by rating) and keeps
+adding them until the token budget is spent. The products that did
+not fit are listed by name, or counted when the names do not fit either,
+so the model still knows they exist; room for that note is kept within
+the budget.
+
+Token counts come from tiktoken (listed in requirements.txt). Without it,
+or offline before it has downloaded its encoding, they fall back to an
+estimate of four characters per token and the budget is only approximate.
+"""
+
+import functools
+import json
+from product_matcher import normalize
+
+DEFAULT_TOKEN_BUDGET = 1000
+
+# Query words too common to say anything about which product fits best
+STOP_WORDS = frozenset(('a', 'an', 'and', 'are', 'can', 'do', 'for', 'have', 'i', 'if', 'in', 'is', 'it', 'me',
+                        'my', 'of', 'on', 'or', 'the', 'this', 'to', 'what', 'which', 'with', 'you', 'your'))
+
+# Fields kept when a product's full line does not fit the budget
+SHORT_FIELDS = ('name', 'category', 'brand', 'price', 'rating')
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except (KeyError, ValueError):
+            return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        # The encoding is downloaded on first use, which fails offline
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def count_tokens(text, model="gpt-4o-mini"):
+    """Number of tokens in text for model, or an estimate without tiktoken"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def serialize_product(product, fields=None):
+    """
+    One line per product, "name: SmartX ProPhone; brand: SmartX; ...",
+    optionally with only some fields. It carries the same facts as JSON
+    without the quotes and brackets.
+    """
+    parts = []
+    for field, value in product.items():
+        if fields is not None and field not in fields:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(str(item) for item in value)
+        elif isinstance(value, dict):
+            value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        parts.append(f"{field}: {value}")
+    return '; '.join(parts)
+
+
+def rank_products(candidates, user_msg=None):
+    """
+    Order (product, named) pairs for the context: named products first in
+    the order they were mentioned, then the rest by the number of words
+    they share with the query and by rating. Duplicates are dropped.
+    """
+    query_words = set(normalize(user_msg).split()) - STOP_WORDS if user_msg else set()
+    seen = set()
+    ranked = []
+    for position, (product, named) in enumerate(candidates):
+        name = product.get('name')
+        if name in seen:
+            continue
+        seen.add(name)
+        if named:
+            key = (0, position)
+        else:
+            text = ' '.join([name or '', product.get('description', '')] + product.get('features', []))
+            overlap = len(query_words & set(normalize(text).split()))
+            key = (1, -overlap, -(product.get('rating') or 0), position)
+        ranked.append((key, product))
+    ranked.sort(key=lambda item: item[0])
+    return [product for _, product in ranked]
+
+
+def _fill(ranked, budget, model):
+    # Returns (lines, names of the products that did not fit, tokens left)
+    lines = []
+    omitted = []
+    remaining = budget
+    for product in ranked:
+        line = serialize_product(product)
+        cost = count_tokens(line, model) + 1
+        if cost > remaining:
+            line = serialize_product(product, SHORT_FIELDS)
+            cost = count_tokens(line, model) + 1
+        if cost <= remaining:
+            lines.append(line)
+            remaining -= cost
+        else:
+            omitted.append(product.get('name'))
+    return lines, omitted, remaining
+
+
+def build_product_context(candidates, user_msg=None, token_budget=DEFAULT_TOKEN_BUDGET, model="gpt-4o-mini"):
+    """
+    Return the product information for the answer prompt, at most about
+    token_budget tokens. candidates is a list of (product, named) pairs,
+    where named means the customer asked for that product by name.
+    """
+    ranked = rank_products(candidates, user_msg)
+    lines, omitted, remaining = _fill(ranked, token_budget, model)
+    if not omitted:
+        return '\n'.join(lines)
+
+    # Something was left out, so fill again with room kept for saying so
+    reserve = count_tokens(f"{len(ranked)} more matching products omitted", model) + 1
+    lines, omitted, remaining = _fill(ranked, max(token_budget - reserve, 0), model)
+    remaining += min(reserve, token_budget)
+    note = f"Other matching products: {', '.join(omitted)}"
+    if count_tokens(note, model) + 1 <= remaining:
+        lines.append(note)
+    else:
+        note = f"{len(omitted)} more matching products omitted"
+        if count_tokens(note, model) + 1 <= remaining:
+            lines.append(note)
+    return '\n'.join(lines)
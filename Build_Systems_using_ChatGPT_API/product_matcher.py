@@ -0,0 +1,253 @@
+"""
+Local product and category matcher for customer queries.
+
+Most queries name products exactly as the catalog does ("SmartX
+ProPhone", "CineView 8K TV"), and sending them to the model just to copy
+the names back is slow and costs tokens. ProductMatcher scans a query in
+one pass with an Aho-Corasick automaton over the normalized product
+names, brands and category names, then tries difflib on the words left
+over to catch near misses such as "smartx pro phone". A brand counts
+only when the catalog has exactly one product of that brand.
+
+A match is trusted only when no catalog word is left unexplained (a
+query that also says "what TVs do you have" still needs the model).
+answer() returns the JSON list get_products_from_query would, or None
+when the query should go to the model, and counts how many calls it
+avoided.
+"""
+
+import difflib
+import json
+import re
+import threading
+from collections import deque, namedtuple
+
+# items is the list of {'category', 'products'} objects the model would
+# return; confidence is 1 for exact names, the difflib ratio for near
+# misses and 0 when part of the query could not be explained
+MatchResult = namedtuple('MatchResult', ['items', 'confidence'])
+
+EXACT, FUZZY, BRAND = 'exact', 'fuzzy', 'brand'
+
+# Confidence of a brand that resolves to its only product
+BRAND_CONFIDENCE = 0.95
+
+# Longest run of words compared against a name by the fuzzy fallback
+MAX_FUZZY_WORDS = 4
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase text and reduce it to words separated by single spaces"""
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def _singular(word):
+    return word[:-1] if len(word) > 2 and word.endswith('s') and not word.endswith('ss') else word
+
+
+class AhoCorasick:
+    """Finds every occurrence of a fixed set of patterns in one pass over the text"""
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._out[state].append(pattern)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text):
+        """Yield (start, pattern) for every occurrence, overlapping ones included"""
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._out[state]:
+                yield end - len(pattern), pattern
+
+
+class ProductMatcher:
+    def __init__(self, catalog, threshold=0.85, fuzzy_cutoff=0.9):
+        self.catalog = catalog
+        self.threshold = threshold
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.calls = 0
+        self.answered_locally = 0
+        self._lock = threading.Lock()
+        self._version = None
+
+    def _build(self):
+        products = self.catalog.products
+        # Normalized name -> (kind, category, product name or None)
+        entries = {}
+        by_brand = {}
+        vocabulary = set()
+        for product in products.values():
+            name, category = product.get('name'), product.get('category')
+            if not name or not category:
+                continue
+            entries[normalize(name)] = ('product', category, name)
+            by_brand.setdefault(normalize(product.get('brand') or ''), []).append(product)
+            for text in (name, category, product.get('brand') or ''):
+                vocabulary.update(_singular(word) for word in normalize(text).split())
+        for category in self.catalog.get_categories():
+            entries.setdefault(normalize(category), ('category', category, None))
+        brands = {brand: items[0] for brand, items in by_brand.items() if brand}
+        vocabulary.discard('and')
+
+        self._entries = entries
+        # Brands with a single product resolve to it; the rest only mark
+        # the query as needing the model
+        self._brands = {brand: (product['category'], product['name']) if len(by_brand[brand]) == 1 else None
+                        for brand, product in brands.items()}
+        self._vocabulary = vocabulary
+        # Patterns are padded with spaces so they only match whole words
+        self._automaton = AhoCorasick(f" {key} " for key in entries)
+        self._brand_automaton = AhoCorasick(f" {brand} " for brand in brands)
+        self._compact = {key.replace(' ', ''): key for key, entry in entries.items() if entry[0] == 'product'}
+        self._compact_by_prefix = {}
+        for compact in self._compact:
+            self._compact_by_prefix.setdefault(compact[:2], []).append(compact)
+        self._version = self.catalog.version
+
+    def _ensure_built(self):
+        self.catalog.products  # Picks up a changed products.json
+        if self._version != self.catalog.version:
+            with self._lock:
+                if self._version != self.catalog.version:
+                    self._build()
+
+    @staticmethod
+    def _word_spans(text):
+        # Offsets of each word in the space-padded text
+        spans, position = [], 1
+        for word in text[1:-1].split(' '):
+            spans.append((position, position + len(word)))
+            position += len(word) + 1
+        return spans
+
+    def _close_names(self, window):
+        # difflib.get_close_matches, but only against names that start with
+        # the same two letters: typos rarely hit the start of a name, and
+        # this keeps the fallback from comparing every window with every name
+        close = []
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(window)
+        for compact in self._compact_by_prefix.get(window[:2], ()):
+            matcher.set_seq1(compact)
+            if (matcher.real_quick_ratio() >= self.fuzzy_cutoff and matcher.quick_ratio() >= self.fuzzy_cutoff
+                    and matcher.ratio() >= self.fuzzy_cutoff):
+                close.append((matcher.ratio(), compact))
+        return close
+
+    def match(self, user_msg):
+        """Return the MatchResult for a query"""
+        self._ensure_built()
+        text = f" {normalize(user_msg)} "
+        words = text.split()
+        if not words:
+            return MatchResult([], 0.0)
+        spans = self._word_spans(text)
+        starts = {start: index for index, (start, _) in enumerate(spans)}
+        covered = [False] * len(words)
+        found = []
+
+        # Exact names, longest first where they overlap
+        occurrences = sorted(self._automaton.find(text), key=lambda item: (item[0], -len(item[1])))
+        for start, pattern in occurrences:
+            first = starts[start + 1]
+            count = len(pattern.split())
+            if not any(covered[first:first + count]):
+                covered[first:first + count] = [True] * count
+                found.append((first, EXACT, 1.0, self._entries[pattern[1:-1]]))
+
+        # Near misses among the words no exact name explained; a window
+        # close to two names is ambiguous and left alone
+        index = 0
+        while index < len(words):
+            best = None
+            for count in range(min(MAX_FUZZY_WORDS, len(words) - index), 0, -1):
+                if any(covered[index:index + count]):
+                    continue
+                window = ''.join(words[index:index + count])
+                close = self._close_names(window)
+                if len(close) == 1:
+                    ratio, compact = close[0]
+                    if best is None or ratio > best[0]:
+                        best = (ratio, count, compact)
+            if best is None:
+                index += 1
+                continue
+            ratio, count, compact = best
+            covered[index:index + count] = [True] * count
+            found.append((index, FUZZY, ratio, self._entries[self._compact[compact]]))
+            index += count
+
+        # Brands, which only settle a query when they have a single product
+        for start, pattern in self._brand_automaton.find(text):
+            index = starts[start + 1]
+            if not covered[index]:
+                covered[index] = True
+                resolved = self._brands[pattern[1:-1]]
+                if resolved is None:
+                    return MatchResult([], 0.0)
+                found.append((index, BRAND, BRAND_CONFIDENCE, ('product',) + resolved))
+
+        unexplained = any(not covered[index] and _singular(word) in self._vocabulary
+                          for index, word in enumerate(words))
+        if not found or unexplained:
+            return MatchResult([], 0.0)
+
+        # A category asked about outright stays its own item next to the
+        # products named in it, as the model would list them
+        items = {}
+        for _, _, _, (kind, category, name) in sorted(found):
+            item = items.setdefault((category, kind == 'product'), {'category': category})
+            if kind == 'product':
+                names = item.setdefault('products', [])
+                if name not in names:
+                    names.append(name)
+        return MatchResult(list(items.values()), min(score for _, _, score, _ in found))
+
+    def answer(self, user_msg):
+        """
+        Return the query's products and categories as a JSON list, or None
+        when the match is not confident enough and the model should decide
+        """
+        result = self.match(user_msg)
+        with self._lock:
+            self.calls += 1
+            if result.confidence >= self.threshold:
+                self.answered_locally += 1
+                return json.dumps(result.items)
+        return None
+
+    def stats(self):
+        return {'calls': self.calls, 'answered_locally': self.answered_locally,
+                'escalated': self.calls - self.answered_locally,
+                'avoided_share': self.answered_locally / self.calls if self.calls else 0.0}
@@ -0,0 +1,159 @@
+"""
+System prompts generated once from the product catalog.
+
+The product-extraction prompts list every category and product. They
+used to be rebuilt with f-strings on every call, and get_products_from_query
+regrouped the catalog for each one. PromptTemplates renders every prompt
+once per catalog version. messages() puts that exact string first in the
+request and the user's text after it, so every request starts with a
+byte-identical prefix that providers can prefix-cache. stats() reports how
+many prompt bytes each request took from the precompiled prefix.
+"""
+
+import threading
+
+delimiter = "####"
+
+PRODUCTS_QUERY = 'products_query'
+CATEGORY_AND_PRODUCT_ONLY = 'category_and_product_only'
+STEP_2 = 'step_2'
+
+
+def format_allowed_products(names_by_category):
+    """The 'Allowed products' listing: each category followed by its product names"""
+    return '\n\n'.join(f"{category} category:\n" + '\n'.join(names)
+                       for category, names in names_by_category.items())
+
+
+def _products_query_prompt(names_by_category):
+    # Used by get_products_from_query (L5, L8)
+    return f"""
+    You will be provided with customer service queries. \
+    The customer service query will be delimited with {delimiter} characters.
+    Output a python list of json objects, where each object has the following format:
+        'category': <one of {', '.join(names_by_category)}>,
+    OR
+        'products': <a list of products that must be found in the allowed products below>
+
+    Where the categories and products must be found in the customer service query.
+    If a product is mentioned, it must be associated with the correct category in the allowed products list below.
+    If no products or categories are found, output an empty list.
+
+    The allowed products are provided in JSON format.
+    The keys of each item represent the category.
+    The values of each item is a list of products that are within that category.
+    Allowed products: {names_by_category}
+
+    """
+
+
+def _category_and_product_only_prompt(names_by_category):
+    # Used by find_category_and_product_only (L7)
+    return f"""
+    You will be provided with customer service queries. \
+    The customer service query will be delimited with {delimiter} characters.
+    Output a python list of objects, where each object has the following format:
+    'category': <one of {', '.join(names_by_category)}>,
+    OR
+    'products': <a list of products that must be found in the allowed products below>
+
+    Where the categories and products must be found in the customer service query.
+    If a product is mentioned, it must be associated with the correct category in the allowed products list below.
+    If no products or categories are found, output an empty list.
+
+    Allowed products:
+{format_allowed_products(names_by_category)}
+
+    Only output the list of objects, nothing else.
+    """
+
+
+def _step_2_prompt(names_by_category):
+    # Product extraction for a whole conversation
+    return f"""
+You will be provided with customer service a conversation. \
+The most recent user query will be delimited with \
+{delimiter} characters.
+Output a python list of objects, where each object has \
+the following format:
+    'category': <one of {', '.join(names_by_category)}>,
+OR
+    'products': <a list of products that must \
+    be found in the allowed products below>
+
+Where the categories and products must be found in \
+the customer service query.
+If a product is mentioned, it must be associated with \
+the correct category in the allowed products list below.
+If no products or categories are found, output an \
+empty list.
+Only list products and categories that have not already \
+been mentioned and discussed in the earlier parts of \
+the conversation.
+
+Allowed products:
+
+{format_allowed_products(names_by_category)}
+
+Only output the list of objects, with nothing else.
+"""
+
+
+BUILDERS = {
+    PRODUCTS_QUERY: _products_query_prompt,
+    CATEGORY_AND_PRODUCT_ONLY: _category_and_product_only_prompt,
+    STEP_2: _step_2_prompt,
+}
+
+
+class PromptTemplates:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.builds = 0
+        self.requests = 0
+        self.prefix_bytes = 0
+        self.user_bytes = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._prompts = {}
+        self._sizes = {}
+
+    def _ensure_built(self):
+        self.catalog.products  # Picks up a changed products.json
+        if self._version != self.catalog.version:
+            with self._lock:
+                if self._version != self.catalog.version:
+                    names_by_category = self.catalog.get_names_by_category()
+                    self._prompts = {name: build(names_by_category) for name, build in BUILDERS.items()}
+                    self._sizes = {name: len(prompt.encode('utf-8')) for name, prompt in self._prompts.items()}
+                    self._version = self.catalog.version
+                    self.builds += 1
+
+    def system_message(self, name):
+        """The precompiled system prompt called name, e.g. PRODUCTS_QUERY"""
+        self._ensure_built()
+        return self._prompts[name]
+
+    def messages(self, name, user_input):
+        """Chat messages for user_input behind the precompiled system prompt"""
+        system_message = self.system_message(name)
+        content = f"{delimiter}{user_input}{delimiter}"
+        with self._lock:
+            self.requests += 1
+            self.prefix_bytes += self._sizes[name]
+            self.user_bytes += len(content.encode('utf-8'))
+        return [
+            {'role': 'system', 'content': system_message},
+            {'role': 'user', 'content': content},
+        ]
+
+    def stats(self):
+        """
+        prefix_bytes_per_request is the prompt size taken from the
+        precompiled, byte-identical prefix instead of being rebuilt per call
+        """
+        total = self.prefix_bytes + self.user_bytes
+        return {'requests': self.requests, 'builds': self.builds,
+                'prefix_bytes': self.prefix_bytes, 'user_bytes': self.user_bytes,
+                'prefix_bytes_per_request': self.prefix_bytes / self.requests if self.requests else 0.0,
+                'prefix_share': self.prefix_bytes / total if total else 0.0}
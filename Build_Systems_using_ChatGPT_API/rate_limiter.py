@@ -0,0 +1,103 @@
+"""
+Concurrency and rate limits for async LLM calls.
+
+AsyncRateLimiter is a pair of token buckets, one for requests per minute
+and one for tokens per minute, refilled continuously. Each request runs
+inside `async with limiter.limit(tokens)`, which also takes a slot from a
+semaphore so no more than max_concurrency requests are in flight.
+"""
+
+import asyncio
+import time
+
+
+def estimate_tokens(messages, max_tokens):
+    """
+    Rough token cost of a chat request, as providers count it against a
+    tokens-per-minute limit: the prompt (about 4 characters per token)
+    plus the completion budget.
+    """
+    prompt_chars = sum(len(message.get('content') or '') for message in messages)
+    return prompt_chars // 4 + 4 * len(messages) + max_tokens
+
+
+class AsyncRateLimiter:
+    def __init__(self, max_concurrency=50, requests_per_minute=None, tokens_per_minute=None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = requests_per_minute or 0
+        self._token_allowance = tokens_per_minute or 0
+        self._updated = time.monotonic()
+        # Created lazily so they belong to the event loop that uses them
+        self._semaphore = None
+        self._lock = None
+        self._loop = None
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_allowance = min(self.requests_per_minute,
+                                          self._request_allowance + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_allowance = min(self.tokens_per_minute,
+                                        self._token_allowance + elapsed * self.tokens_per_minute / 60)
+
+    async def _wait_for_budget(self, tokens):
+        if self.tokens_per_minute:
+            # A single request larger than the whole budget could never run
+            tokens = min(tokens, self.tokens_per_minute)
+        # The lock makes waiters queue in order instead of racing for refills
+        async with self._lock:
+            while True:
+                self._refill()
+                waits = []
+                if self.requests_per_minute and self._request_allowance < 1:
+                    waits.append((1 - self._request_allowance) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._token_allowance < tokens:
+                    waits.append((tokens - self._token_allowance) * 60 / self.tokens_per_minute)
+                if not waits:
+                    break
+                await asyncio.sleep(max(waits))
+            if self.requests_per_minute:
+                self._request_allowance -= 1
+            if self.tokens_per_minute:
+                self._token_allowance -= tokens
+
+    def limit(self, tokens=0):
+        """
+        Async context manager for one request costing about `tokens`:
+
+            async with limiter.limit(tokens):
+                await client.chat.completions.create(...)
+        """
+        return _Slot(self, tokens)
+
+
+class _Slot:
+    def __init__(self, limiter, tokens):
+        self.limiter = limiter
+        self.tokens = tokens
+
+    async def __aenter__(self):
+        self.limiter._bind()
+        await self.limiter._semaphore.acquire()
+        try:
+            await self.limiter._wait_for_budget(self.tokens)
+        except BaseException:
+            self.limiter._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.limiter._semaphore.release()
+        return False
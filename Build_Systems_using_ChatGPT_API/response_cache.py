@@ -0,0 +1,116 @@
+"""
+Content-addressed cache for chat completion responses.
+
+Requests are keyed by a SHA-256 of the model, messages, temperature and
+max_tokens. Lookups go to an in-memory LRU first and then to an optional
+SQLite file. Entries in both expire after ttl seconds; the file's are also
+evicted oldest first once it holds more than max_disk_entries responses,
+counted as they are written rather than with COUNT(*) on every insert.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(model, messages, temperature, max_tokens):
+    payload = json.dumps({'model': model, 'messages': messages, 'temperature': temperature,
+                          'max_tokens': max_tokens}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=None, max_memory_entries=1024, max_disk_entries=100_000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # key -> (response, created)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_entries = 0
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS responses '
+                             '(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_created ON responses (created)')
+            self._db.commit()
+            self._disk_entries = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        with self._lock:
+            now = time.time()
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, response):
+        with self._lock:
+            now = time.time()
+            self._remember(key, response, now)
+            if self._db is not None:
+                exists = self._db.execute('SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone()
+                self._db.execute('INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)',
+                                 (key, response, now))
+                if exists is None:
+                    self._disk_entries += 1
+                self._evict(now)
+                self._db.commit()
+
+    def _remember(self, key, response, created):
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        # Both deletes walk the created index, so a set that has nothing to
+        # evict costs two index lookups
+        self._disk_entries -= self._db.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,)).rowcount
+        if self._disk_entries > self.max_disk_entries:
+            self._disk_entries -= self._db.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY created LIMIT ?)',
+                (self._disk_entries - self.max_disk_entries,)).rowcount
+
+    def stats(self):
+        return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._db.commit()
+                self._disk_entries = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,84 @@
+"""
+Timing of streamed completions.
+
+StreamMetrics keeps the most recent calls' time to first token, total
+time and tokens per second, so a chat front end (or a benchmark) can see
+how quickly answers start to render. One StreamTimer measures one call:
+it is started when the request is sent, told about every piece of text
+as it arrives, and finished once the stream ends.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+# ttft is the seconds from sending the request to the first text; tokens
+# is the completion token count reported by the API, or the number of
+# streamed pieces when it reports none
+StreamStats = namedtuple('StreamStats', ['ttft', 'seconds', 'tokens', 'tokens_per_second', 'cached'])
+
+
+class StreamTimer:
+    def __init__(self, metrics, cached=False):
+        self.metrics = metrics
+        self.cached = cached
+        self.start = time.perf_counter()
+        self.first = None
+        self.pieces = 0
+        self.tokens = None
+
+    def piece(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.pieces += 1
+
+    def finish(self):
+        end = time.perf_counter()
+        seconds = end - self.start
+        ttft = (self.first if self.first is not None else end) - self.start
+        tokens = self.tokens if self.tokens is not None else self.pieces
+        # Generation speed after the first token, the part the reader waits through
+        generating = end - (self.first if self.first is not None else end)
+        stats = StreamStats(ttft, seconds, tokens, tokens / generating if generating > 0 else None, self.cached)
+        self.metrics.record(stats)
+        return stats
+
+
+class StreamMetrics:
+    def __init__(self, max_calls=1000):
+        self.calls = deque(maxlen=max_calls)
+        self._lock = threading.Lock()
+
+    def timer(self, cached=False):
+        return StreamTimer(self, cached)
+
+    def record(self, stats):
+        with self._lock:
+            self.calls.append(stats)
+
+    def last(self):
+        """StreamStats of the most recent call, or None"""
+        with self._lock:
+            return self.calls[-1] if self.calls else None
+
+    def summary(self):
+        """Median and 95th percentile time to first token and mean tokens per second"""
+        with self._lock:
+            calls = list(self.calls)
+        ttfts = sorted(call.ttft for call in calls)
+        rates = [call.tokens_per_second for call in calls if call.tokens_per_second is not None]
+
+        def percentile(fraction):
+            # Nearest rank
+            if not ttfts:
+                return None
+            return ttfts[max(0, min(len(ttfts) - 1, round(fraction * len(ttfts)) - 1))]
+
+        return {'calls': len(calls),
+                'ttft_p50': percentile(0.50),
+                'ttft_p95': percentile(0.95),
+                'tokens_per_second': sum(rates) / len(rates) if rates else None}
+
+    def clear(self):
+        with self._lock:
+            self.calls.clear()
@@ -0,0 +1,104 @@
+"""
+Unit tests for catalog.py.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from catalog import ProductCatalog
+
+PRODUCTS = {
+    "SmartX ProPhone": {"name": "SmartX ProPhone", "category": "Smartphones and Accessories", "price": 899.99},
+    "SmartX EarBuds": {"name": "SmartX EarBuds", "category": "Smartphones and Accessories", "price": 99.99},
+    "CineView 8K TV": {"name": "CineView 8K TV", "category": "Televisions and Home Theater Systems", "price": 2999.99},
+}
+
+
+class TestProductCatalog(unittest.TestCase):
+    """Unit tests for ProductCatalog."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "products.json")
+        self.write_products(PRODUCTS, mtime_ns=1_000_000_000)
+        self.catalog = ProductCatalog(self.path, check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_products(self, products, mtime_ns):
+        with open(self.path, "w") as file:
+            json.dump(products, file)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_lookups(self):
+        """Test name and category lookups."""
+        self.assertEqual(self.catalog.get_product("CineView 8K TV")["price"], 2999.99)
+        self.assertIsNone(self.catalog.get_product("Unknown"))
+        self.assertEqual([p["name"] for p in self.catalog.get_products_in_category("Smartphones and Accessories")],
+                         ["SmartX ProPhone", "SmartX EarBuds"])
+        self.assertEqual(self.catalog.get_names_by_category()["Televisions and Home Theater Systems"],
+                         ["CineView 8K TV"])
+
+    def test_file_read_once(self):
+        """Test that repeated lookups do not re-read the file."""
+        self.catalog.get_product("SmartX ProPhone")
+        with patch("builtins.open") as mock_open:
+            for _ in range(10):
+                self.catalog.get_product("SmartX ProPhone")
+                self.catalog.get_products_in_category("Smartphones and Accessories")
+            mock_open.assert_not_called()
+        self.assertEqual(self.catalog.version, 1)
+
+    def test_reload_on_mtime_change(self):
+        """Test that a rewritten file is picked up."""
+        self.assertIsNotNone(self.catalog.get_product("CineView 8K TV"))
+        products = dict(PRODUCTS)
+        del products["CineView 8K TV"]
+        self.write_products(products, mtime_ns=2_000_000_000)
+        self.assertIsNone(self.catalog.get_product("CineView 8K TV"))
+        self.assertEqual(self.catalog.version, 2)
+
+    def test_reload(self):
+        """Test that reload() picks up a rewrite at once, even within the interval and with the same mtime."""
+        catalog = ProductCatalog(self.path, check_interval=3600)
+        self.assertIsNotNone(catalog.get_product("CineView 8K TV"))
+        self.write_products({}, mtime_ns=1_000_000_000)
+        catalog.reload()
+        self.assertIsNone(catalog.get_product("CineView 8K TV"))
+
+    def test_products_read_only(self):
+        """Test that callers cannot change the catalog through products."""
+        with self.assertRaises(TypeError):
+            self.catalog.products["Unknown"] = {}
+        self.assertEqual(set(self.catalog.products), set(PRODUCTS))
+
+    def test_check_interval(self):
+        """Test that the mtime is not checked again within the interval."""
+        catalog = ProductCatalog(self.path, check_interval=3600)
+        catalog.get_product("SmartX ProPhone")
+        with patch("os.stat") as mock_stat:
+            catalog.get_product("SmartX ProPhone")
+            mock_stat.assert_not_called()
+
+
+
+class TestCreateProducts(unittest.TestCase):
+    """Unit tests for create_products and the shared catalog."""
+    def test_rewrite_seen_at_once(self):
+        """Test that lookups right after create_products() see the new file."""
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                patch.object(utils, "products_file", os.path.join(tmp_dir, "products.json")):
+            with open(utils.products_file, "w") as file:
+                json.dump({}, file)
+            self.assertIsNone(utils.get_product_by_name("CineView 8K TV"))
+            utils.create_products()
+            self.assertEqual(utils.get_product_by_name("CineView 8K TV")["price"], 2999.99)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Unit tests for eval_runner.py, run against the local OpenAI stub from test_utils.py.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import eval_runner
+import utils
+from test_utils import StubOpenAITestCase, pipeline_reply
+
+
+class TestEvalRunner(StubOpenAITestCase):
+    """Unit tests for the batch evaluation runner."""
+    def setUp(self):
+        super().setUp()
+        self.server.reply = pipeline_reply
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cases_path = os.path.join(self.tmp_dir.name, "cases.jsonl")
+        self.results_path = os.path.join(self.tmp_dir.name, "results.jsonl")
+        with open(self.cases_path, "w", encoding="utf-8") as file:
+            for i in range(6):
+                user_msg = f"tell me about your {'phone' if i % 2 else 'speakers'} #{i}"
+                ideal = {"Smartphones and Accessories": ["SmartX ProPhone"]}
+                file.write(json.dumps({"customer_msg": user_msg, "ideal_answer": ideal}) + "\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_and_summarize(self):
+        """Test that every case is evaluated, scored and reported."""
+        results, cases_run, seconds = eval_runner.run_evaluation(self.cases_path, self.results_path, workers=3)
+        self.assertEqual(cases_run, 6)
+        self.assertEqual(sorted(results), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(results[2]["answer"], "answer to tell me about your phone #1 (1 products)")
+        self.assertEqual(results[2]["score"], 1)
+        self.assertEqual(results[1]["score"], 0)
+        with open(self.results_path, encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 6)
+
+        summary = eval_runner.summarize(results, cases_run, seconds)
+        self.assertEqual(summary["errors"], 0)
+        self.assertEqual(summary["mean_score"], 0.5)
+        self.assertLessEqual(summary["latency"]["total"]["p50"], summary["latency"]["total"]["p95"])
+        self.assertEqual(summary["usage"]["products"]["requests"], 6)
+        self.assertEqual(summary["usage"]["answer"]["total_tokens"], 6 * 12)
+
+    def test_resume(self):
+        """Test that a rerun skips finished cases and drops a half-written line."""
+        eval_runner.run_evaluation(self.cases_path, self.results_path, workers=2)
+        with open(self.results_path, encoding="utf-8") as file:
+            lines = file.readlines()
+        with open(self.results_path, "w", encoding="utf-8") as file:
+            file.writelines(lines[:4])
+            file.write(lines[4][:20])
+        results, cases_run, _ = eval_runner.run_evaluation(self.cases_path, self.results_path)
+        self.assertEqual(cases_run, 2)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(len(eval_runner.load_results(self.results_path)), 6)
+
+    def test_errors_are_retried(self):
+        """Test that a failed case is recorded and run again on resume."""
+        utils.configure_client(max_retries=0)
+        try:
+            with open(self.cases_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps({"id": "bad", "customer_msg": "fail"}) + "\n")
+            results, _, _ = eval_runner.run_evaluation(self.cases_path, self.results_path)
+            self.assertIn("InternalServerError", results["bad"]["error"])
+            results, cases_run, _ = eval_runner.run_evaluation(self.cases_path, self.results_path)
+        finally:
+            utils.configure_client()
+        self.assertEqual(cases_run, 1)
+        self.assertEqual(eval_runner.summarize(results)["errors"], 1)
+
+
+class TestTokenUsage(StubOpenAITestCase):
+    """Unit tests for track_token_usage."""
+    def test_counts_requests_and_cache_hits(self):
+        """Test that usage is counted per block and cache hits cost nothing."""
+        messages = [{"role": "user", "content": "hello"}]
+        with utils.track_token_usage() as usage:
+            utils.get_completion_from_messages(messages)
+            with utils.track_token_usage() as inner:
+                utils.get_completion_from_messages(messages)
+        self.assertEqual(usage, {"requests": 1, "cached_responses": 0, "prompt_tokens": 10,
+                                 "completion_tokens": 2, "total_tokens": 12})
+        self.assertEqual(inner["cached_responses"], 1)
+        self.assertEqual(inner["total_tokens"], 0)
+
+
+class TestScoreProducts(unittest.TestCase):
+    """Unit tests for score_products."""
+    def test_scores(self):
+        """Test the L8 scoring rules."""
+        ideal = {"Cameras and Camcorders": ["ActionCam 4K"], "Audio Equipment": ["SmartX EarBuds"]}
+        response = ("[{'category': 'Cameras and Camcorders', 'products': ['ActionCam 4K']}, "
+                    "{'category': 'Audio Equipment', 'products': ['SmartX EarBuds', 'SoundMax Soundbar']}]")
+        self.assertEqual(eval_runner.score_products(response, ideal), 0.5)
+        self.assertEqual(eval_runner.score_products("[]", []), 1)
+        self.assertEqual(eval_runner.score_products("[]", ideal), 0)
+        self.assertEqual(eval_runner.score_products("not json", ideal), 0)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(eval_runner.percentile(values, 0.5), 50)
+        self.assertEqual(eval_runner.percentile(values, 0.95), 95)
+        self.assertEqual(eval_runner.percentile([7], 0.95), 7)
+        self.assertIsNone(eval_runner.percentile([], 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for output_parser.py, using the corpus from benchmark_output_parser.py.
+"""
+
+import os
+import random
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from benchmark_output_parser import build_corpus, fuzz_corpus
+from output_parser import ProductSchema, StreamingListParser, parse_product_list
+from test_utils import StubOpenAITestCase
+
+
+class TestParseProductList(unittest.TestCase):
+    """Unit tests for parse_product_list."""
+    def test_formats(self):
+        """Test JSON, Python literals, apostrophes, fences and surrounding prose."""
+        expected = [{"category": "Audio Equipment", "products": ["Men's Headphones"]}]
+        for text in ['[{"category": "Audio Equipment", "products": ["Men\'s Headphones"]}]',
+                     "[{'category': 'Audio Equipment', 'products': [\"Men's Headphones\"]}]",
+                     "[{'category': 'Audio Equipment', 'products': ['Men\\'s Headphones']}]",
+                     '```json\n[{"category": "Audio Equipment", "products": ["Men\'s Headphones"]}]\n```',
+                     'Sure, here it is: [{"category": "Audio Equipment", "products": ["Men\'s Headphones"]}] [done]']:
+            self.assertEqual(parse_product_list(text), expected, text)
+
+    def test_truncated(self):
+        """Test that complete objects are recovered from output cut off mid-list."""
+        text = '[{"category": "Cameras and Camcorders"}, {"category": "Audio Equipment", "products": ["Wave'
+        self.assertEqual(parse_product_list(text), [{"category": "Cameras and Camcorders"}])
+
+    def test_no_list(self):
+        """Test that output without a list gives None and an empty list stays empty."""
+        self.assertIsNone(parse_product_list("I could not find any products."))
+        self.assertIsNone(parse_product_list(None))
+        self.assertEqual(parse_product_list("[]"), [])
+
+    def test_corpus(self):
+        """Test that every corpus case parses to its expected list."""
+        for kind, text, expected in build_corpus(size=140):
+            self.assertEqual(parse_product_list(text), expected, f"{kind}: {text}")
+
+    def test_fuzz(self):
+        """Test that mutated output never raises."""
+        for text in fuzz_corpus(size=300):
+            self.assertIn(type(parse_product_list(text)), (list, type(None)), text)
+
+
+class TestStreamingListParser(unittest.TestCase):
+    """Unit tests for StreamingListParser."""
+    def test_random_chunks(self):
+        """Test that any split of the text yields the same objects, each as soon as it closes."""
+        rng = random.Random(1)
+        for _, text, expected in build_corpus(size=70):
+            parser = StreamingListParser()
+            position = 0
+            while position < len(text):
+                size = rng.randint(1, 12)
+                parser.feed(text[position:position + size])
+                position += size
+            objects = [item for item in expected if isinstance(item, dict)]
+            self.assertEqual(parser.items, objects, text)
+
+    def test_objects_arrive_early(self):
+        """Test that an object is returned before the list is finished."""
+        parser = StreamingListParser()
+        self.assertEqual(parser.feed("Here: [{'category': 'Audio Equipment'}"), [{"category": "Audio Equipment"}])
+        self.assertFalse(parser.finished)
+        self.assertEqual(parser.feed(", {'category': 'Cameras'}] and {'more': 1}"), [{"category": "Cameras"}])
+        self.assertTrue(parser.finished)
+
+
+class TestProductSchema(unittest.TestCase):
+    """Unit tests for ProductSchema."""
+    def test_validate(self):
+        """Test that unknown names are dropped, with items naming only unknown products, and known ones corrected."""
+        schema = ProductSchema({"Cameras and Camcorders": ["ActionCam 4K", "ZoomMaster Camcorder"],
+                                "Audio Equipment": ["WaveSound Soundbar"]})
+        items = [{"category": "cameras and camcorders", "products": ["actioncam 4k", "Unknown Cam"]},
+                 {"category": "Cameras and Camcorders", "products": ["WaveSound Soundbar"]},
+                 {"category": "Audio Equipment"},
+                 {"category": "Audio Equipment", "products": ["WaveSound Hologram"]},
+                 {"category": "Cameras and Camcorders", "products": []},
+                 {"category": "Toys"},
+                 "not an object"]
+        self.assertEqual(schema.validate(items), [
+            {"category": "Cameras and Camcorders", "products": ["ActionCam 4K"]},
+            {"category": "Audio Equipment", "products": ["WaveSound Soundbar"]},
+            {"category": "Audio Equipment"},
+            {"category": "Cameras and Camcorders"},
+        ])
+
+
+class TestUtilsParsing(StubOpenAITestCase):
+    """Unit tests for the parser in utils."""
+    def test_read_string_to_list(self):
+        """Test that apostrophes no longer break read_string_to_list and unknown names are dropped."""
+        self.assertEqual(utils.read_string_to_list("Here's the list: [{'category': 'Audio Equipment', "
+                                                   "'products': [\"Kid's Tablet\", 'wavesound soundbar']}]"),
+                         [{"category": "Audio Equipment", "products": ["WaveSound Soundbar"]}])
+
+    def test_pipeline_validates(self):
+        """Test that the non-streaming pipeline only looks up catalog products."""
+        self.server.reply = ("[{'category': 'Smartphones and Accessories', 'products': ['SmartX ProPhone', 'Pear Phone']}, "
+                             "{'category': 'Toys'}, {'category': 'Cameras and Camcorders', 'products': ['Fotosnap X']}]")
+        response = utils.get_products_from_query("what phones or cameras do you sell?")
+        items = utils.read_string_to_list(response)
+        self.assertEqual(items, [{"category": "Smartphones and Accessories", "products": ["SmartX ProPhone"]}])
+        self.assertIn("SmartX ProPhone", utils.generate_output_string(items))
+
+    def test_stream_products_from_query(self):
+        """Test that checked objects are yielded from the streamed model output."""
+        self.server.reply = ("[{'category': 'Smartphones and Accessories', 'products': ['SmartX ProPhone', 'Pear Phone']}, "
+                             "{'category': 'Cameras and Camcorders'}]")
+        items = list(utils.stream_products_from_query("what phone or camera should I buy?"))
+        self.assertEqual(items, [{"category": "Smartphones and Accessories", "products": ["SmartX ProPhone"]},
+                                 {"category": "Cameras and Camcorders"}])
+        self.assertTrue(self.server.requests[0]["stream"])
+
+    def test_stream_products_from_query_repeats(self):
+        """Test that a category or product the model repeats in a later object is not yielded again."""
+        self.server.reply = ("[{'category': 'Cameras and Camcorders'}, "
+                             "{'category': 'Smartphones and Accessories', 'products': ['SmartX ProPhone']}, "
+                             "{'category': 'Cameras and Camcorders'}, "
+                             "{'category': 'Smartphones and Accessories', 'products': ['SmartX ProPhone', 'SmartX EarBuds']}]")
+        items = list(utils.stream_products_from_query("which phones and cameras do you have?"))
+        self.assertEqual(items, [{"category": "Cameras and Camcorders"},
+                                 {"category": "Smartphones and Accessories", "products": ["SmartX ProPhone"]},
+                                 {"category": "Smartphones and Accessories", "products": ["SmartX EarBuds"]}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for product_context.py and generate_output_string.
+"""
+
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from product_context import build_product_context, count_tokens, rank_products, serialize_product
+
+TV_CATEGORY = "Televisions and Home Theater Systems"
+
+
+def products(*names):
+    return [utils.get_product_by_name(name) for name in names]
+
+
+class TestProductContext(unittest.TestCase):
+    """Unit tests for the token-budgeted context builder."""
+    def test_serialize_product(self):
+        """Test the one-line format and the short form."""
+        product = {"name": "X", "features": ["a", "b"], "price": 9.5}
+        self.assertEqual(serialize_product(product), "name: X; features: a, b; price: 9.5")
+        self.assertEqual(serialize_product(product, ("name", "price")), "name: X; price: 9.5")
+
+    def test_rank_products(self):
+        """Test that named products lead, then query overlap, then rating."""
+        oled, tv_4k, tv_8k, phone = products("CineView OLED TV", "CineView 4K TV", "CineView 8K TV", "SmartX ProPhone")
+        candidates = [(tv_4k, False), (tv_8k, False), (oled, False), (phone, True), (tv_4k, False)]
+        ranked = rank_products(candidates, "Do you have an OLED one?")
+        self.assertEqual([product["name"] for product in ranked],
+                         ["SmartX ProPhone", "CineView OLED TV", "CineView 8K TV", "CineView 4K TV"])
+
+    def test_budget(self):
+        """Test that the context fits the budget and names what was left out."""
+        candidates = [(product, False) for product in utils.get_products_by_category(TV_CATEGORY)]
+        full = build_product_context(candidates, token_budget=10_000)
+        self.assertEqual(len(full.splitlines()), 5)
+        budget = count_tokens(full) // 2
+        context = build_product_context(candidates, token_budget=budget)
+        self.assertLessEqual(sum(count_tokens(line) + 1 for line in context.splitlines()), budget)
+        self.assertRegex(context.splitlines()[-1], r"^(Other matching products: |\d+ more matching products omitted)")
+
+    def test_note_fits_any_budget(self):
+        """Test that the note about left-out products never pushes the context over a tight budget."""
+        candidates = [(product, False) for product in utils.get_products_by_category(TV_CATEGORY)]
+        full = sum(count_tokens(line) + 1 for line in build_product_context(candidates, token_budget=10_000).splitlines())
+        for budget in range(full):
+            lines = build_product_context(candidates, token_budget=budget).splitlines()
+            self.assertLessEqual(sum(count_tokens(line) + 1 for line in lines), budget, budget)
+            products_listed = sum(line.startswith("name: ") for line in lines)
+            if products_listed < 5 and budget >= count_tokens("5 more matching products omitted") + 1:
+                self.assertRegex(lines[-1], r"^(Other matching products: |\d+ more matching products omitted)", budget)
+
+    def test_short_form_when_full_line_does_not_fit(self):
+        """Test that a product too long for the remaining budget keeps its key facts."""
+        product = utils.get_product_by_name("CineView 8K TV")
+        context = build_product_context([(product, True)], token_budget=40)
+        self.assertIn("name: CineView 8K TV", context)
+        self.assertIn("price: 2999.99", context)
+        self.assertNotIn("features", context)
+
+
+class TestGenerateOutputString(unittest.TestCase):
+    """Unit tests for generate_output_string."""
+    def test_named_products_and_category(self):
+        """Test that named products come first and a category fits the budget."""
+        data_list = [{"category": TV_CATEGORY},
+                     {"category": "Cameras and Camcorders", "products": ["FotoSnap DSLR Camera", "Unknown Camera"]},
+                     {"foo": "bar"}]
+        output = utils.generate_output_string(data_list, "What TVs do you have?", token_budget=200)
+        lines = output.splitlines()
+        self.assertTrue(lines[0].startswith("name: FotoSnap DSLR Camera;"))
+        self.assertLessEqual(sum(count_tokens(line) + 1 for line in lines), 200)
+        self.assertRegex(lines[-1], r"^(Other matching products: |\d+ more matching products omitted)")
+
+    def test_empty(self):
+        """Test that no matches give an empty string."""
+        self.assertEqual(utils.generate_output_string(None), "")
+        self.assertEqual(utils.generate_output_string([]), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit tests for product_matcher.py.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from catalog import ProductCatalog
+from product_matcher import AhoCorasick, ProductMatcher
+from test_utils import StubOpenAITestCase
+
+PRODUCTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "products.json")
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """Unit tests for the AhoCorasick automaton."""
+    def test_finds_overlapping_patterns(self):
+        """Test that every occurrence is reported with its start offset."""
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        self.assertEqual(sorted(automaton.find("ushers")), [(1, "she"), (2, "he"), (2, "hers")])
+
+
+class TestProductMatcher(unittest.TestCase):
+    """Unit tests for ProductMatcher."""
+    def setUp(self):
+        self.matcher = ProductMatcher(ProductCatalog(PRODUCTS_PATH))
+
+    def test_exact_names(self):
+        """Test that names in any case and punctuation are matched and grouped by category."""
+        result = self.matcher.match("Do you sell the SOUNDMAX soundbar, the CineView 8K TV or the WaveSound Soundbar?")
+        self.assertEqual(result.confidence, 1.0)
+        self.assertEqual(result.items, [
+            {"category": "Televisions and Home Theater Systems", "products": ["SoundMax Soundbar", "CineView 8K TV"]},
+            {"category": "Audio Equipment", "products": ["WaveSound Soundbar"]},
+        ])
+
+    def test_category(self):
+        """Test that a category named outright is returned without products."""
+        result = self.matcher.match("What do you have in Audio Equipment?")
+        self.assertEqual(result.items, [{"category": "Audio Equipment"}])
+
+    def test_category_and_products(self):
+        """Test that a category asked about outright is kept apart from the products named in it."""
+        result = self.matcher.match("What is in Televisions and Home Theater Systems, and is the CineView 8K TV good?")
+        self.assertEqual(result.items, [
+            {"category": "Televisions and Home Theater Systems"},
+            {"category": "Televisions and Home Theater Systems", "products": ["CineView 8K TV"]},
+        ])
+        result = self.matcher.match("what TVs do you have, and tell me about the CineView 8K TV")
+        self.assertEqual(result.items, [])  # "TVs" is left to the model
+
+    def test_near_misses(self):
+        """Test that split or misspelt names are matched with a lower confidence."""
+        result = self.matcher.match("tell me about the smartx pro phone")
+        self.assertEqual(result.items, [{"category": "Smartphones and Accessories", "products": ["SmartX ProPhone"]}])
+        result = self.matcher.match("is the cineveiw 8k tv any good")
+        self.assertEqual(result.items[0]["products"], ["CineView 8K TV"])
+        self.assertLess(result.confidence, 1.0)
+        self.assertGreaterEqual(result.confidence, self.matcher.threshold)
+
+    def test_brands(self):
+        """Test that a brand resolves only when it has a single product."""
+        result = self.matcher.match("Compare the ZoomMaster with the ActionCam 4K")
+        self.assertEqual(result.items, [{"category": "Cameras and Camcorders",
+                                         "products": ["ZoomMaster Camcorder", "ActionCam 4K"]}])
+        self.assertEqual(self.matcher.match("tell me about the fotosnap camera").confidence, 0.0)
+
+    def test_escalates_unexplained_queries(self):
+        """Test that queries with catalog words left over, or no match at all, go to the model."""
+        for user_msg in ["tell me about the SmartX ProPhone. Also, what TVs do you have?",
+                         "I need a charger for my smartphone",
+                         "I would like a hot tub time machine."]:
+            self.assertIsNone(self.matcher.answer(user_msg), user_msg)
+        self.assertEqual(self.matcher.stats()["escalated"], 3)
+
+    def test_answer_and_stats(self):
+        """Test that answer() returns the model's JSON format and counts avoided calls."""
+        answer = self.matcher.answer("How much is the GameSphere VR Headset?")
+        self.assertEqual(utils.read_string_to_list(answer),
+                         [{"category": "Gaming Consoles and Accessories", "products": ["GameSphere VR Headset"]}])
+        self.matcher.answer("What could be a good present for my videographer friend?")
+        self.assertEqual(self.matcher.stats(), {"calls": 2, "answered_locally": 1, "escalated": 1,
+                                                "avoided_share": 0.5})
+
+    def test_rebuilds_on_catalog_change(self):
+        """Test that the matcher picks up products added to the catalog."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "products.json")
+            shutil.copy(PRODUCTS_PATH, path)
+            matcher = ProductMatcher(ProductCatalog(path, check_interval=0))
+            self.assertIsNone(matcher.answer("Is the HoloLens Projector in stock?"))
+            with open(path, encoding="utf-8") as file:
+                products = json.load(file)
+            products["HoloLens Projector"] = {"name": "HoloLens Projector", "category": "Cameras and Camcorders",
+                                              "brand": "HoloLens"}
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(products, file)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+            self.assertIsNotNone(matcher.answer("Is the HoloLens Projector in stock?"))
+
+
+class TestLocalMatching(StubOpenAITestCase):
+    """Unit tests for the matcher in front of get_products_from_query."""
+    def tearDown(self):
+        utils.configure_product_matcher()
+
+    def test_skips_model_for_exact_names(self):
+        """Test that a query naming products exactly never reaches the model."""
+        utils.configure_product_matcher()
+        response = utils.get_products_from_query("tell me about the SmartX ProPhone")
+        self.assertIn("SmartX ProPhone", response)
+        utils.find_category_and_product_only("Is the ActionCam 4K waterproof?", None)
+        utils.get_products_from_query("What TVs do you have?")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(utils.get_product_matcher().stats()["answered_locally"], 2)
+
+    def test_disabled(self):
+        """Test that the matcher can be switched off."""
+        utils.configure_product_matcher(enabled=False)
+        utils.get_products_from_query("tell me about the SmartX ProPhone")
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Unit tests for prompt_templates.py.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from catalog import ProductCatalog
+from prompt_templates import CATEGORY_AND_PRODUCT_ONLY, PRODUCTS_QUERY, STEP_2, PromptTemplates
+from test_utils import StubOpenAITestCase
+
+PRODUCTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "products.json")
+
+
+class TestPromptTemplates(unittest.TestCase):
+    """Unit tests for PromptTemplates."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "products.json")
+        shutil.copy(PRODUCTS_PATH, self.path)
+        self.templates = PromptTemplates(ProductCatalog(self.path, check_interval=0))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_prompts_list_catalog(self):
+        """Test that every prompt names every category and product."""
+        with open(self.path, encoding="utf-8") as file:
+            products = json.load(file)
+        for name in (PRODUCTS_QUERY, CATEGORY_AND_PRODUCT_ONLY, STEP_2):
+            prompt = self.templates.system_message(name)
+            for product in products.values():
+                self.assertIn(product["name"], prompt)
+                self.assertIn(product["category"], prompt)
+        self.assertIn("Cameras and Camcorders category:\nFotoSnap DSLR Camera\nActionCam 4K\n",
+                      self.templates.system_message(STEP_2))
+
+    def test_stable_prefix(self):
+        """Test that requests share one precompiled, byte-identical system prompt."""
+        first = self.templates.messages(PRODUCTS_QUERY, "first question")
+        second = self.templates.messages(PRODUCTS_QUERY, "second question")
+        self.assertIs(first[0]["content"], second[0]["content"])
+        self.assertEqual(second[1]["content"], "####second question####")
+        self.assertEqual(self.templates.builds, 1)
+
+        stats = self.templates.stats()
+        size = len(first[0]["content"].encode("utf-8"))
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["prefix_bytes_per_request"], size)
+        self.assertEqual(stats["user_bytes"], len("####first question####") + len("####second question####"))
+
+    def test_rebuilds_on_catalog_change(self):
+        """Test that the prompts are rendered again only when products.json changes."""
+        self.templates.system_message(STEP_2)
+        self.templates.system_message(STEP_2)
+        with open(self.path, encoding="utf-8") as file:
+            products = json.load(file)
+        products["HoloLens Projector"] = {"name": "HoloLens Projector", "category": "Projectors"}
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(products, file)
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1_000_000))
+        prompt = self.templates.system_message(STEP_2)
+        self.assertIn("Projectors category:\nHoloLens Projector", prompt)
+        self.assertEqual(self.templates.builds, 2)
+
+
+class TestUtilsPrompts(StubOpenAITestCase):
+    """Unit tests for the precompiled prompts in utils."""
+    def test_step_2_attribute(self):
+        """Test that the step 2 prompt is still a module attribute."""
+        self.assertIn("SmartX ProPhone", utils.step_2_system_message_content)
+        self.assertEqual(utils.step_2_system_message["role"], "system")
+        with self.assertRaises(AttributeError):
+            utils.step_3_system_message_content
+
+    def test_requests_share_prefix(self):
+        """Test that product queries sent to the model start with the same system prompt."""
+        utils.get_products_from_query("What TVs do you have?")
+        utils.find_category_and_product_only("Which camera is best for travel?", None)
+        utils.get_products_from_query("Do you sell laptops?")
+        system = [request["messages"][0]["content"] for request in self.server.requests]
+        self.assertEqual(system[0], system[2])
+        self.assertEqual(system[1], utils.get_prompt_templates().system_message(CATEGORY_AND_PRODUCT_ONLY))
+
+
+if __name__ == "__main__":
+    unittest.main()
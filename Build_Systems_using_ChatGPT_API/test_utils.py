@@ -0,0 +1,446 @@
+"""
+Unit tests for utils.py, run against a local stub of the OpenAI endpoint.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import openai
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import utils
+from rate_limiter import AsyncRateLimiter
+from response_cache import ResponseCache, make_key
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers /v1/chat/completions with a canned reply and counts requests."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, each reply on a
+    # kept-alive connection would wait out the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append(body)
+            self.server.connections.add(self.client_address)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        if callable(self.server.reply):
+            try:
+                reply = self.server.reply(body)
+            except ValueError:
+                self.send_error(500)
+                return
+        else:
+            reply = self.server.reply or f"reply {len(self.server.requests)}"
+        if body.get("stream"):
+            self.stream(body, reply)
+            return
+        payload = json.dumps({
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": reply}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stream(self, body, reply):
+        """Send the reply word by word as server-sent events, then the usage."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = reply.split(" ")
+        chunks = [{"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                                "finish_reason": None}]} for i, word in enumerate(words)]
+        chunks.append({"choices": [],
+                       "usage": {"prompt_tokens": 10, "completion_tokens": len(words),
+                                 "total_tokens": 10 + len(words)}})
+        for chunk in chunks:
+            chunk.update({"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0,
+                          "model": body["model"]})
+            self.send_chunk(f"data: {json.dumps(chunk)}\n\n")
+            time.sleep(self.server.chunk_delay)
+        self.send_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class StubOpenAITestCase(unittest.TestCase):
+    """Starts the stub server and points the OpenAI client at it."""
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+        cls.server.requests = []
+        cls.server.connections = set()
+        cls.server.reply = None
+        cls.server.lock = threading.Lock()
+        cls.server.delay = 0
+        cls.server.chunk_delay = 0
+        cls.server.in_flight = 0
+        cls.server.max_in_flight = 0
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.env = {"OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY"),
+                   "OPENAI_BASE_URL": os.environ.get("OPENAI_BASE_URL")}
+        os.environ["OPENAI_API_KEY"] = "test-key"
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+        utils.configure_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        utils.client_manager.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        for name, value in cls.env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.connections.clear()
+        self.server.reply = None
+        self.server.delay = 0
+        self.server.chunk_delay = 0
+        self.server.max_in_flight = 0
+        utils.configure_response_cache()
+
+
+class TestResponseCache(StubOpenAITestCase):
+    """Unit tests for caching in get_completion_from_messages."""
+    messages = [{"role": "user", "content": "hello"}]
+
+    def test_identical_requests_hit_cache(self):
+        """Test that a repeated temperature=0 request is served from memory."""
+        first = utils.get_completion_from_messages(self.messages)
+        second = utils.get_completion_from_messages(self.messages)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(utils.response_cache.stats(), {"memory_hits": 1, "disk_hits": 0, "misses": 1})
+
+    def test_key_covers_request(self):
+        """Test that a different max_tokens or temperature is not a cache hit."""
+        utils.get_completion_from_messages(self.messages)
+        utils.get_completion_from_messages(self.messages, max_tokens=20)
+        utils.get_completion_from_messages(self.messages, temperature=0.7)
+        utils.get_completion_from_messages(self.messages, temperature=0.7)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_disk_tier_survives_restart(self):
+        """Test that responses persist in SQLite across cache instances."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "responses.sqlite")
+            utils.configure_response_cache(path)
+            utils.get_completion_from_messages(self.messages)
+            utils.configure_response_cache(path)
+            utils.get_completion_from_messages(self.messages)
+            self.assertEqual(utils.response_cache.disk_hits, 1)
+            utils.configure_response_cache()
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_disabled_cache(self):
+        """Test that caching can be switched off."""
+        utils.configure_response_cache(enabled=False)
+        utils.get_completion_from_messages(self.messages)
+        utils.get_completion_from_messages(self.messages)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+class TestClientManager(StubOpenAITestCase):
+    """Unit tests for the shared, pooled OpenAI client."""
+    def test_client_is_shared(self):
+        """Test that helpers reuse one client."""
+        self.assertIs(utils.get_client(), utils.get_client())
+
+    def test_connection_reused(self):
+        """Test that sequential requests ride one keep-alive connection."""
+        for i in range(5):
+            utils.get_completion_from_messages([{"role": "user", "content": f"message {i}"}])
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_pooled_client_is_faster(self):
+        """Test that the shared client beats building a client per call, as the helpers used to."""
+        messages = [{"role": "user", "content": "hello"}]
+
+        def timed(get_client, calls=20):
+            start = time.perf_counter()
+            for _ in range(calls):
+                client = get_client()
+                client.chat.completions.create(model="gpt-3.5-turbo", messages=messages)
+                if client is not utils.get_client():
+                    client.close()
+            return time.perf_counter() - start
+
+        utils.get_client().chat.completions.create(model="gpt-3.5-turbo", messages=messages)  # Opens the connection
+        pooled = timed(utils.get_client)
+        self.assertEqual(len(self.server.connections), 1)
+        fresh = timed(openai.OpenAI)
+        self.assertEqual(len(self.server.connections), 21)
+        self.assertLess(pooled, fresh)
+
+    def test_configure(self):
+        """Test that settings rebuild the client and unknown ones are refused."""
+        client = utils.get_client()
+        utils.configure_client(max_retries=1, timeout=5)
+        self.assertIsNot(utils.get_client(), client)
+        self.assertEqual(utils.get_client().max_retries, 1)
+        with self.assertRaises(TypeError):
+            utils.configure_client(pool_size=3)
+        with self.assertRaises(TypeError):
+            utils.configure_client(close=None)
+        self.assertTrue(callable(utils.client_manager.close))
+
+
+def pipeline_reply(body):
+    """Reply like the model would at each stage of the customer-service pipeline."""
+    system, user = body["messages"][0]["content"], body["messages"][1]["content"]
+    if "fail" in user:
+        raise ValueError(user)
+    if "customer service queries" in system:
+        if "phone" in user:
+            return "[{'category': 'Smartphones and Accessories', 'products': ['SmartX ProPhone']}]"
+        return "[{'category': 'Audio Equipment'}]"
+    products = body["messages"][2]["content"].count("name: ")
+    return f"answer to {user.strip('#')} ({products} products)"
+
+
+class TestAsyncPipeline(StubOpenAITestCase):
+    """Unit tests for the asyncio customer-service pipeline."""
+    def tearDown(self):
+        utils.configure_async_limits()
+
+    def test_matches_sync_pipeline(self):
+        """Test that an async completion equals the sync one and shares its cache."""
+        messages = [{"role": "user", "content": "hello"}]
+        first = asyncio.run(utils.async_get_completion_from_messages(messages))
+        self.assertEqual(utils.get_completion_from_messages(messages), first)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_process_user_messages(self):
+        """Test that many messages run concurrently and answers keep their order."""
+        self.server.reply = pipeline_reply
+        self.server.delay = 0.05
+        utils.configure_async_limits(max_concurrency=8)
+        user_msgs = [f"tell me about your {'phone' if i % 2 else 'speakers'} #{i}" for i in range(40)]
+        answers = utils.process_user_messages(user_msgs)
+        self.assertEqual(answers[0], "answer to tell me about your speakers #0 (5 products)")
+        self.assertEqual(answers[1], "answer to tell me about your phone #1 (1 products)")
+        self.assertEqual(len(answers), 40)
+        self.assertEqual(len(self.server.requests), 80)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 8)
+
+    def test_async_client_closed_with_loop(self):
+        """Test that process_user_messages closes the async client it opened instead of leaking one per call."""
+        self.server.reply = pipeline_reply
+        clients = []
+        get_async_client = utils.client_manager.get_async_client
+
+        def recording_get_async_client():
+            clients.append(get_async_client())
+            return clients[-1]
+
+        with mock.patch.object(utils.client_manager, "get_async_client", recording_get_async_client):
+            utils.process_user_messages(["phone #1"])
+            utils.process_user_messages(["phone #2"])
+        self.assertEqual(len({id(client) for client in clients}), 2)
+        self.assertTrue(all(client.is_closed() for client in clients))
+        self.assertIsNone(utils.client_manager._async_client)
+
+    def test_async_client_closed_when_loop_ends(self):
+        """Test that a client opened under asyncio.run() is closed when that loop ends, not left for the next."""
+        clients = []
+
+        async def call(content):
+            await utils.async_get_completion_from_messages([{"role": "user", "content": content}])
+            clients.append(utils.get_async_client())
+
+        asyncio.run(call("first"))
+        self.assertTrue(clients[0].is_closed())
+        asyncio.run(call("second"))
+        self.assertIsNot(clients[1], clients[0])
+        self.assertTrue(clients[1].is_closed())
+
+    def test_failure_is_returned_in_place(self):
+        """Test that one failed message does not cancel the others."""
+        self.server.reply = pipeline_reply
+        utils.configure_client(max_retries=0)
+        try:
+            answers = utils.process_user_messages(["phone", "fail"])
+        finally:
+            utils.configure_client()
+        self.assertTrue(answers[0].startswith("answer to phone"))
+        self.assertIsInstance(answers[1], openai.InternalServerError)
+
+
+class TestStreaming(StubOpenAITestCase):
+    """Unit tests for the streaming answer helpers."""
+    reply = "The SmartX ProPhone costs 899.99 dollars"
+
+    def setUp(self):
+        super().setUp()
+        self.server.reply = self.reply
+        utils.stream_metrics.clear()
+
+    def test_stream_answer(self):
+        """Test that pieces arrive one by one and the call is timed."""
+        self.server.chunk_delay = 0.05
+        pieces = list(utils.stream_answer_user_msg("how much is the prophone?", "product info"))
+        self.assertEqual(len(pieces), 6)
+        self.assertEqual("".join(pieces), self.reply)
+        stats = utils.stream_metrics.last()
+        self.assertEqual(stats.tokens, 6)
+        self.assertFalse(stats.cached)
+        self.assertLess(stats.ttft, stats.seconds - 0.2)
+        self.assertGreater(stats.tokens_per_second, 0)
+
+    def test_cached_stream(self):
+        """Test that a finished stream is cached and replayed whole."""
+        with utils.track_token_usage() as usage:
+            list(utils.stream_answer_user_msg("how much?", "product info"))
+        self.assertEqual(usage["completion_tokens"], 6)
+        self.assertEqual(list(utils.stream_answer_user_msg("how much?", "product info")), [self.reply])
+        self.assertTrue(utils.stream_metrics.last().cached)
+        self.assertEqual(utils.answer_user_msg("how much?", "product info"), self.reply)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(utils.stream_metrics.summary()["calls"], 2)
+
+    def test_abandoned_stream_is_not_cached(self):
+        """Test that a stream closed early leaves nothing in the cache."""
+        stream = utils.stream_answer_user_msg("how much?", "product info")
+        self.assertEqual(next(stream), "The")
+        stream.close()
+        self.assertEqual("".join(utils.stream_answer_user_msg("how much?", "product info")), self.reply)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_empty_stream_is_not_cached(self):
+        """Test that an empty streamed answer is asked for again, as an empty completion is."""
+        self.server.reply = lambda body: ""
+        self.assertEqual("".join(utils.stream_answer_user_msg("how much?", "product info")), "")
+        self.assertEqual("".join(utils.stream_answer_user_msg("how much?", "product info")), "")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_async_stream(self):
+        """Test the async generator."""
+        async def collect():
+            return [piece async for piece in utils.async_stream_answer_user_msg("how much?", "product info")]
+
+        pieces = asyncio.run(collect())
+        self.assertEqual("".join(pieces), self.reply)
+        self.assertEqual(utils.stream_metrics.last().tokens, 6)
+
+
+class TestAsyncRateLimiter(unittest.TestCase):
+    """Unit tests for AsyncRateLimiter."""
+    def run_requests(self, limiter, count, tokens=0):
+        async def request():
+            async with limiter.limit(tokens):
+                await asyncio.sleep(0)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(request() for _ in range(count)))
+            return time.monotonic() - start
+
+        return asyncio.run(run())
+
+    def test_requests_per_minute(self):
+        """Test that requests beyond the budget wait for the bucket to refill."""
+        limiter = AsyncRateLimiter(requests_per_minute=600)
+        limiter._request_allowance = 0
+        self.assertGreaterEqual(self.run_requests(limiter, 3), 0.25)
+
+    def test_tokens_per_minute(self):
+        """Test that token costs draw down the tokens-per-minute budget."""
+        limiter = AsyncRateLimiter(tokens_per_minute=60000)
+        self.assertLess(self.run_requests(limiter, 6, tokens=10000), 0.1)
+        self.assertGreaterEqual(self.run_requests(limiter, 1, tokens=200), 0.15)
+
+
+class TestResponseCacheEviction(unittest.TestCase):
+    """Unit tests for ResponseCache eviction."""
+    def test_memory_lru(self):
+        """Test that the least recently used entry leaves the memory tier."""
+        cache = ResponseCache(max_memory_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+
+    def test_disk_ttl_and_size(self):
+        """Test that expired and surplus entries are evicted from disk."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResponseCache(os.path.join(tmp_dir, "responses.sqlite"), max_memory_entries=1,
+                                  max_disk_entries=2)
+            for key in ("a", "b", "c"):
+                cache.set(key, key.upper())
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), "B")
+            cache.ttl = -1
+            cache.set("d", "D")
+            self.assertIsNone(cache.get("b"))
+            cache.close()
+
+    def test_memory_ttl(self):
+        """Test that an expired response is not served from memory."""
+        cache = ResponseCache()
+        cache.set("a", "1")
+        self.assertEqual(cache.get("a"), "1")
+        cache.ttl = -1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"memory_hits": 1, "disk_hits": 0, "misses": 1})
+
+    def test_disk_size_counted_without_scans(self):
+        """Test that the disk tier keeps its size bound across replaced keys and reopens, without COUNT(*) per set."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "responses.sqlite")
+            cache = ResponseCache(path, max_disk_entries=3)
+            for key in ("a", "b", "a", "b"):
+                cache.set(key, key.upper())
+            cache.close()
+            cache = ResponseCache(path, max_memory_entries=1, max_disk_entries=3)
+            statements = []
+            cache._db.set_trace_callback(statements.append)
+            for key in ("c", "d"):
+                cache.set(key, key.upper())
+            self.assertFalse([statement for statement in statements if "COUNT" in statement])
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual([cache.get(key) for key in "bcd"], ["B", "C", "D"])
+            cache.close()
+
+    def test_make_key_is_stable(self):
+        """Test that equal requests map to the same key."""
+        messages = [{"role": "user", "content": "hi"}]
+        self.assertEqual(make_key("m", messages, 0, 5), make_key("m", [dict(messages[0])], 0, 5))
+        self.assertNotEqual(make_key("m", messages, 0, 5), make_key("n", messages, 0, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
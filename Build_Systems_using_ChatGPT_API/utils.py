@@ -1,85 +1,57 @@
+import asyncio
+import contextlib
+import contextvars
 import json
-import openai
-from collections import defaultdict
-
-products_file = 'products.json'
+import os
+from catalog import ProductCatalog
+from llm_client import client_manager, get_client, get_async_client
+from prompt_templates import CATEGORY_AND_PRODUCT_ONLY, PRODUCTS_QUERY, STEP_2, PromptTemplates
+from output_parser import ProductSchema, StreamingListParser, parse_product_list
+from product_context import DEFAULT_TOKEN_BUDGET, build_product_context
+from product_matcher import ProductMatcher
+from rate_limiter import AsyncRateLimiter, estimate_tokens
+from response_cache import ResponseCache, make_key
+from stream_metrics import StreamMetrics
+
+# Next to this module, so lookups work from any working directory
+products_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'products.json')
 categories_file = 'categories.json'
 
-delimiter = "####"
-step_2_system_message_content = f"""
-You will be provided with customer service a conversation. \
-The most recent user query will be delimited with \
-{delimiter} characters.
-Output a python list of objects, where each object has \
-the following format:
-    'category': <one of Computers and Laptops, \
-    Smartphones and Accessories, \
-    Televisions and Home Theater Systems, \
-    Gaming Consoles and Accessories, 
-    Audio Equipment, Cameras and Camcorders>,
-OR
-    'products': <a list of products that must \
-    be found in the allowed products below>
-
-Where the categories and products must be found in \
-the customer service query.
-If a product is mentioned, it must be associated with \
-the correct category in the allowed products list below.
-If no products or categories are found, output an \
-empty list.
-Only list products and categories that have not already \
-been mentioned and discussed in the earlier parts of \
-the conversation.
-
-Allowed products: 
-
-Computers and Laptops category:
-TechPro Ultrabook
-BlueWave Gaming Laptop
-PowerLite Convertible
-TechPro Desktop
-BlueWave Chromebook
-
-Smartphones and Accessories category:
-SmartX ProPhone
-MobiTech PowerCase
-SmartX MiniPhone
-MobiTech Wireless Charger
-SmartX EarBuds
-
-Televisions and Home Theater Systems category:
-CineView 4K TV
-SoundMax Home Theater
-CineView 8K TV
-SoundMax Soundbar
-CineView OLED TV
-
-Gaming Consoles and Accessories category:
-GameSphere X
-ProGamer Controller
-GameSphere Y
-ProGamer Racing Wheel
-GameSphere VR Headset
-
-Audio Equipment category:
-AudioPhonic Noise-Canceling Headphones
-WaveSound Bluetooth Speaker
-AudioPhonic True Wireless Earbuds
-WaveSound Soundbar
-AudioPhonic Turntable
-
-Cameras and Camcorders category:
-FotoSnap DSLR Camera
-ActionCam 4K
-FotoSnap Mirrorless Camera
-ZoomMaster Camcorder
-FotoSnap Instant Camera
-
-Only output the list of objects, with nothing else.
-"""
+# Loaded on first use and shared by every lookup; see get_catalog()
+_catalog = None
+
+# Completions of temperature=0 requests, reused for identical requests.
+# In memory only by default; configure_response_cache() adds a SQLite file.
+response_cache = ResponseCache()
+
+# Answers queries that name catalog products outright without asking the
+# model; see get_product_matcher() and configure_product_matcher()
+_product_matcher = None
+_product_matcher_settings = {}
+
+# System prompts rendered once per catalog version; see get_prompt_templates()
+_prompt_templates = None
+
+# Allowed categories and products for parsed model output; see get_output_schema()
+_output_schema = None
+_output_schema_version = None
 
-step_2_system_message = {'role':'system', 'content': step_2_system_message_content}    
+# Most tokens of product information generate_output_string puts in a prompt
+context_token_budget = DEFAULT_TOKEN_BUDGET
 
+# Concurrency and rate limits for the async_* functions; see configure_async_limits()
+async_limiter = AsyncRateLimiter()
+
+# Time to first token and tokens per second of every streamed completion
+stream_metrics = StreamMetrics()
+
+# Usage counters for the innermost track_token_usage() block, if any
+_token_usage = contextvars.ContextVar('token_usage', default=None)
+
+delimiter = "####"
+
+# step_2_system_message_content lists the allowed products, so it is
+# rendered from the catalog by get_prompt_templates(); see __getattr__ below
 
 step_4_system_message_content = f"""
     You are a customer service assistant for a large electronic store. \
@@ -109,18 +81,228 @@ step_6_system_message_content = f"""
 step_6_system_message = {'role':'system', 'content': step_6_system_message_content}    
 
 
+def configure_response_cache(path=None, **kwargs):
+    """
+    Replace the response cache, e.g. configure_response_cache('responses.sqlite', ttl=86400)
+    to persist responses on disk. Passing enabled=False turns caching off.
+    """
+    global response_cache
+    if response_cache is not None:
+        response_cache.close()
+    response_cache = ResponseCache(path, **kwargs) if kwargs.pop('enabled', True) else None
+    return response_cache
+
+def configure_product_matcher(enabled=True, **kwargs):
+    """
+    Replace the local product matcher, e.g. configure_product_matcher(threshold=0.95).
+    Passing enabled=False sends every query to the model.
+    """
+    global _product_matcher, _product_matcher_settings
+    _product_matcher = None
+    _product_matcher_settings = kwargs if enabled else None
+    return get_product_matcher()
+
+def configure_client(**settings):
+    """
+    Tune the shared OpenAI client used by every helper in this module, e.g.
+    configure_client(max_connections=50, timeout=30, max_retries=5)
+    """
+    client_manager.configure(**settings)
+
+def configure_async_limits(max_concurrency=50, requests_per_minute=None, tokens_per_minute=None):
+    """
+    Bound the async API: at most max_concurrency requests in flight, and
+    optionally a requests-per-minute and tokens-per-minute budget.
+    """
+    global async_limiter
+    async_limiter = AsyncRateLimiter(max_concurrency, requests_per_minute, tokens_per_minute)
+    return async_limiter
+
+def _cache_key(messages, model, temperature, max_tokens, use_cache):
+    # Only deterministic requests are cached; others must reach the model
+    if use_cache and response_cache is not None and temperature == 0:
+        return make_key(model, messages, temperature, max_tokens)
+    return None
+
+@contextlib.contextmanager
+def track_token_usage():
+    """
+    Count the tokens used by completions made inside the block, in this
+    thread or task only:
+
+        with track_token_usage() as usage:
+            get_products_from_query(user_msg)
+        usage['total_tokens']
+
+    Responses served from the cache cost no tokens and are counted in
+    usage['cached_responses'].
+    """
+    usage = {'requests': 0, 'cached_responses': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+def _record_usage(response=None):
+    usage = _token_usage.get()
+    if usage is None:
+        return
+    if response is None:
+        usage['cached_responses'] += 1
+        return
+    usage['requests'] += 1
+    if response.usage is not None:
+        usage['prompt_tokens'] += response.usage.prompt_tokens
+        usage['completion_tokens'] += response.usage.completion_tokens
+        usage['total_tokens'] += response.usage.total_tokens
+
 def get_completion_from_messages(messages, 
                                  model="gpt-4o-mini", 
                                  temperature=0, 
-                                 max_tokens=500):
-    client = openai.OpenAI()
+                                 max_tokens=500,
+                                 use_cache=True):
+    key = _cache_key(messages, model, temperature, max_tokens, use_cache)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            _record_usage()
+            return cached
+
+    client = get_client()
     response = client.chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature, # this is the degree of randomness of the model's output
         max_tokens=max_tokens, # the maximum number of tokens the model can ouptut
     )
-    return response.choices[0].message.content
+    _record_usage(response)
+    content = response.choices[0].message.content
+    if key is not None and content:
+        response_cache.set(key, content)
+    return content
+
+async def async_get_completion_from_messages(messages, 
+                                             model="gpt-4o-mini", 
+                                             temperature=0, 
+                                             max_tokens=500,
+                                             use_cache=True):
+    """
+    Async get_completion_from_messages, sharing its response cache. Requests
+    wait for a slot from async_limiter, so any number of concurrent callers
+    stay within the configured concurrency and rate limits.
+    """
+    key = _cache_key(messages, model, temperature, max_tokens, use_cache)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            _record_usage()
+            return cached
+
+    async with async_limiter.limit(estimate_tokens(messages, max_tokens)):
+        response = await get_async_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+    _record_usage(response)
+    content = response.choices[0].message.content
+    if key is not None and content:
+        response_cache.set(key, content)
+    return content
+
+def _stream_piece(chunk, timer):
+    # The text in one streamed chunk; the last chunk carries only usage
+    if chunk.usage is not None:
+        _record_usage(chunk)
+        timer.tokens = chunk.usage.completion_tokens
+    if chunk.choices and chunk.choices[0].delta.content:
+        timer.piece()
+        return chunk.choices[0].delta.content
+    return None
+
+def stream_completion_from_messages(messages, 
+                                    model="gpt-4o-mini", 
+                                    temperature=0, 
+                                    max_tokens=500,
+                                    use_cache=True):
+    """
+    Yield the completion as it is generated, piece by piece. A cached
+    response is yielded whole, and a finished stream is cached like
+    get_completion_from_messages. Timings go to stream_metrics.
+    """
+    key = _cache_key(messages, model, temperature, max_tokens, use_cache)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            _record_usage()
+            timer = stream_metrics.timer(cached=True)
+            timer.piece()
+            yield cached
+            timer.finish()
+            return
+
+    timer = stream_metrics.timer()
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={'include_usage': True},
+    )
+    pieces = []
+    with stream:
+        for chunk in stream:
+            piece = _stream_piece(chunk, timer)
+            if piece is not None:
+                pieces.append(piece)
+                yield piece
+    timer.finish()
+    if key is not None and pieces:
+        response_cache.set(key, ''.join(pieces))
+
+async def async_stream_completion_from_messages(messages, 
+                                                model="gpt-4o-mini", 
+                                                temperature=0, 
+                                                max_tokens=500,
+                                                use_cache=True):
+    """
+    Async stream_completion_from_messages. The async_limiter slot is held
+    until the stream ends.
+    """
+    key = _cache_key(messages, model, temperature, max_tokens, use_cache)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            _record_usage()
+            timer = stream_metrics.timer(cached=True)
+            timer.piece()
+            yield cached
+            timer.finish()
+            return
+
+    pieces = []
+    async with async_limiter.limit(estimate_tokens(messages, max_tokens)):
+        timer = stream_metrics.timer()
+        stream = await get_async_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={'include_usage': True},
+        )
+        async with stream:
+            async for chunk in stream:
+                piece = _stream_piece(chunk, timer)
+                if piece is not None:
+                    pieces.append(piece)
+                    yield piece
+    timer.finish()
+    if key is not None and pieces:
+        response_cache.set(key, ''.join(pieces))
 
 def create_categories():
     categories_dict = {
@@ -157,34 +339,73 @@ def get_categories():
     return categories
 
 
+def get_catalog():
+    """
+    Return the shared in-memory catalog for products_file.
+
+    products.json is parsed once and indexed by name and category; the
+    catalog reloads itself when the file's modification time changes.
+    """
+    global _catalog
+    if _catalog is None or _catalog.path != products_file:
+        _catalog = ProductCatalog(products_file)
+    return _catalog
+
+def get_product_matcher():
+    """Return the local matcher over the shared catalog, or None when it is turned off"""
+    global _product_matcher
+    if _product_matcher_settings is None:
+        return None
+    catalog = get_catalog()
+    if _product_matcher is None or _product_matcher.catalog is not catalog:
+        _product_matcher = ProductMatcher(catalog, **_product_matcher_settings)
+    return _product_matcher
+
+def _match_locally(user_msg):
+    # The matcher's JSON answer, or None when the model has to decide
+    matcher = get_product_matcher()
+    return matcher.answer(user_msg) if matcher is not None else None
+
+def get_prompt_templates():
+    """Return the precompiled system prompts for the shared catalog"""
+    global _prompt_templates
+    catalog = get_catalog()
+    if _prompt_templates is None or _prompt_templates.catalog is not catalog:
+        _prompt_templates = PromptTemplates(catalog)
+    return _prompt_templates
+
+def get_output_schema():
+    """Return the ProductSchema for the current catalog"""
+    global _output_schema, _output_schema_version
+    catalog = get_catalog()
+    catalog.products  # Picks up a changed products.json
+    if _output_schema is None or _output_schema_version != (catalog, catalog.version):
+        _output_schema = ProductSchema(catalog.get_names_by_category())
+        _output_schema_version = (catalog, catalog.version)
+    return _output_schema
+
+def __getattr__(name):
+    # Keep step_2_system_message(_content) available as module attributes
+    if name == 'step_2_system_message_content':
+        return get_prompt_templates().system_message(STEP_2)
+    if name == 'step_2_system_message':
+        return {'role':'system', 'content': get_prompt_templates().system_message(STEP_2)}
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def get_product_list():
     """
     Used in L4 to get a flat list of products
     """
-    products = get_products()
-    product_list = []
-    for product in products.keys():
-        product_list.append(product)
-    
-    return product_list
+    return list(get_products().keys())
 
 def get_products_and_category():
     """
     Used in L5
     """
-    products = get_products()
-    products_by_category = defaultdict(list)
-    for product_name, product_info in products.items():
-        category = product_info.get('category')
-        if category:
-            products_by_category[category].append(product_info.get('name'))
-    
-    return dict(products_by_category)
+    return get_catalog().get_names_by_category()
 
 def get_products():
-    with open(products_file, 'r') as file:
-        products = json.load(file)
-    return products
+    return get_catalog().products
 
 def find_category_and_product(user_input,products_and_category):
     delimiter = "####"
@@ -214,114 +435,72 @@ def find_category_and_product(user_input,products_and_category):
     return get_completion_from_messages(messages)
 
 def find_category_and_product_only(user_input,products_and_category):
-    delimiter = "####"
-    system_message = f"""
-    You will be provided with customer service queries. \
-    The customer service query will be delimited with {delimiter} characters.
-    Output a python list of objects, where each object has the following format:
-    'category': <one of Computers and Laptops, Smartphones and Accessories, Televisions and Home Theater Systems, \
-    Gaming Consoles and Accessories, Audio Equipment, Cameras and Camcorders>,
-    OR
-    'products': <a list of products that must be found in the allowed products below>
-
-    Where the categories and products must be found in the customer service query.
-    If a product is mentioned, it must be associated with the correct category in the allowed products list below.
-    If no products or categories are found, output an empty list.
+    local_response = _match_locally(user_input)
+    if local_response is not None:
+        return local_response
 
-    Allowed products: 
-    Computers and Laptops category:
-TechPro Ultrabook
-BlueWave Gaming Laptop
-PowerLite Convertible
-TechPro Desktop
-BlueWave Chromebook
-
-Smartphones and Accessories category:
-SmartX ProPhone
-MobiTech PowerCase
-SmartX MiniPhone
-MobiTech Wireless Charger
-SmartX EarBuds
-
-Televisions and Home Theater Systems category:
-CineView 4K TV
-SoundMax Home Theater
-CineView 8K TV
-SoundMax Soundbar
-CineView OLED TV
-
-Gaming Consoles and Accessories category:
-GameSphere X
-ProGamer Controller
-GameSphere Y
-ProGamer Racing Wheel
-GameSphere VR Headset
-
-Audio Equipment category:
-AudioPhonic Noise-Canceling Headphones
-WaveSound Bluetooth Speaker
-AudioPhonic True Wireless Earbuds
-WaveSound Soundbar
-AudioPhonic Turntable
-
-Cameras and Camcorders category:
-FotoSnap DSLR Camera
-ActionCam 4K
-FotoSnap Mirrorless Camera
-ZoomMaster Camcorder
-FotoSnap Instant Camera
-    
-    Only output the list of objects, nothing else.
-    """
-    messages =  [  
-    {'role':'system', 'content': system_message},    
-    {'role':'user', 'content': f"{delimiter}{user_input}{delimiter}"},  
-    ] 
+    messages = get_prompt_templates().messages(CATEGORY_AND_PRODUCT_ONLY, user_input)
     return get_completion_from_messages(messages)
 
 def get_products_from_query(user_msg):
     """
     Code from L5, used in L8
     """
-    products_and_category = get_products_and_category()
-    delimiter = "####"
-    system_message = f"""
-    You will be provided with customer service queries. \
-    The customer service query will be delimited with {delimiter} characters.
-    Output a python list of json objects, where each object has the following format:
-        'category': <one of Computers and Laptops, Smartphones and Accessories, Televisions and Home Theater Systems, \
-    Gaming Consoles and Accessories, Audio Equipment, Cameras and Camcorders>,
-    OR
-        'products': <a list of products that must be found in the allowed products below>
+    local_response = _match_locally(user_msg)
+    if local_response is not None:
+        return local_response
 
-    Where the categories and products must be found in the customer service query.
-    If a product is mentioned, it must be associated with the correct category in the allowed products list below.
-    If no products or categories are found, output an empty list.
+    category_and_product_response = get_completion_from_messages(_products_query_messages(user_msg))
+    
+    return category_and_product_response
 
-    The allowed products are provided in JSON format.
-    The keys of each item represent the category.
-    The values of each item is a list of products that are within that category.
-    Allowed products: {products_and_category}
+def _products_query_messages(user_msg):
+    return get_prompt_templates().messages(PRODUCTS_QUERY, user_msg)
 
+def stream_products_from_query(user_msg):
     """
-    
-    messages =  [  
-    {'role':'system', 'content': system_message},    
-    {'role':'user', 'content': f"{delimiter}{user_msg}{delimiter}"},  
-    ] 
-    category_and_product_response = get_completion_from_messages(messages)
-    
-    return category_and_product_response
+    get_products_from_query as a generator of checked {'category', 'products'}
+    objects, each yielded as soon as the model has written it, so product
+    lookups can start before the completion finishes
+    """
+    schema = get_output_schema()
+    local_response = _match_locally(user_msg)
+    if local_response is not None:
+        yield from schema.validate(parse_product_list(local_response))
+        return
+
+    parser = StreamingListParser()
+    # (category, has products) -> the product names already yielded for it
+    yielded = {}
+    for piece in stream_completion_from_messages(_products_query_messages(user_msg)):
+        for item in schema.validate(parser.feed(piece)):
+            # validate() merges repeats within one call only; across pieces,
+            # a bare category and each product are yielded once
+            key = (item['category'], 'products' in item)
+            if 'products' not in item:
+                if key not in yielded:
+                    yielded[key] = set()
+                    yield item
+                continue
+            names = yielded.setdefault(key, set())
+            new = [name for name in item['products'] if name not in names]
+            if new:
+                names.update(new)
+                yield {'category': item['category'], 'products': new}
+
+async def async_get_products_from_query(user_msg):
+    local_response = _match_locally(user_msg)
+    if local_response is not None:
+        return local_response
+    return await async_get_completion_from_messages(_products_query_messages(user_msg))
 
 
 # product look up (either by category or by product within category)
 def get_product_by_name(name):
-    products = get_products()
-    return products.get(name, None)
+    return get_catalog().get_product(name)
 
 def get_products_by_category(category):
-    products = get_products()
-    return [product for product in products.values() if product["category"] == category]
+    return get_catalog().get_products_in_category(category)
 
 def get_mentioned_product_info(data_list):
     """
@@ -357,23 +536,32 @@ def get_mentioned_product_info(data_list):
 
 
 def read_string_to_list(input_string):
+    """
+    The list of categories and products in the model's output, checked
+    against the catalog so only known categories and products are left.
+    JSON and Python literals both parse, and complete objects are recovered
+    from truncated output; see output_parser.parse_product_list and
+    ProductSchema.validate
+    """
     if input_string is None:
         return None
 
-    try:
-        input_string = input_string.replace("'", "\"")  # Replace single quotes with double quotes for valid JSON
-        data = json.loads(input_string)
-        return data
-    except json.JSONDecodeError:
+    data = parse_product_list(input_string)
+    if data is None:
         print("Error: Invalid JSON string")
         return None
+    return get_output_schema().validate(data)
 
-def generate_output_string(data_list):
-    output_string = ""
-
+def generate_output_string(data_list, user_msg=None, token_budget=None):
+    """
+    Product information for answer_user_msg: one compact line per product,
+    ranked against user_msg and cut to token_budget tokens
+    (context_token_budget by default)
+    """
     if data_list is None:
-        return output_string
+        return ""
 
+    candidates = []
     for data in data_list:
         try:
             if "products" in data:
@@ -381,20 +569,22 @@ def generate_output_string(data_list):
                 for product_name in products_list:
                     product = get_product_by_name(product_name)
                     if product:
-                        output_string += json.dumps(product, indent=4) + "\n"
+                        candidates.append((product, True))
                     else:
                         print(f"Error: Product '{product_name}' not found")
             elif "category" in data:
                 category_name = data["category"]
                 category_products = get_products_by_category(category_name)
                 for product in category_products:
-                    output_string += json.dumps(product, indent=4) + "\n"
+                    candidates.append((product, False))
             else:
                 print("Error: Invalid object format")
         except Exception as e:
             print(f"Error: {e}")
 
-    return output_string
+    if token_budget is None:
+        token_budget = context_token_budget
+    return build_product_context(candidates, user_msg, token_budget)
 
 # Example usage:
 #product_information_for_user_message_1 = generate_output_string(category_and_product_list)
@@ -404,6 +594,10 @@ def answer_user_msg(user_msg,product_info):
     """
     Code from L5, used in L6
     """
+    response = get_completion_from_messages(_answer_messages(user_msg, product_info))
+    return response
+
+def _answer_messages(user_msg, product_info):
     delimiter = "####"
     system_message = f"""
     You are a customer service assistant for a large electronic store. \
@@ -417,12 +611,58 @@ def answer_user_msg(user_msg,product_info):
     {'role':'user', 'content': f"{delimiter}{user_msg}{delimiter}"},  
     {'role':'assistant', 'content': f"Relevant product information:\n{product_info}"},   
     ] 
-    response = get_completion_from_messages(messages)
-    return response
+    return messages
+
+async def async_answer_user_msg(user_msg, product_info):
+    return await async_get_completion_from_messages(_answer_messages(user_msg, product_info))
+
+def stream_answer_user_msg(user_msg, product_info):
+    """
+    answer_user_msg as a generator of text pieces, so a front end can show
+    the answer while it is written: for piece in stream_answer_user_msg(...)
+    """
+    return stream_completion_from_messages(_answer_messages(user_msg, product_info))
+
+def async_stream_answer_user_msg(user_msg, product_info):
+    """answer_user_msg as an async generator: async for piece in async_stream_answer_user_msg(...)"""
+    return async_stream_completion_from_messages(_answer_messages(user_msg, product_info))
+
+async def async_process_user_message(user_msg):
+    """
+    Run one message through the L5-L7 pipeline: find the products it
+    mentions, look them up and answer. read_string_to_list and
+    generate_output_string are in-memory steps, so only the two model calls
+    are awaited.
+    """
+    category_and_product_response = await async_get_products_from_query(user_msg)
+    category_and_product_list = read_string_to_list(category_and_product_response)
+    product_information = generate_output_string(category_and_product_list, user_msg)
+    return await async_answer_user_msg(user_msg, product_information)
+
+async def async_process_user_messages(user_msgs, return_exceptions=True):
+    """
+    Process many messages concurrently and return the answers in order.
+    Concurrency and rate limits come from configure_async_limits(); with
+    return_exceptions=True a failed message yields its exception instead
+    of cancelling the rest.
+    """
+    return await asyncio.gather(*(async_process_user_message(msg) for msg in user_msgs),
+                                return_exceptions=return_exceptions)
+
+def process_user_messages(user_msgs, return_exceptions=True):
+    """Blocking wrapper around async_process_user_messages() for scripts"""
+    async def run():
+        try:
+            return await async_process_user_messages(user_msgs, return_exceptions)
+        finally:
+            # The async client's connections cannot outlive this event loop
+            await client_manager.aclose()
+
+    return asyncio.run(run())
 
 def create_products():
     """
-        Create products dictionary and save it to a file named products.json
+        Create products dictionary and save it to products_file
     """
     # product information
     # fun fact: all these products are fake and were generated by a language model
@@ -763,8 +1003,8 @@ def create_products():
         }
     }
 
-    products_file = 'products.json'
     with open(products_file, 'w') as file:
         json.dump(products, file)
+    get_catalog().reload()
         
     return products
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Vectorised win/tie detection and move generation for many boards at once.
+
+Boards are rows of an (N, 9) int8 array holding EMPTY, X or O per square.
+All eight win lines are checked for every board with a single fancy-index
+and sum, instead of calling TicTacToe.check_winner once per board.
+
+Usage: python batch_eval.py [num_boards]    (runs the benchmark)
+"""
+
+import random
+import sys
+import time
+import numpy as np
+from tic_tac_toe import TicTacToe, WINNING_COMBINATIONS
+
+EMPTY, X, O = 0, 1, -1
+
+# Values of the status array returned by evaluate_boards
+X_WINS, O_WINS, TIE, ONGOING = 1, -1, 0, 2
+
+WIN_LINES = np.array(WINNING_COMBINATIONS, dtype=np.intp)
+
+_LETTER_VALUES = {' ': EMPTY, 'X': X, 'O': O}
+
+
+def to_array(boards):
+    """Convert list boards of ' '/'X'/'O' into an (N, 9) int8 array"""
+    return np.array([[_LETTER_VALUES[spot] for spot in board] for board in boards], dtype=np.int8).reshape(-1, 9)
+
+
+def evaluate_boards(boards):
+    """
+    Return (status, legal_moves) for an (N, 9) int8 array of boards.
+
+    status is an int8 array of X_WINS, O_WINS, TIE or ONGOING per board,
+    and legal_moves an (N, 9) bool mask of the empty squares of boards that
+    are still being played (finished boards have no legal moves).
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != 9:
+        raise ValueError(f"Expected an (N, 9) array of boards, got shape {boards.shape}")
+
+    # (N, 8): sum of each win line, so +3 / -3 means X / O owns the line
+    line_sums = boards[:, WIN_LINES].sum(axis=2, dtype=np.int8)
+    x_wins = (line_sums == 3 * X).any(axis=1)
+    o_wins = (line_sums == 3 * O).any(axis=1)
+    empty = boards == EMPTY
+    full = ~empty.any(axis=1)
+
+    status = np.full(len(boards), ONGOING, dtype=np.int8)
+    status[full] = TIE
+    status[o_wins] = O_WINS
+    status[x_wins] = X_WINS
+    legal_moves = empty & (status == ONGOING)[:, None]
+    return status, legal_moves
+
+
+def random_boards(num_boards, seed=0):
+    """Generate num_boards positions reached by random play, as list boards"""
+    rng = random.Random(seed)
+    game = TicTacToe()
+    boards = []
+    for _ in range(num_boards):
+        board = [' '] * 9
+        letter = 'X'
+        for _ in range(rng.randint(0, 9)):
+            if game.check_winner(board) is not None:
+                break
+            board[rng.choice(game.get_available_moves(board))] = letter
+            letter = 'O' if letter == 'X' else 'X'
+        boards.append(board)
+    return boards
+
+
+def benchmark(num_boards=100_000, seed=0):
+    """Time evaluate_boards against looping TicTacToe.check_winner over the same boards"""
+    boards = random_boards(num_boards, seed)
+    game = TicTacToe()
+
+    start = time.perf_counter()
+    looped = [game.check_winner(board) for board in boards]
+    loop_time = time.perf_counter() - start
+
+    array = to_array(boards)
+    start = time.perf_counter()
+    status, _ = evaluate_boards(array)
+    batch_time = time.perf_counter() - start
+
+    names = {X_WINS: 'X', O_WINS: 'O', TIE: 'Tie', ONGOING: None}
+    if [names[value] for value in status.tolist()] != looped:
+        raise AssertionError("evaluate_boards disagrees with check_winner")
+    return loop_time, batch_time
+
+
+def main():
+    num_boards = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    loop_time, batch_time = benchmark(num_boards)
+    print(f"check_winner loop: {loop_time:.3f}s ({num_boards / loop_time:,.0f} boards/s)")
+    print(f"evaluate_boards:   {batch_time:.3f}s ({num_boards / batch_time:,.0f} boards/s)")
+    print(f"Speedup: {loop_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
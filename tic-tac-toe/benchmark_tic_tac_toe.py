@@ -0,0 +1,160 @@
+"""
+Performance benchmarks for the Tic Tac Toe search engines.
+
+For each engine (full minimax, alpha-beta and the solution table) this
+measures the time and nodes to find the best move from the empty board,
+the same for every reachable position with a cold cache, nodes per
+second, and the transposition table hit rate when one game instance
+answers every position. Results can be saved as a JSON baseline and later
+runs compared against it to catch performance regressions.
+
+Usage: python benchmark_tic_tac_toe.py [--save FILE] [--compare FILE] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from tic_tac_toe import TicTacToe, SearchProfiler, SolutionTable, FULL_MASK, SQUARES, decode, outcome
+from solve_tic_tac_toe import write_table
+
+ENGINES = ('minimax', 'alpha_beta', 'solution_table')
+
+# Metrics where a larger value is a regression. Node counts are exact; the
+# timings sum thousands of searches, so they are stable enough to compare.
+REGRESSION_METRICS = ('empty_board_nodes', 'all_positions_nodes', 'all_positions_seconds', 'warm_seconds')
+
+
+def reachable_positions():
+    """Return (board, x_to_move) for every unfinished position reachable from the empty board"""
+    positions = []
+    seen = set()
+    stack = [(0, 0, True)]
+    while stack:
+        x_bits, o_bits, x_turn = stack.pop()
+        if (x_bits, o_bits) in seen:
+            continue
+        seen.add((x_bits, o_bits))
+        if outcome(x_bits, o_bits) is not None:
+            continue
+        positions.append((decode(x_bits, o_bits), x_turn))
+        for square in SQUARES[FULL_MASK ^ (x_bits | o_bits)]:
+            if x_turn:
+                stack.append((x_bits | 1 << square, o_bits, False))
+            else:
+                stack.append((x_bits, o_bits | 1 << square, True))
+    return positions
+
+
+def _new_game(engine, solution_table, profiler):
+    if engine == 'alpha_beta':
+        return TicTacToe(alpha_beta=True, profiler=profiler)
+    if engine == 'solution_table':
+        return TicTacToe(solution_table=solution_table, profiler=profiler)
+    return TicTacToe(profiler=profiler)
+
+
+def benchmark_engine(engine, positions, solution_table=None):
+    """Return a dict of metrics for one engine over the given positions"""
+    # Time to best move from the empty board, cold
+    profiler = SearchProfiler()
+    _new_game(engine, solution_table, profiler).minimax([' '] * 9, True)
+    empty = profiler.calls[0]
+
+    # Every position with a cold cache: a fresh game instance per search
+    profiler = SearchProfiler()
+    for board, x_turn in positions:
+        _new_game(engine, solution_table, profiler).minimax(board, x_turn)
+    cold = profiler
+
+    # Every position through one instance, so the cache warms up as it goes
+    profiler = SearchProfiler()
+    game = _new_game(engine, solution_table, profiler)
+    for board, x_turn in positions:
+        game.minimax(board, x_turn)
+
+    return {
+        'empty_board_seconds': empty.seconds,
+        'empty_board_nodes': empty.nodes,
+        'all_positions_seconds': cold.total_seconds,
+        'mean_position_seconds': cold.total_seconds / len(positions),
+        'max_position_seconds': max(call.seconds for call in cold.calls),
+        'all_positions_nodes': cold.total_nodes,
+        'nodes_per_second': cold.nodes_per_second,
+        'warm_cache_hit_rate': profiler.cache_hit_rate,
+        'warm_seconds': profiler.total_seconds,
+    }
+
+
+def run_benchmarks(max_positions=None):
+    """Benchmark every engine and return {engine: metrics}"""
+    positions = reachable_positions()
+    if max_positions is not None:
+        positions = positions[:max_positions]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'tic_tac_toe.solution')
+        write_table(path)
+        solution_table = SolutionTable(path)
+        try:
+            for engine in ENGINES:
+                results[engine] = benchmark_engine(engine, positions, solution_table)
+        finally:
+            solution_table.close()
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.25):
+    """List the metrics that grew by more than tolerance against the baseline"""
+    regressions = []
+    for engine, metrics in baseline.items():
+        for name in REGRESSION_METRICS:
+            if engine in results and name in metrics and metrics[name] > 0:
+                ratio = results[engine][name] / metrics[name]
+                if ratio > 1 + tolerance:
+                    regressions.append(f"{engine}.{name}: {metrics[name]:g} -> {results[engine][name]:g} ({ratio:.2f}x)")
+    return regressions
+
+
+def print_report(results):
+    for engine, metrics in results.items():
+        print(f"\n{engine}")
+        print(f"  empty board:     {metrics['empty_board_seconds'] * 1000:.3f} ms, {metrics['empty_board_nodes']} nodes")
+        print(f"  all positions:   {metrics['all_positions_seconds']:.3f} s "
+              f"(mean {metrics['mean_position_seconds'] * 1000:.3f} ms, max {metrics['max_position_seconds'] * 1000:.3f} ms)")
+        print(f"  nodes:           {metrics['all_positions_nodes']} ({metrics['nodes_per_second']:,.0f} nodes/s)")
+        print(f"  warm cache:      {metrics['warm_seconds']:.3f} s, hit rate {metrics['warm_cache_hit_rate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Tic Tac Toe search engines.")
+    parser.add_argument('--save', metavar='FILE', help="write the results to FILE as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare the results with a saved JSON baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline before failing (default 0.25)")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo performance regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+N x N, K-in-a-row generalisation of the Tic Tac Toe engine.
+
+Positions use the same representation as TicTacToe (one bitboard integer
+per side, X maximizing), with the board size and line length taken from a
+BoardConfig. The search is iterative-deepening alpha-beta under a
+wall-clock budget per move, falling back to a heuristic evaluation of the
+open lines when it reaches the depth limit.
+"""
+
+import time
+from functools import lru_cache
+
+# Scores at or beyond WIN_SCORE are proven wins (X) or losses (-WIN_SCORE)
+WIN_SCORE = 1_000_000
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the per-move time budget runs out"""
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class BoardConfig:
+    """
+    Win lines and move ordering for one board size and line length.
+
+    Every K-square run of a row, column or diagonal becomes a bitmask, and
+    each square keeps the lines passing through it so that a move only has
+    to be checked against those. Build these through get_config() so each
+    configuration is generated once and shared.
+    """
+    def __init__(self, size, k):
+        if not 1 <= k <= size:
+            raise ValueError(f"K must be between 1 and the board size, got size={size}, k={k}")
+        self.size = size
+        self.k = k
+        self.num_squares = size * size
+        self.full_mask = (1 << self.num_squares) - 1
+
+        self.lines = []
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row, end_col = row + d_row * (k - 1), col + d_col * (k - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        self.lines.append(sum(1 << ((row + d_row * i) * size + col + d_col * i) for i in range(k)))
+        self.lines_through = [[line for line in self.lines if line >> square & 1]
+                              for square in range(self.num_squares)]
+
+        # Centre squares first: they sit on the most lines
+        centre = (size - 1) / 2
+        self.move_order = sorted(range(self.num_squares),
+                                 key=lambda sq: (abs(sq // size - centre) + abs(sq % size - centre), sq))
+
+        # Heuristic weight of an open line holding n marks of one side
+        self.line_weights = [0] + [10 ** (n - 1) for n in range(1, k)] + [WIN_SCORE]
+
+    def is_win(self, bits, square):
+        """Whether the side owning bits has completed a line through square"""
+        return any(bits & line == line for line in self.lines_through[square])
+
+    def has_won(self, bits):
+        return any(bits & line == line for line in self.lines)
+
+    def evaluate(self, x_bits, o_bits):
+        """Score a position from X's point of view by the lines each side can still complete"""
+        score = 0
+        weights = self.line_weights
+        for line in self.lines:
+            x_line = x_bits & line
+            o_line = o_bits & line
+            if x_line and not o_line:
+                score += weights[popcount(x_line)]
+            elif o_line and not x_line:
+                score -= weights[popcount(o_line)]
+        return score
+
+
+@lru_cache(maxsize=None)
+def get_config(size, k):
+    return BoardConfig(size, k)
+
+
+class KInARow:
+    """
+    Game state for an N x N board where K in a row wins.
+
+    Mirrors TicTacToe's interface (board, make_move, winner,
+    available_moves, current_winner) on top of two bitboards.
+    """
+    def __init__(self, size=4, k=None):
+        self.config = get_config(size, k if k is not None else size)
+        self.x_bits = 0
+        self.o_bits = 0
+        self.current_winner = None
+
+    @property
+    def size(self):
+        return self.config.size
+
+    @property
+    def board(self):
+        return ['X' if self.x_bits >> i & 1 else 'O' if self.o_bits >> i & 1 else ' '
+                for i in range(self.config.num_squares)]
+
+    @board.setter
+    def board(self, board):
+        self.x_bits = sum(1 << i for i, spot in enumerate(board) if spot == 'X')
+        self.o_bits = sum(1 << i for i, spot in enumerate(board) if spot == 'O')
+
+    def print_board(self):
+        board = self.board
+        width = len(str(self.config.num_squares - 1))
+        for i in range(self.size):
+            row = board[i * self.size:(i + 1) * self.size]
+            print('| ' + ' | '.join(spot.center(width) for spot in row) + ' |')
+
+    def available_moves(self):
+        free = self.config.full_mask ^ (self.x_bits | self.o_bits)
+        return [i for i in range(self.config.num_squares) if free >> i & 1]
+
+    def empty_squares(self):
+        return self.x_bits | self.o_bits != self.config.full_mask
+
+    def num_empty_squares(self):
+        return self.config.num_squares - popcount(self.x_bits | self.o_bits)
+
+    def make_move(self, square, letter):
+        bit = 1 << square
+        if (self.x_bits | self.o_bits) & bit:
+            return False
+        if letter == 'X':
+            self.x_bits |= bit
+        else:
+            self.o_bits |= bit
+        if self.winner(square, letter):
+            self.current_winner = letter
+        return True
+
+    def winner(self, square, letter):
+        return self.config.is_win(self.x_bits if letter == 'X' else self.o_bits, square)
+
+
+class IterativeDeepeningSearch:
+    """
+    Iterative-deepening alpha-beta for a BoardConfig under a time budget.
+
+    Each call to search() deepens one ply at a time until the game is
+    solved, the tree is exhausted or time_budget seconds have passed, and
+    returns the best move of the deepest completed iteration. The
+    transposition table survives between calls and feeds move ordering.
+    """
+    def __init__(self, config, time_budget=1.0, max_depth=None):
+        self.config = config
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.transposition_table = {}
+        self.nodes_visited = 0
+        self.depth_reached = 0
+        self._deadline = None
+
+    def search(self, x_bits, o_bits, maximizing_player):
+        """Return (score, move) for the side to move; score is from X's point of view"""
+        config = self.config
+        free = config.full_mask ^ (x_bits | o_bits)
+        moves = [sq for sq in config.move_order if free >> sq & 1]
+        self.nodes_visited = 0
+        self.depth_reached = 0
+        if not moves or config.has_won(x_bits) or config.has_won(o_bits):
+            return config.evaluate(x_bits, o_bits), None
+
+        self._deadline = time.perf_counter() + self.time_budget
+        best = (config.evaluate(x_bits, o_bits), moves[0])
+        max_depth = len(moves) if self.max_depth is None else min(self.max_depth, len(moves))
+        for depth in range(1, max_depth + 1):
+            try:
+                best = self._search_root(x_bits, o_bits, maximizing_player, depth, moves)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+            if abs(best[0]) >= WIN_SCORE:
+                break
+            # Search the previous best move first on the next iteration
+            moves.remove(best[1])
+            moves.insert(0, best[1])
+        return best
+
+    def _search_root(self, x_bits, o_bits, maximizing_player, depth, moves):
+        alpha, beta = float('-inf'), float('inf')
+        best_eval, best_move = None, None
+        for move in moves:
+            bit = 1 << move
+            if maximizing_player:
+                eval = self._alphabeta(x_bits | bit, o_bits, False, depth - 1, alpha, beta, move)
+                if best_eval is None or eval > best_eval:
+                    best_eval, best_move = eval, move
+                    alpha = max(alpha, eval)
+            else:
+                eval = self._alphabeta(x_bits, o_bits | bit, True, depth - 1, alpha, beta, move)
+                if best_eval is None or eval < best_eval:
+                    best_eval, best_move = eval, move
+                    beta = min(beta, eval)
+        return best_eval, best_move
+
+    def _alphabeta(self, x_bits, o_bits, maximizing_player, depth, alpha, beta, last_move):
+        self.nodes_visited += 1
+        if not self.nodes_visited & 1023 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        config = self.config
+        free = config.full_mask ^ (x_bits | o_bits)
+        # The side that just moved is the only one that can have a new line;
+        # sooner wins score higher than later ones
+        if maximizing_player and config.is_win(o_bits, last_move):
+            return -WIN_SCORE - popcount(free)
+        if not maximizing_player and config.is_win(x_bits, last_move):
+            return WIN_SCORE + popcount(free)
+        if not free:
+            return 0
+        if depth == 0:
+            return config.evaluate(x_bits, o_bits)
+
+        key = (x_bits, o_bits, maximizing_player)
+        entry = self.transposition_table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, flag, score, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        original_alpha, original_beta = alpha, beta
+        best_eval = float('-inf') if maximizing_player else float('inf')
+        best_move = None
+        moves = config.move_order
+        if tt_move is not None:
+            moves = [tt_move] + [sq for sq in moves if sq != tt_move]
+        for move in moves:
+            bit = 1 << move
+            if not free & bit:
+                continue
+            if maximizing_player:
+                eval = self._alphabeta(x_bits | bit, o_bits, False, depth - 1, alpha, beta, move)
+                if eval > best_eval:
+                    best_eval, best_move = eval, move
+                    alpha = max(alpha, eval)
+            else:
+                eval = self._alphabeta(x_bits, o_bits | bit, True, depth - 1, alpha, beta, move)
+                if eval < best_eval:
+                    best_eval, best_move = eval, move
+                    beta = min(beta, eval)
+            if alpha >= beta:
+                break
+
+        if best_eval <= original_alpha:
+            flag = UPPER
+        elif best_eval >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition_table[key] = (depth, flag, best_eval, best_move)
+        return best_eval
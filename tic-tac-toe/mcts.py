@@ -0,0 +1,175 @@
+"""
+Monte Carlo Tree Search (UCT) engine for Tic Tac Toe and K-in-a-row boards.
+
+Unlike minimax, the work per move is bounded by a playout budget rather
+than by the size of the game tree, so it stays responsive on boards where
+an exhaustive search cannot finish. With workers > 1 it uses root
+parallelism: each worker process grows its own tree from the same root
+and the visit counts of the root moves are summed.
+"""
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from k_in_a_row import get_config
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried_moves', 'x_moved', 'wins', 'visits')
+
+    def __init__(self, move, parent, untried_moves, x_moved):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried_moves = untried_moves
+        # Whether X made the move leading here; wins are counted for that side
+        self.x_moved = x_moved
+        self.wins = 0.0
+        self.visits = 0
+
+
+def _free_squares(config, x_bits, o_bits):
+    free = config.full_mask ^ (x_bits | o_bits)
+    return [sq for sq in range(config.num_squares) if free >> sq & 1]
+
+
+def run_playouts(config, x_bits, o_bits, maximizing_player, playouts, exploration=1.4, seed=None):
+    """
+    Grow a UCT tree from the given position with a fixed number of playouts.
+
+    Returns {move: (visits, wins)} for the root moves, wins being counted
+    for the side to move at the root (a tie counts half).
+    """
+    rng = random.Random(seed)
+    root = Node(None, None, _free_squares(config, x_bits, o_bits), not maximizing_player)
+    rng.shuffle(root.untried_moves)
+
+    for _ in range(playouts):
+        node = root
+        x, o = x_bits, o_bits
+        winner = None
+
+        # Selection: descend through fully expanded nodes by UCB1
+        while not node.untried_moves and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children,
+                       key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits))
+            if node.x_moved:
+                x |= 1 << node.move
+            else:
+                o |= 1 << node.move
+        if node.move is not None and config.is_win(x if node.x_moved else o, node.move):
+            winner = node.x_moved
+
+        # Expansion: add one untried move unless the game is already over
+        if winner is None and node.untried_moves:
+            move = node.untried_moves.pop()
+            x_moved = not node.x_moved
+            if x_moved:
+                x |= 1 << move
+            else:
+                o |= 1 << move
+            if config.is_win(x if x_moved else o, move):
+                winner = x_moved
+                untried = []
+            else:
+                untried = _free_squares(config, x, o)
+                rng.shuffle(untried)
+            child = Node(move, node, untried, x_moved)
+            node.children.append(child)
+            node = child
+
+        # Simulation: random moves to the end of the game
+        if winner is None:
+            x_turn = not node.x_moved
+            free = _free_squares(config, x, o)
+            rng.shuffle(free)
+            for move in free:
+                if x_turn:
+                    x |= 1 << move
+                    if config.is_win(x, move):
+                        winner = True
+                        break
+                else:
+                    o |= 1 << move
+                    if config.is_win(o, move):
+                        winner = False
+                        break
+                x_turn = not x_turn
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.x_moved:
+                node.wins += 1.0
+            node = node.parent
+
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def _run_worker(size, k, x_bits, o_bits, maximizing_player, playouts, exploration, seed):
+    return run_playouts(get_config(size, k), x_bits, o_bits, maximizing_player, playouts, exploration, seed)
+
+
+class MCTS:
+    """
+    UCT search with a playout budget per move.
+
+    search() returns (score, move) like TicTacToe.minimax: the move is the
+    most visited root move and the score its expected result from X's point
+    of view, between -1 and 1. playouts_per_second reports the speed of the
+    last search.
+    """
+    def __init__(self, config=None, playouts=20000, exploration=1.4, workers=1, seed=None):
+        self.config = config if config is not None else get_config(3, 3)
+        self.playouts = playouts
+        self.exploration = exploration
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.playouts_per_second = 0.0
+        self._executor = None
+
+    def search(self, x_bits, o_bits, maximizing_player):
+        config = self.config
+        # A finished game has no move; its score is the result, as minimax gives it
+        if config.has_won(x_bits):
+            return 1, None
+        if config.has_won(o_bits):
+            return -1, None
+        if not config.full_mask ^ (x_bits | o_bits):
+            return 0, None
+
+        start = time.perf_counter()
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            share = -(-self.playouts // self.workers)
+            futures = [self._executor.submit(_run_worker, config.size, config.k, x_bits, o_bits, maximizing_player,
+                                             share, self.exploration, self.rng.randrange(1 << 30))
+                       for _ in range(self.workers)]
+            stats = {}
+            for future in futures:
+                for move, (visits, wins) in future.result().items():
+                    total_visits, total_wins = stats.get(move, (0, 0.0))
+                    stats[move] = (total_visits + visits, total_wins + wins)
+            playouts = share * self.workers
+        else:
+            stats = run_playouts(config, x_bits, o_bits, maximizing_player, self.playouts,
+                                 self.exploration, self.rng.randrange(1 << 30))
+            playouts = self.playouts
+        elapsed = time.perf_counter() - start
+        self.playouts_per_second = playouts / elapsed if elapsed else 0.0
+
+        move = max(stats, key=lambda m: (stats[m][0], -m))
+        visits, wins = stats[move]
+        # wins / visits is 0..1 for the side to move; map it to -1..1 for X
+        score = 2 * wins / visits - 1
+        return (score if maximizing_player else -score), move
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
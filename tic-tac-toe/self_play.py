@@ -0,0 +1,167 @@
+"""
+Headless self-play for the Tic Tac Toe engine.
+
+Plays batches of AI-vs-AI, AI-vs-random or random-vs-random games without
+any input() prompts, spread across a process pool. Each worker keeps its
+own TicTacToe (and so its own transposition table) for all the games it
+plays, and finished chunks are folded into one summary as they arrive.
+
+Usage: python self_play.py <games> [x_player] [o_player] [workers] [record_file]
+    players are 'ai' or 'random'; record_file receives one JSON line per game
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tic_tac_toe import TicTacToe, load_solution_table
+
+PLAYERS = ('ai', 'random')
+USAGE = "Usage: python self_play.py <games> [x_player] [o_player] [workers] [record_file]"
+
+# The game instance of the current worker process, created by _init_worker
+_worker_game = None
+
+
+def play_game(game, x_player, o_player, rng):
+    """
+    Play one game from an empty board and return (result, moves).
+
+    result is 'X', 'O' or 'Tie' and moves lists the squares in play order.
+    """
+    game.board = [' ' for _ in range(9)]
+    game.current_winner = None
+    players = {'X': x_player, 'O': o_player}
+    letter = 'X'
+    moves = []
+    while game.empty_squares():
+        if players[letter] == 'ai':
+            _, move = game.minimax(game.board, letter == 'X')
+        else:
+            move = rng.choice(game.available_moves())
+        game.make_move(move, letter)
+        moves.append(move)
+        if game.current_winner:
+            return game.current_winner, moves
+        letter = 'O' if letter == 'X' else 'X'
+    return 'Tie', moves
+
+
+class SelfPlaySummary:
+    """Running totals for a batch of games, mergeable across workers"""
+    def __init__(self):
+        self.results = Counter()
+        self.game_lengths = Counter()
+        self.moves = 0
+        self.elapsed = 0.0
+
+    @property
+    def games(self):
+        return sum(self.results.values())
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+    def add_game(self, result, moves):
+        self.results[result] += 1
+        self.game_lengths[len(moves)] += 1
+        self.moves += len(moves)
+
+    def merge(self, other):
+        self.results.update(other.results)
+        self.game_lengths.update(other.game_lengths)
+        self.moves += other.moves
+
+    def report(self):
+        lines = [
+            f"Games: {self.games} in {self.elapsed:.2f}s ({self.games_per_second:.0f} games/s)",
+            f"X wins: {self.results['X']}, O wins: {self.results['O']}, Ties: {self.results['Tie']}",
+            f"Moves: {self.moves} ({self.moves_per_second:.0f} moves/s)",
+            "Game lengths: " + ", ".join(f"{length}: {count}" for length, count in sorted(self.game_lengths.items())),
+        ]
+        return "\n".join(lines)
+
+
+def _init_worker():
+    global _worker_game
+    _worker_game = TicTacToe(solution_table=load_solution_table())
+
+
+def _play_chunk(num_games, x_player, o_player, seed, record):
+    """Play num_games in this worker; return a summary and, if record is set, the games"""
+    if _worker_game is None:
+        _init_worker()
+    rng = random.Random(seed)
+    summary = SelfPlaySummary()
+    games = []
+    for _ in range(num_games):
+        result, moves = play_game(_worker_game, x_player, o_player, rng)
+        summary.add_game(result, moves)
+        if record:
+            games.append({'x': x_player, 'o': o_player, 'moves': moves, 'winner': result})
+    return summary, games
+
+
+def simulate(num_games, x_player='ai', o_player='random', workers=None, chunk_size=1000, seed=None, record_file=None):
+    """
+    Play num_games headless games across a process pool and return a SelfPlaySummary.
+
+    Games are handed out in chunks of chunk_size; chunk i is seeded with
+    seed + i, so a run is reproducible for a given seed. With record_file,
+    every game is appended to it as a JSON line as soon as its chunk finishes.
+    """
+    for player in (x_player, o_player):
+        if player not in PLAYERS:
+            raise ValueError(f"Unknown player {player!r}, expected one of {PLAYERS}")
+    if seed is None:
+        seed = random.randrange(1 << 30)
+
+    summary = SelfPlaySummary()
+    start = time.perf_counter()
+    record = open(record_file, 'a', encoding='utf-8') if record_file else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = []
+            for i, first in enumerate(range(0, num_games, chunk_size)):
+                size = min(chunk_size, num_games - first)
+                futures.append(executor.submit(_play_chunk, size, x_player, o_player, seed + i, record is not None))
+            for future in as_completed(futures):
+                partial, games = future.result()
+                summary.merge(partial)
+                if record is not None:
+                    record.writelines(json.dumps(game) + "\n" for game in games)
+    finally:
+        if record is not None:
+            record.close()
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(USAGE)
+        sys.exit(1)
+    try:
+        num_games = int(sys.argv[1])
+        x_player = sys.argv[2] if len(sys.argv) > 2 else 'ai'
+        o_player = sys.argv[3] if len(sys.argv) > 3 else 'random'
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count()
+        record_file = sys.argv[5] if len(sys.argv) > 5 else None
+        summary = simulate(num_games, x_player, o_player, workers=workers, record_file=record_file)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        print(USAGE)
+        sys.exit(1)
+    print(summary.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Solve 3x3 Tic Tac Toe once and write the perfect-play table that
+TicTacToe loads through SolutionTable.
+
+Usage: python solve_tic_tac_toe.py [output_file]
+"""
+
+import os
+import sys
+from tic_tac_toe import (TicTacToe, SOLUTION_TABLE_HEADER, SOLUTION_TABLE_SIZE, SOLUTION_TABLE_PATH,
+                         NO_MOVE, UNSOLVED, FULL_MASK, SQUARES, decode, outcome, position_index, x_to_move)
+
+
+def solve():
+    """Return the table body: one byte per position index, UNSOLVED where unreachable"""
+    table = bytearray([UNSOLVED]) * SOLUTION_TABLE_SIZE
+    game = TicTacToe()
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        index = position_index(x_bits, o_bits)
+        if table[index] != UNSOLVED:
+            continue
+
+        score = outcome(x_bits, o_bits)
+        if score is not None:
+            table[index] = (score + 1) << 4 | NO_MOVE
+            continue
+
+        x_turn = x_to_move(x_bits, o_bits)
+        score, move = game.minimax(decode(x_bits, o_bits), x_turn)
+        table[index] = (score + 1) << 4 | move
+        for square in SQUARES[FULL_MASK ^ (x_bits | o_bits)]:
+            if x_turn:
+                stack.append((x_bits | 1 << square, o_bits))
+            else:
+                stack.append((x_bits, o_bits | 1 << square))
+    return table
+
+
+def write_table(path=SOLUTION_TABLE_PATH):
+    """Solve the game and write the table to path, replacing it atomically"""
+    table = solve()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(SOLUTION_TABLE_HEADER)
+        file.write(table)
+    os.replace(tmp_path, path)
+    return sum(1 for entry in table if entry != UNSOLVED)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SOLUTION_TABLE_PATH
+    positions = write_table(path)
+    print(f"Solved {positions} positions, table saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import unittest
+try:
+    import numpy as np
+    from batch_eval import evaluate_boards, to_array, random_boards, X_WINS, O_WINS, TIE, ONGOING
+except ImportError:
+    np = None
+from tic_tac_toe import TicTacToe
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestEvaluateBoards(unittest.TestCase):
+    def test_statuses(self):
+        """Test win, tie and ongoing detection for a small batch"""
+        boards = to_array([
+            ['X', 'X', 'X', ' ', 'O', ' ', 'O', ' ', ' '],
+            ['O', 'X', 'X', 'O', ' ', ' ', 'O', 'X', ' '],
+            ['X', 'O', 'X', 'X', 'O', 'O', 'O', 'X', 'X'],
+            [' '] * 9,
+        ])
+        status, legal_moves = evaluate_boards(boards)
+        self.assertEqual(status.tolist(), [X_WINS, O_WINS, TIE, ONGOING])
+        self.assertFalse(legal_moves[:3].any())
+        self.assertTrue(legal_moves[3].all())
+
+    def test_legal_moves(self):
+        """Test that the legal-move mask matches the empty squares"""
+        board = ['X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', ' ']
+        _, legal_moves = evaluate_boards(to_array([board]))
+        self.assertEqual(np.flatnonzero(legal_moves[0]).tolist(), TicTacToe().get_available_moves(board))
+
+    def test_matches_check_winner(self):
+        """Test agreement with check_winner on random positions"""
+        boards = random_boards(2000, seed=3)
+        status, _ = evaluate_boards(to_array(boards))
+        names = {X_WINS: 'X', O_WINS: 'O', TIE: 'Tie', ONGOING: None}
+        game = TicTacToe()
+        self.assertEqual([names[value] for value in status.tolist()],
+                         [game.check_winner(board) for board in boards])
+
+    def test_rejects_bad_shape(self):
+        """Test that arrays that are not (N, 9) are rejected"""
+        with self.assertRaises(ValueError):
+            evaluate_boards(np.zeros((4, 8), dtype=np.int8))
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import unittest
+from benchmark_tic_tac_toe import reachable_positions, run_benchmarks, find_regressions, ENGINES
+
+class TestBenchmark(unittest.TestCase):
+    def test_reachable_positions(self):
+        """Test that every unfinished legal position is enumerated once"""
+        positions = reachable_positions()
+        self.assertEqual(len(positions), 4520)
+        self.assertEqual(len({''.join(board) for board, _ in positions}), 4520)
+
+    def test_run_benchmarks(self):
+        """Test that a short run reports metrics for every engine"""
+        results = run_benchmarks(max_positions=50)
+        self.assertEqual(set(results), set(ENGINES))
+        self.assertEqual(results['solution_table']['all_positions_nodes'], 0)
+        self.assertLess(results['alpha_beta']['empty_board_nodes'], results['minimax']['empty_board_nodes'])
+
+    def test_find_regressions(self):
+        """Test that only metrics past the tolerance are reported"""
+        baseline = {'minimax': {'all_positions_seconds': 1.0, 'empty_board_nodes': 100}}
+        results = {'minimax': {'all_positions_seconds': 1.2, 'empty_board_nodes': 200}}
+        regressions = find_regressions(results, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('empty_board_nodes', regressions[0])
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import time
+import unittest
+from k_in_a_row import KInARow, IterativeDeepeningSearch, get_config, WIN_SCORE
+
+class TestBoardConfig(unittest.TestCase):
+    def test_line_counts(self):
+        """Test the number of generated win lines for several boards"""
+        self.assertEqual(len(get_config(3, 3).lines), 8)
+        self.assertEqual(len(get_config(4, 4).lines), 10)
+        self.assertEqual(len(get_config(5, 4).lines), 28)
+
+    def test_config_is_shared(self):
+        """Test that each configuration is generated only once"""
+        self.assertIs(get_config(5, 4), get_config(5, 4))
+
+    def test_invalid_k(self):
+        """Test that K longer than the board is rejected"""
+        with self.assertRaises(ValueError):
+            get_config(3, 4)
+
+class TestKInARow(unittest.TestCase):
+    def setUp(self):
+        """Create a fresh 4x4 game before each test"""
+        self.game = KInARow(size=4)
+
+    def test_initial_board(self):
+        """Test that the initial board is empty"""
+        self.assertEqual(self.game.board, [' '] * 16)
+        self.assertEqual(self.game.available_moves(), list(range(16)))
+
+    def test_make_move(self):
+        """Test making valid and invalid moves"""
+        self.assertTrue(self.game.make_move(5, 'X'))
+        self.assertFalse(self.game.make_move(5, 'O'))
+        self.assertEqual(self.game.board[5], 'X')
+        self.assertEqual(self.game.num_empty_squares(), 15)
+
+    def test_winner_diagonal(self):
+        """Test winning condition for a diagonal of four"""
+        for square in (0, 5, 10, 15):
+            self.game.make_move(square, 'X')
+        self.assertEqual(self.game.current_winner, 'X')
+
+    def test_winner_needs_k(self):
+        """Test that three in a row does not win on a 4-in-a-row board"""
+        for square in (0, 1, 2):
+            self.game.make_move(square, 'O')
+        self.assertIsNone(self.game.current_winner)
+
+class TestIterativeDeepeningSearch(unittest.TestCase):
+    def test_solves_3x3(self):
+        """Test that the search solves the 3x3 game as a tie"""
+        search = IterativeDeepeningSearch(get_config(3, 3), time_budget=10)
+        score, move = search.search(0, 0, True)
+        self.assertEqual(score, 0)
+        self.assertEqual(search.depth_reached, 9)
+
+    def test_takes_win(self):
+        """Test that X completes four in a row on a 4x4 board"""
+        game = KInARow(size=4)
+        game.board = ['X', 'X', 'X', ' ',
+                      'O', 'O', 'O', ' ',
+                      ' ', ' ', ' ', ' ',
+                      ' ', ' ', ' ', ' ']
+        search = IterativeDeepeningSearch(game.config, time_budget=5)
+        score, move = search.search(game.x_bits, game.o_bits, True)
+        self.assertEqual(move, 3)
+        self.assertGreaterEqual(score, WIN_SCORE)
+
+    def test_blocks_win(self):
+        """Test that O blocks X's line on a 5x5, 4-in-a-row board"""
+        game = KInARow(size=5, k=4)
+        for square in (6, 7, 8):
+            game.make_move(square, 'X')
+        game.make_move(9, 'O')
+        game.make_move(24, 'O')
+        search = IterativeDeepeningSearch(game.config, time_budget=1)
+        _, move = search.search(game.x_bits, game.o_bits, False)
+        self.assertEqual(move, 5)
+
+    def test_respects_time_budget(self):
+        """Test that a move arrives within the budget on a large board"""
+        search = IterativeDeepeningSearch(get_config(6, 4), time_budget=0.2)
+        start = time.perf_counter()
+        _, move = search.search(0, 0, True)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIn(move, range(36))
+        self.assertGreaterEqual(search.depth_reached, 1)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import unittest
+from k_in_a_row import KInARow, get_config
+from mcts import MCTS, run_playouts
+from tic_tac_toe import TicTacToe
+
+class TestMCTS(unittest.TestCase):
+    def setUp(self):
+        """Create a seeded 3x3 engine before each test"""
+        self.engine = MCTS(playouts=3000, seed=0)
+
+    def test_takes_win(self):
+        """Test that X completes its row"""
+        game = TicTacToe()
+        game.board = ['X', 'X', ' ', 
+                      'O', 'O', ' ', 
+                      ' ', ' ', ' ']
+        score, move = self.engine.search(game.x_bits, game.o_bits, True)
+        self.assertEqual(move, 2)
+        self.assertGreater(score, 0)
+        self.assertGreater(self.engine.playouts_per_second, 0)
+
+    def test_blocks_win(self):
+        """Test that O blocks X's row"""
+        game = TicTacToe()
+        game.board = ['X', 'X', ' ', 
+                      ' ', 'O', ' ', 
+                      ' ', ' ', ' ']
+        _, move = self.engine.search(game.x_bits, game.o_bits, False)
+        self.assertEqual(move, 2)
+
+    def test_playout_budget(self):
+        """Test that every playout is counted at the root"""
+        stats = run_playouts(get_config(3, 3), 0, 0, True, 500, seed=1)
+        self.assertEqual(sum(visits for visits, _ in stats.values()), 500)
+
+    def test_finished_game(self):
+        """Test that a finished game has no move and scores its result for X"""
+        game = TicTacToe()
+        game.board = ['X', 'X', 'X', 'O', 'O', ' ', ' ', ' ', ' ']
+        self.assertEqual(self.engine.search(game.x_bits, game.o_bits, False), (1, None))
+        game.board = ['O', 'O', 'O', 'X', 'X', ' ', 'X', ' ', ' ']
+        self.assertEqual(self.engine.search(game.x_bits, game.o_bits, True), (-1, None))
+        game.board = ['X', 'O', 'X', 'X', 'O', 'O', 'O', 'X', 'X']
+        self.assertEqual(self.engine.search(game.x_bits, game.o_bits, True), (0, None))
+
+    def test_root_parallel(self):
+        """Test that worker trees are merged on a larger board"""
+        game = KInARow(size=5, k=4)
+        for square in (6, 7, 8):
+            game.make_move(square, 'X')
+        game.make_move(9, 'O')
+        engine = MCTS(game.config, playouts=4000, workers=2, seed=0)
+        try:
+            _, move = engine.search(game.x_bits, game.o_bits, True)
+        finally:
+            engine.close()
+        self.assertEqual(move, 5)
+
+    def test_selectable_engine(self):
+        """Test that TicTacToe plays through a pluggable engine"""
+        game = TicTacToe(ai_engine=self.engine)
+        game.board = ['X', 'X', ' ', 
+                      'O', 'O', ' ', 
+                      ' ', ' ', ' ']
+        self.assertEqual(game.get_ai_move(True), 2)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
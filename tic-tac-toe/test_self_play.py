@@ -0,0 +1,63 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from tic_tac_toe import TicTacToe
+from self_play import play_game, simulate
+
+class TestPlayGame(unittest.TestCase):
+    def setUp(self):
+        """Create a fresh TicTacToe instance before each test"""
+        self.game = TicTacToe()
+        self.rng = random.Random(0)
+
+    def test_ai_against_ai_ties(self):
+        """Test that two perfect players always tie"""
+        result, moves = play_game(self.game, 'ai', 'ai', self.rng)
+        self.assertEqual(result, 'Tie')
+        self.assertEqual(len(moves), 9)
+
+    def test_ai_never_loses_to_random(self):
+        """Test that the AI never loses as either side"""
+        for _ in range(50):
+            result, _ = play_game(self.game, 'ai', 'random', self.rng)
+            self.assertNotEqual(result, 'O')
+            result, _ = play_game(self.game, 'random', 'ai', self.rng)
+            self.assertNotEqual(result, 'X')
+
+    def test_moves_are_legal(self):
+        """Test that a random game never repeats a square"""
+        _, moves = play_game(self.game, 'random', 'random', self.rng)
+        self.assertEqual(len(moves), len(set(moves)))
+
+class TestSimulate(unittest.TestCase):
+    def test_summary_totals(self):
+        """Test that chunked results add up across the pool"""
+        summary = simulate(250, 'ai', 'random', workers=2, chunk_size=100, seed=1)
+        self.assertEqual(summary.games, 250)
+        self.assertEqual(summary.results['O'], 0)
+        self.assertEqual(sum(summary.game_lengths.values()), 250)
+        self.assertEqual(summary.moves, sum(length * count for length, count in summary.game_lengths.items()))
+        self.assertGreater(summary.moves_per_second, 0)
+
+    def test_record_file(self):
+        """Test that every game is written to the record file"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'games.jsonl')
+            simulate(30, 'random', 'random', workers=1, chunk_size=7, seed=2, record_file=path)
+            with open(path, encoding='utf-8') as file:
+                games = [json.loads(line) for line in file]
+        self.assertEqual(len(games), 30)
+        self.assertTrue(all(game['winner'] in ('X', 'O', 'Tie') for game in games))
+
+    def test_unknown_player(self):
+        """Test that an unknown player name is rejected"""
+        with self.assertRaises(ValueError):
+            simulate(1, 'ai', 'human')
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 import unittest
 import sys
 import io
+import os
+import tempfile
 from contextlib import redirect_stdout
-from tic_tac_toe import TicTacToe
+from tic_tac_toe import TicTacToe, SolutionTable, SearchProfiler, SYMMETRIES, canonicalize, encode, decode
+from solve_tic_tac_toe import write_table
 
 class TestTicTacToe(unittest.TestCase):
     def setUp(self):
@@ -35,6 +38,46 @@ class TestTicTacToe(unittest.TestCase):
         self.assertFalse(result)
         self.assertEqual(self.game.board[4], 'X')
 
+    def test_board_bitboards(self):
+        """Test that the list board and the bitboards stay in step"""
+        self.game.make_move(0, 'X')
+        self.game.make_move(4, 'O')
+        self.assertEqual(self.game.x_bits, 0b000000001)
+        self.assertEqual(self.game.o_bits, 0b000010000)
+
+        board = ['X', 'O', ' ', 
+                 ' ', 'X', ' ', 
+                 'O', ' ', ' ']
+        self.game.board = board
+        self.assertEqual(self.game.board, board)
+        self.assertEqual(decode(*encode(board)), board)
+        self.assertEqual(self.game.available_moves(), [2, 3, 5, 7, 8])
+
+    def test_undo_move(self):
+        """Test that undoing moves restores the board and the winner"""
+        for square, letter in ((0, 'X'), (3, 'O'), (1, 'X'), (4, 'O'), (2, 'X')):
+            self.game.make_move(square, letter)
+        self.assertEqual(self.game.current_winner, 'X')
+
+        self.assertEqual(self.game.undo_move(), 2)
+        self.assertIsNone(self.game.current_winner)
+        self.assertEqual(self.game.board, ['X', 'X', ' ', 
+                                           'O', 'O', ' ', 
+                                           ' ', ' ', ' '])
+        self.assertEqual(self.game.available_moves(), [2, 5, 6, 7, 8])
+
+        while self.game.undo_move() is not None:
+            pass
+        self.assertEqual(self.game.board, [' '] * 9)
+
+    def test_is_free(self):
+        """Test square availability checks, including out-of-range squares"""
+        self.game.make_move(4, 'X')
+        self.assertFalse(self.game.is_free(4))
+        self.assertTrue(self.game.is_free(0))
+        self.assertFalse(self.game.is_free(9))
+        self.assertFalse(self.game.is_free(-1))
+
     def test_winner_row(self):
         """Test winning condition for a row"""
         # Set up a winning row
@@ -96,6 +139,94 @@ class TestTicTacToe(unittest.TestCase):
         _, best_move = self.game.minimax(board, True)
         self.assertEqual(best_move, 2)
 
+    def test_minimax_reuses_transposition_table(self):
+        """Test that a repeated search is answered from the transposition table"""
+        first = self.game.minimax([' '] * 9, True)
+        misses = self.game.transposition_table.misses
+        hits = self.game.transposition_table.hits
+
+        self.assertEqual(self.game.minimax([' '] * 9, True), first)
+        self.assertEqual(self.game.transposition_table.misses, misses)
+        self.assertEqual(self.game.transposition_table.hits, hits + 1)
+
+    def test_minimax_symmetric_positions(self):
+        """Test that rotated and reflected boards share a cache entry"""
+        board = ['X', 'X', ' ', 
+                 'O', 'O', ' ', 
+                 ' ', ' ', ' ']
+        self.game.minimax(board, True)
+        entries = len(self.game.transposition_table)
+
+        # Rotate the board 90 degrees clockwise: the winning square moves to 8
+        rotated = [board[6], board[3], board[0],
+                   board[7], board[4], board[1],
+                   board[8], board[5], board[2]]
+        self.assertEqual(self.game.minimax(rotated, True), (1, 8))
+        self.assertEqual(len(self.game.transposition_table), entries)
+
+    def test_alpha_beta_matches_minimax(self):
+        """Test that alpha-beta picks the same move as the full search everywhere"""
+        full = TicTacToe()
+        pruned = TicTacToe(alpha_beta=True)
+        seen = set()
+
+        def check(board, maximizing_player):
+            if ''.join(board) in seen:
+                return
+            seen.add(''.join(board))
+            self.assertEqual(pruned.minimax(board, maximizing_player),
+                             full.minimax(board, maximizing_player), board)
+            if full.check_winner(board) is None:
+                letter = 'X' if maximizing_player else 'O'
+                for move in full.get_available_moves(board):
+                    board[move] = letter
+                    check(board, not maximizing_player)
+                    board[move] = ' '
+
+        check([' '] * 9, True)
+
+    def test_alpha_beta_visits_fewer_nodes(self):
+        """Test that alpha-beta prunes the search from the empty board"""
+        full = TicTacToe()
+        pruned = TicTacToe(alpha_beta=True)
+        self.assertEqual(pruned.minimax([' '] * 9, True), full.minimax([' '] * 9, True))
+        self.assertLess(pruned.nodes_visited, full.nodes_visited)
+
+    def test_profiler(self):
+        """Test that the profiling hook records every minimax call"""
+        profiler = SearchProfiler()
+        game = TicTacToe(profiler=profiler)
+        game.minimax([' '] * 9, True)
+        first_nodes = game.nodes_visited
+        game.minimax([' '] * 9, True)
+
+        self.assertEqual(len(profiler.calls), 2)
+        self.assertEqual(profiler.calls[0].nodes, first_nodes)
+        self.assertEqual(profiler.calls[0].cache_misses, game.transposition_table.misses)
+        self.assertEqual(profiler.calls[1].cache_hits, 1)
+        self.assertGreater(profiler.nodes_per_second, 0)
+        self.assertGreater(profiler.cache_hit_rate, 0)
+
+    def test_profiler_counts_bound_probes(self):
+        """Test that alpha-beta's bound probes count towards the hit rate"""
+        profiler = SearchProfiler()
+        game = TicTacToe(alpha_beta=True, profiler=profiler)
+        game.minimax(['X', ' ', ' ', ' ', ' ', ' ', ' ', ' ', ' '], False)
+        game.minimax(['X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', ' '], True)
+        # Without the bound probes only the root lookup would be counted
+        for call in profiler.calls:
+            self.assertGreater(call.cache_hits + call.cache_misses, 1)
+        self.assertGreater(profiler.calls[1].cache_hits, 0)
+
+    def test_canonicalize(self):
+        """Test that all symmetries of a board have the same canonical key"""
+        board = ['X', 'O', ' ', 
+                 ' ', ' ', ' ', 
+                 ' ', ' ', ' ']
+        keys = {canonicalize(*encode([board[i] for i in perm]))[0] for perm in SYMMETRIES}
+        self.assertEqual(len(SYMMETRIES), 8)
+        self.assertEqual(len(keys), 1)
+
     def test_empty_squares(self):
         """Test empty squares detection"""
         # Initially all squares are empty
@@ -130,6 +261,51 @@ class TestTicTacToe(unittest.TestCase):
         # 6 empty squares now
         self.assertEqual(self.game.num_empty_squares(), 6)
 
+class TestSolutionTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Solve the game once into a temporary table file"""
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp_dir.name, 'tic_tac_toe.solution')
+        cls.positions = write_table(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def setUp(self):
+        self.table = SolutionTable(self.path)
+        self.game = TicTacToe(solution_table=self.table)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_table_covers_legal_positions(self):
+        """Test that every legal position of the game is solved"""
+        self.assertEqual(self.positions, 5478)
+
+    def test_lookup_matches_minimax(self):
+        """Test that table answers agree with a search and need no nodes"""
+        search = TicTacToe()
+        boards = [
+            [' '] * 9,
+            ['X', 'X', ' ', 'O', 'O', ' ', ' ', ' ', ' '],
+            ['X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', ' '],
+            ['X', 'O', 'X', 'X', 'O', 'O', 'O', 'X', 'X'],
+        ]
+        for board in boards:
+            x_turn = board.count('X') == board.count('O')
+            self.assertEqual(self.game.minimax(board, x_turn), search.minimax(board, x_turn))
+            self.assertEqual(self.game.nodes_visited, 0)
+
+    def test_rejects_other_files(self):
+        """Test that a file without the table header is refused"""
+        path = os.path.join(self.tmp_dir.name, 'bogus.solution')
+        with open(path, 'wb') as file:
+            file.write(b'not a table')
+        with self.assertRaises(ValueError):
+            SolutionTable(path)
+
 def main():
     unittest.main()
 
@@ -1,106 +1,476 @@
+import mmap
+import os
 import random
+import time
+from collections import namedtuple
 
-class TicTacToe:
+# Rows, columns and diagonals, as square indices and as 9-bit masks
+WINNING_COMBINATIONS = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
+    [0, 4, 8], [2, 4, 6]  # diagonals
+]
+WIN_MASKS = [sum(1 << i for i in combo) for combo in WINNING_COMBINATIONS]
+FULL_MASK = (1 << 9) - 1
+
+# Lookup tables indexed by a 9-bit mask, so the search never loops over lines
+# or squares: whether the mask contains a win, and the free squares it names
+WINNING_SETS = [any(mask & win == win for win in WIN_MASKS) for mask in range(1 << 9)]
+SQUARES = [tuple(i for i in range(9) if mask >> i & 1) for mask in range(1 << 9)]
+
+# The win masks that pass through each square
+LINES_THROUGH = [[win for win in WIN_MASKS if win >> square & 1] for square in range(9)]
+
+# Alpha-beta move ordering: centre, then corners, then edges. ORDERED_SQUARES
+# is indexed by [killer][free mask], with the killer move (when free) tried
+# first; index 9 means there is no killer move for the ply yet.
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+NO_KILLER = 9
+ORDERED_SQUARES = [
+    [((killer,) if mask >> killer & 1 else ()) + tuple(i for i in MOVE_ORDER if mask >> i & 1 and i != killer)
+     for mask in range(1 << 9)]
+    for killer in range(9)
+] + [[tuple(i for i in MOVE_ORDER if mask >> i & 1) for mask in range(1 << 9)]]
+
+
+def encode(board):
+    """Convert a list board of ' '/'X'/'O' into (x_bits, o_bits)"""
+    x_bits = o_bits = 0
+    for i, spot in enumerate(board):
+        if spot == 'X':
+            x_bits |= 1 << i
+        elif spot == 'O':
+            o_bits |= 1 << i
+    return x_bits, o_bits
+
+def decode(x_bits, o_bits):
+    """Convert (x_bits, o_bits) back into a list board of ' '/'X'/'O'"""
+    return ['X' if x_bits >> i & 1 else 'O' if o_bits >> i & 1 else ' ' for i in range(9)]
+
+def outcome(x_bits, o_bits):
+    """Return 1 if X has won, -1 if O has won, 0 for a tie and None otherwise"""
+    if WINNING_SETS[x_bits]:
+        return 1
+    if WINNING_SETS[o_bits]:
+        return -1
+    if x_bits | o_bits == FULL_MASK:
+        return 0
+    return None
+
+OUTCOME_NAMES = {1: 'X', -1: 'O', 0: 'Tie'}
+
+def lowest_square(mask):
+    return (mask & -mask).bit_length() - 1
+
+
+def _rotate(perm):
+    return [perm[6], perm[3], perm[0], perm[7], perm[4], perm[1], perm[8], perm[5], perm[2]]
+
+def _reflect(perm):
+    return [perm[2], perm[1], perm[0], perm[5], perm[4], perm[3], perm[8], perm[7], perm[6]]
+
+def _build_symmetries():
+    """Build the 8 rotations and reflections of the board as square permutations"""
+    symmetries = []
+    perm = list(range(9))
+    for _ in range(4):
+        symmetries.append(tuple(perm))
+        symmetries.append(tuple(_reflect(perm)))
+        perm = _rotate(perm)
+    return symmetries
+
+def _permute_mask(mask, perm):
+    return sum(1 << i for i, src in enumerate(perm) if mask >> src & 1)
+
+# Square i of a transformed board holds board[perm[i]] for each perm below
+SYMMETRIES = _build_symmetries()
+
+# For every symmetry, the transformed value of each 9-bit mask and its inverse
+SYMMETRY_TABLES = [[_permute_mask(mask, perm) for mask in range(1 << 9)] for perm in SYMMETRIES]
+INVERSE_SYMMETRY_TABLES = [[0] * (1 << 9) for _ in SYMMETRIES]
+for _table, _inverse in zip(SYMMETRY_TABLES, INVERSE_SYMMETRY_TABLES):
+    for _mask, _image in enumerate(_table):
+        _inverse[_image] = _mask
+
+
+def canonicalize(x_bits, o_bits):
+    """Return (key, symmetry) for the smallest of the 8 symmetric encodings of a board"""
+    return min(((table[x_bits] << 9) | table[o_bits], i) for i, table in enumerate(SYMMETRY_TABLES))
+
+
+class TranspositionTable:
+    """
+    Cache of solved positions shared by every search of a TicTacToe instance.
+
+    Positions are keyed by their canonical encoding, so the 8 rotations and
+    reflections of a board share one entry. Each entry stores the minimax
+    score and a mask of every optimal move in canonical squares; lookups map
+    it back onto the real board and pick the lowest square, which is the same
+    move a full minimax search would return.
+    """
     def __init__(self):
-        self.board = [' ' for _ in range(9)]
+        self.entries = {}
+        self.bounds = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, x_bits, o_bits, maximizing_player):
+        key, symmetry = canonicalize(x_bits, o_bits)
+        entry = self.entries.get(key << 1 | maximizing_player)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        score, best_moves = entry
+        return score, lowest_square(INVERSE_SYMMETRY_TABLES[symmetry][best_moves])
+
+    def store(self, x_bits, o_bits, maximizing_player, score, best_moves):
+        key, symmetry = canonicalize(x_bits, o_bits)
+        self.entries[key << 1 | maximizing_player] = (score, SYMMETRY_TABLES[symmetry][best_moves])
+
+    def lookup_bounds(self, x_bits, o_bits, maximizing_player):
+        """
+        Return the (lower, upper) score bounds alpha-beta has proven, or None;
+        counted in hits and misses like lookup(), so both searches report
+        comparable hit rates
+        """
+        key, _ = canonicalize(x_bits, o_bits)
+        bounds = self.bounds.get(key << 1 | maximizing_player)
+        if bounds is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return bounds
+
+    def store_bounds(self, x_bits, o_bits, maximizing_player, lower, upper):
+        key, _ = canonicalize(x_bits, o_bits)
+        self.bounds[key << 1 | maximizing_player] = (lower, upper)
+
+    def clear(self):
+        self.entries.clear()
+        self.bounds.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Solution table file: a header followed by one byte per position, indexed
+# by the base-3 encoding of the board (empty=0, X=1, O=2). Each byte holds
+# (value + 1) << 4 | best move for the side to move, with NO_MOVE for
+# finished games; UNSOLVED marks positions that cannot occur in play.
+SOLUTION_TABLE_HEADER = b'TTTSOLV1'
+SOLUTION_TABLE_SIZE = 3 ** 9
+SOLUTION_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tic_tac_toe.solution')
+NO_MOVE = 0x0F
+UNSOLVED = 0xFF
+
+# Base-3 contribution of each 9-bit mask, so a position index is two lookups
+TERNARY = [sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(1 << 9)]
+
+
+def position_index(x_bits, o_bits):
+    return TERNARY[x_bits] + 2 * TERNARY[o_bits]
+
+def x_to_move(x_bits, o_bits):
+    """X moves first, so it is X's turn whenever both sides have as many marks"""
+    return len(SQUARES[x_bits]) == len(SQUARES[o_bits])
+
+
+class SolutionTable:
+    """
+    Memory-mapped perfect-play table written by solve_tic_tac_toe.py.
+
+    Opening it only maps the file, and each lookup reads a single byte,
+    so answering a move needs no search at all.
+    """
+    def __init__(self, path=SOLUTION_TABLE_PATH):
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if (len(self.data) != len(SOLUTION_TABLE_HEADER) + SOLUTION_TABLE_SIZE
+                or self.data[:len(SOLUTION_TABLE_HEADER)] != SOLUTION_TABLE_HEADER):
+            self.data.close()
+            raise ValueError(f"{path} is not a tic tac toe solution table")
+
+    def lookup(self, x_bits, o_bits):
+        """Return (score, move) for the side to move, or None if the position is not in the table"""
+        entry = self.data[len(SOLUTION_TABLE_HEADER) + position_index(x_bits, o_bits)]
+        if entry == UNSOLVED:
+            return None
+        move = entry & 0x0F
+        return (entry >> 4) - 1, None if move == NO_MOVE else move
+
+    def close(self):
+        self.data.close()
+
+
+def load_solution_table(path=SOLUTION_TABLE_PATH):
+    """Open the solution table at path, or return None if it has not been built"""
+    if not os.path.exists(path):
+        return None
+    return SolutionTable(path)
+
+
+# One minimax call as seen by a SearchProfiler
+SearchProfile = namedtuple('SearchProfile', ['nodes', 'seconds', 'cache_hits', 'cache_misses'])
+
+
+class SearchProfiler:
+    """
+    Records the node count, wall time and transposition table hits of
+    every minimax call made by the TicTacToe it is attached to.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def record(self, profile):
+        self.calls.append(profile)
+
+    @property
+    def total_nodes(self):
+        return sum(call.nodes for call in self.calls)
+
+    @property
+    def total_seconds(self):
+        return sum(call.seconds for call in self.calls)
+
+    @property
+    def nodes_per_second(self):
+        seconds = self.total_seconds
+        return self.total_nodes / seconds if seconds else 0.0
+
+    @property
+    def cache_hit_rate(self):
+        hits = sum(call.cache_hits for call in self.calls)
+        probes = hits + sum(call.cache_misses for call in self.calls)
+        return hits / probes if probes else 0.0
+
+    def reset(self):
+        self.calls = []
+
+
+class TicTacToe:
+    """
+    Tic Tac Toe game and minimax AI.
+
+    The position is held as two 9-bit integers, one per side, and wins are
+    detected with precomputed masks. `board` presents it as the familiar list
+    of ' '/'X'/'O' strings; assigning a list to it replaces the position.
+    make_move and undo_move update the bitboards in place, so move
+    generation and win checks never rescan the board.
+
+    With alpha_beta=True, minimax prunes with alpha-beta and ordered moves
+    but still returns the same move as the full search. Either way the
+    number of positions visited by the last call is left in nodes_visited.
+    Given a SolutionTable, minimax answers from it without searching.
+    Passing ai_engine (any object with search(x_bits, o_bits,
+    maximizing_player), such as mcts.MCTS) makes play() use it instead.
+    A SearchProfiler given as profiler records every minimax call.
+    """
+    def __init__(self, transposition_table=None, alpha_beta=False, solution_table=None, ai_engine=None,
+                 profiler=None):
+        self.x_bits = 0
+        self.o_bits = 0
         self.current_winner = None
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.alpha_beta = alpha_beta
+        self.solution_table = solution_table
+        self.ai_engine = ai_engine
+        self.profiler = profiler
+        self.nodes_visited = 0
+        self.killer_moves = [NO_KILLER] * 10
+        # (square, winner before the move) for every move since the board was set
+        self.move_history = []
+
+    @property
+    def board(self):
+        return decode(self.x_bits, self.o_bits)
+
+    @board.setter
+    def board(self, board):
+        self.x_bits, self.o_bits = encode(board)
+        self.move_history = []
 
     def print_board(self):
-        for row in [self.board[i*3:(i+1)*3] for i in range(3)]:
+        board = self.board
+        for row in [board[i*3:(i+1)*3] for i in range(3)]:
             print('| ' + ' | '.join(row) + ' |')
 
     def available_moves(self):
-        return [i for i, spot in enumerate(self.board) if spot == ' ']
+        return list(SQUARES[FULL_MASK ^ (self.x_bits | self.o_bits)])
 
     def empty_squares(self):
-        return ' ' in self.board
+        return self.x_bits | self.o_bits != FULL_MASK
 
     def num_empty_squares(self):
-        return self.board.count(' ')
+        return len(SQUARES[FULL_MASK ^ (self.x_bits | self.o_bits)])
+
+    def is_free(self, square):
+        return 0 <= square < 9 and not (self.x_bits | self.o_bits) >> square & 1
 
     def make_move(self, square, letter):
-        if self.board[square] == ' ':
-            self.board[square] = letter
-            if self.winner(square, letter):
-                self.current_winner = letter
-            return True
-        return False
+        bit = 1 << square
+        if (self.x_bits | self.o_bits) & bit:
+            return False
+        if letter == 'X':
+            self.x_bits |= bit
+        else:
+            self.o_bits |= bit
+        self.move_history.append((square, self.current_winner))
+        if self.winner(square, letter):
+            self.current_winner = letter
+        return True
+
+    def undo_move(self):
+        """Take back the last move made with make_move and return its square"""
+        if not self.move_history:
+            return None
+        square, previous_winner = self.move_history.pop()
+        bit = ~(1 << square)
+        self.x_bits &= bit
+        self.o_bits &= bit
+        self.current_winner = previous_winner
+        return square
 
     def winner(self, square, letter):
-        # Check row
-        row_ind = square // 3
-        row = self.board[row_ind*3 : (row_ind + 1) * 3]
-        if all([spot == letter for spot in row]):
-            return True
-
-        # Check column
-        col_ind = square % 3
-        column = [self.board[col_ind+i*3] for i in range(3)]
-        if all([spot == letter for spot in column]):
-            return True
-
-        # Check diagonals
-        if square % 2 == 0:
-            diagonal1 = [self.board[0], self.board[4], self.board[8]]
-            if all([spot == letter for spot in diagonal1]):
-                return True
-            diagonal2 = [self.board[2], self.board[4], self.board[6]]
-            if all([spot == letter for spot in diagonal2]):
-                return True
-
-        return False
+        bits = self.x_bits if letter == 'X' else self.o_bits
+        return any(bits & line == line for line in LINES_THROUGH[square])
 
     def minimax(self, board, maximizing_player):
-        case = self.check_winner(board)
-        if case == 'X':
-            return 1, None
-        elif case == 'O':
-            return -1, None
-        elif case == 'Tie':
-            return 0, None
-
-        if maximizing_player:
-            max_eval = float('-inf')
-            best_move = None
-            for move in self.get_available_moves(board):
-                board_copy = board.copy()
-                board_copy[move] = 'X'
-                eval, _ = self.minimax(board_copy, False)
-                if eval > max_eval:
-                    max_eval = eval
-                    best_move = move
-            return max_eval, best_move
+        if self.profiler is None:
+            return self._search(board, maximizing_player)
+
+        table = self.transposition_table
+        hits, misses = table.hits, table.misses
+        start = time.perf_counter()
+        result = self._search(board, maximizing_player)
+        elapsed = time.perf_counter() - start
+        self.profiler.record(SearchProfile(self.nodes_visited, elapsed, table.hits - hits, table.misses - misses))
+        return result
+
+    def _search(self, board, maximizing_player):
+        x_bits, o_bits = encode(board)
+        self.nodes_visited = 0
+        if self.solution_table is not None and maximizing_player == x_to_move(x_bits, o_bits):
+            solved = self.solution_table.lookup(x_bits, o_bits)
+            if solved is not None:
+                return solved
+        if self.alpha_beta:
+            return self._alphabeta_root(x_bits, o_bits, maximizing_player)
+        return self._minimax(x_bits, o_bits, maximizing_player)
+
+    def _minimax(self, x_bits, o_bits, maximizing_player):
+        self.nodes_visited += 1
+        score = outcome(x_bits, o_bits)
+        if score is not None:
+            return score, None
+
+        cached = self.transposition_table.lookup(x_bits, o_bits, maximizing_player)
+        if cached is not None:
+            return cached
+
+        best_eval = None
+        best_moves = 0
+        for move in SQUARES[FULL_MASK ^ (x_bits | o_bits)]:
+            bit = 1 << move
+            if maximizing_player:
+                eval, _ = self._minimax(x_bits | bit, o_bits, False)
+            else:
+                eval, _ = self._minimax(x_bits, o_bits | bit, True)
+            if best_eval is None or (eval > best_eval if maximizing_player else eval < best_eval):
+                best_eval, best_moves = eval, bit
+            elif eval == best_eval:
+                best_moves |= bit
+
+        self.transposition_table.store(x_bits, o_bits, maximizing_player, best_eval, best_moves)
+        return best_eval, lowest_square(best_moves)
+
+    def _alphabeta_root(self, x_bits, o_bits, maximizing_player):
+        score = outcome(x_bits, o_bits)
+        if score is not None:
+            self.nodes_visited += 1
+            return score, None
+
+        cached = self.transposition_table.lookup(x_bits, o_bits, maximizing_player)
+        if cached is not None:
+            self.nodes_visited += 1
+            return cached
+
+        self.killer_moves = [NO_KILLER] * 10
+        ply = 9 - len(SQUARES[FULL_MASK ^ (x_bits | o_bits)])
+        best_eval = self._alphabeta(x_bits, o_bits, maximizing_player, float('-inf'), float('inf'), ply)
+
+        # The full search returns the lowest optimal square, so test every
+        # move against the root value with a null window and keep them all
+        best_moves = 0
+        for move in SQUARES[FULL_MASK ^ (x_bits | o_bits)]:
+            bit = 1 << move
+            if maximizing_player:
+                if self._alphabeta(x_bits | bit, o_bits, False, best_eval - 1, best_eval, ply + 1) >= best_eval:
+                    best_moves |= bit
+            elif self._alphabeta(x_bits, o_bits | bit, True, best_eval, best_eval + 1, ply + 1) <= best_eval:
+                best_moves |= bit
+
+        self.transposition_table.store(x_bits, o_bits, maximizing_player, best_eval, best_moves)
+        return best_eval, lowest_square(best_moves)
+
+    def _alphabeta(self, x_bits, o_bits, maximizing_player, alpha, beta, ply):
+        self.nodes_visited += 1
+        score = outcome(x_bits, o_bits)
+        if score is not None:
+            return score
+
+        bounds = self.transposition_table.lookup_bounds(x_bits, o_bits, maximizing_player)
+        if bounds is not None:
+            lower, upper = bounds
+            if lower >= beta or lower == upper:
+                return lower
+            if upper <= alpha:
+                return upper
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+        original_alpha, original_beta = alpha, beta
+
+        free = FULL_MASK ^ (x_bits | o_bits)
+        best_eval = float('-inf') if maximizing_player else float('inf')
+        for move in ORDERED_SQUARES[self.killer_moves[ply]][free]:
+            bit = 1 << move
+            if maximizing_player:
+                eval = self._alphabeta(x_bits | bit, o_bits, False, alpha, beta, ply + 1)
+                if eval > best_eval:
+                    best_eval = eval
+                    alpha = max(alpha, eval)
+            else:
+                eval = self._alphabeta(x_bits, o_bits | bit, True, alpha, beta, ply + 1)
+                if eval < best_eval:
+                    best_eval = eval
+                    beta = min(beta, eval)
+            if alpha >= beta:
+                self.killer_moves[ply] = move
+                break
+
+        if best_eval <= original_alpha:
+            self.transposition_table.store_bounds(x_bits, o_bits, maximizing_player, -1, best_eval)
+        elif best_eval >= original_beta:
+            self.transposition_table.store_bounds(x_bits, o_bits, maximizing_player, best_eval, 1)
+        else:
+            self.transposition_table.store_bounds(x_bits, o_bits, maximizing_player, best_eval, best_eval)
+        return best_eval
+
+    def get_ai_move(self, maximizing_player):
+        """Pick the AI's move on the current board with the configured engine"""
+        if self.ai_engine is not None:
+            _, move = self.ai_engine.search(self.x_bits, self.o_bits, maximizing_player)
         else:
-            min_eval = float('inf')
-            best_move = None
-            for move in self.get_available_moves(board):
-                board_copy = board.copy()
-                board_copy[move] = 'O'
-                eval, _ = self.minimax(board_copy, True)
-                if eval < min_eval:
-                    min_eval = eval
-                    best_move = move
-            return min_eval, best_move
+            _, move = self.minimax(self.board, maximizing_player)
+        return move
 
     def get_available_moves(self, board):
         return [i for i, spot in enumerate(board) if spot == ' ']
 
     def check_winner(self, board):
-        # Check rows, columns, and diagonals
-        winning_combinations = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
-            [0, 4, 8], [2, 4, 6]  # diagonals
-        ]
-
-        for combo in winning_combinations:
-            if board[combo[0]] == board[combo[1]] == board[combo[2]] != ' ':
-                return board[combo[0]]
-
-        if ' ' not in board:
-            return 'Tie'
-        
-        return None
+        return OUTCOME_NAMES.get(outcome(*encode(board)))
 
     def print_board_usage(self):
         """Print the board layout with numbered squares for user guidance"""
@@ -129,11 +499,11 @@ class TicTacToe:
             # Determine whose turn it is based on human_first
             if human_first:
                 # Human's turn (X)
-                if len(self.available_moves()) > 0:
+                if self.empty_squares():
                     while True:
                         try:
                             human_move = int(input("Enter your move (0-8): "))
-                            if human_move in self.available_moves():
+                            if self.is_free(human_move):
                                 break
                             else:
                                 print("Invalid move. Try again.")
@@ -148,8 +518,8 @@ class TicTacToe:
                         return self.current_winner
 
             # AI's turn
-            if len(self.available_moves()) > 0:
-                _, move = self.minimax(self.board, ai_letter == 'X')
+            if self.empty_squares():
+                move = self.get_ai_move(ai_letter == 'X')
                 self.make_move(move, ai_letter)
                 print(f"AI chose square {move}")
                 self.print_board()
@@ -160,11 +530,11 @@ class TicTacToe:
 
             # Human's turn (O)
             if not human_first:
-                if len(self.available_moves()) > 0:
+                if self.empty_squares():
                     while True:
                         try:
                             human_move = int(input("Enter your move (0-8): "))
-                            if human_move in self.available_moves():
+                            if self.is_free(human_move):
                                 break
                             else:
                                 print("Invalid move. Try again.")
@@ -182,9 +552,28 @@ class TicTacToe:
         return 'Tie'
 
 def main():
-    game = TicTacToe()
+    # One game instance (and so one transposition table) serves every round,
+    # so positions solved in earlier games are answered from the cache. If
+    # solve_tic_tac_toe.py has been run, moves come straight from its table.
+    game = TicTacToe(solution_table=load_solution_table())
     
     print("Welcome to Tic Tac Toe!")
+    while True:
+        print("\nChoose the AI engine:")
+        print("1. Minimax (perfect play)")
+        print("2. Monte Carlo Tree Search")
+
+        engine_choice = input("Enter your choice (1/2): ")
+
+        if engine_choice == '1':
+            break
+        elif engine_choice == '2':
+            from mcts import MCTS
+            game.ai_engine = MCTS()
+            break
+        else:
+            print("Invalid choice. Please try again.")
+
     game.print_board_usage()
     
     while True:
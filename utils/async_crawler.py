@@ -0,0 +1,167 @@
+"""
+This module provides an asyncio crawler that mirrors a directory listing over HTTP with aiohttp.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+from crawler import CrawlStats, Crawler
+from listing_parser import ListingParser
+
+
+class AsyncCrawler(Crawler):
+    """
+    Mirrors every file below a base URL into a local directory on one event loop.
+
+    A few listing tasks parse directory listings as they arrive and queue the files they
+    find; up to `concurrency` download tasks take files from the queue. The file queue is
+    bounded, so parsing waits when downloads fall behind. Downloads hand their disk writes and
+    manifest updates to a small thread pool so the loop never blocks on the file system.
+
+    Args:
+        base_url (str): The URL of the listing to mirror. Only URLs below it are fetched.
+        save_dir (str): The directory where the downloaded files will be saved.
+        concurrency (int): The number of files downloaded at once.
+        per_host_limit (int): The most open connections to a single host, or None for concurrency.
+        listing_workers (int): The number of listings fetched and parsed at once.
+        queue_size (int): The most files waiting to be downloaded.
+        write_threads (int): The number of threads writing to disk.
+        timeout (float): Seconds to wait for the server before giving up on a request.
+        chunk_size (int): Bytes read at a time when saving a file.
+        verbose (bool): Print progress messages.
+        manifest (str or Manifest): The manifest database, or None to download every file in full.
+        **options: include, exclude, max_depth, rate_limit and dry_run, as for Crawler.
+
+    Example:
+        stats = asyncio.run(AsyncCrawler("http://example.com/files/", "/path/to/save_dir").run())
+    """
+
+    def __init__(self, base_url, save_dir, concurrency=1000, per_host_limit=100, listing_workers=8,
+                 queue_size=1000, write_threads=4, timeout=30.0, chunk_size=65536, verbose=False, manifest=None,
+                 **options):
+        if listing_workers < 1:
+            raise ValueError(f"listing_workers must be at least 1, got {listing_workers}")
+        super().__init__(base_url, save_dir, workers=concurrency, per_host_limit=per_host_limit,
+                         timeout=timeout, chunk_size=chunk_size, verbose=verbose, manifest=manifest, **options)
+        self.listing_workers = listing_workers
+        self.queue_size = queue_size
+        self.write_threads = write_threads
+        self._listings = None
+
+    async def fetch_listing_async(self, session, url, files):
+        """
+        Parse a directory listing as it arrives, queueing new listings and putting new files on
+        the files queue as soon as their entries are read.
+        """
+        self.log(f"Listing {url}")
+        await self._throttle()
+        parser = ListingParser()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                await self._queue(self.listed_links(parser.feed(chunk), url), files)
+        await self._queue(self.listed_links(parser.close(), url), files)
+        self.stats.add(pages=1)
+
+    async def _queue(self, links, files):
+        for link in links:
+            if link in self._visited:
+                continue
+            self._visited.add(link)
+            if link.endswith("/"):
+                self._listings.put_nowait(link)
+            else:
+                await files.put(link)  # Waits while the download tasks are behind
+
+    async def fetch_file_async(self, session, url, writer):
+        """Download a file below save_dir, doing the disk and manifest work in the writer thread pool."""
+        loop = asyncio.get_running_loop()
+        request_headers, offset = await loop.run_in_executor(writer, self.file_request, url)
+        if request_headers is None:
+            self.skip(url)
+            return
+        await self._throttle()
+        async with session.get(url, headers=request_headers) as response:
+            if response.status != 416:
+                response.raise_for_status()
+            part = await loop.run_in_executor(writer, self.open_file, url, response.status, response.headers, offset)
+            if part is None:
+                return
+            try:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    await loop.run_in_executor(writer, part.write, chunk)
+            except BaseException:
+                part.close()
+                raise
+            await loop.run_in_executor(writer, self.finish_file, url, part, response.headers)
+
+    async def _throttle(self):
+        if self.rate_limiter is not None:
+            await asyncio.sleep(self.rate_limiter.reserve())
+
+    async def _list(self, session, files):
+        while True:
+            url = await self._listings.get()
+            try:
+                await self.fetch_listing_async(session, url, files)
+            except Exception as e:
+                # One bad listing must not end this lister; with every lister gone the crawl would wait forever
+                self.stats.add(errors=1)
+                print(f"Error accessing {url}: {e}")
+            finally:
+                self._listings.task_done()
+
+    async def _download(self, session, files, writer):
+        while True:
+            url = await files.get()
+            if url is None:
+                return
+            if self.dry_run:
+                self.stats.add(files=1)
+                print(f"Would download: {url}")
+                continue
+            try:
+                await self.fetch_file_async(session, url, writer)
+            except Exception as e:
+                self.stats.add(errors=1)
+                print(f"Error downloading {url}: {e}")
+
+    async def run(self):
+        """Crawl until every listing has been read and every file saved, and return the CrawlStats."""
+        self.stats = CrawlStats()
+        self._open_manifest()
+        self._listings = asyncio.Queue()
+        files = asyncio.Queue(maxsize=self.queue_size)
+        self._listings.put_nowait(self.base_url)
+
+        connector = aiohttp.TCPConnector(limit=self.workers + self.listing_workers,
+                                         limit_per_host=self.per_host_limit)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        with ThreadPoolExecutor(max_workers=self.write_threads) as writer:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                listers = [asyncio.create_task(self._list(session, files))
+                           for _ in range(self.listing_workers)]
+                downloaders = [asyncio.create_task(self._download(session, files, writer))
+                               for _ in range(self.workers)]
+                await self._listings.join()
+                for _ in downloaders:
+                    await files.put(None)
+                await asyncio.gather(*downloaders)
+                for task in listers:
+                    task.cancel()
+                await asyncio.gather(*listers, return_exceptions=True)
+        self.stats.finished = time.monotonic()
+        self._close_manifest()
+        self.log(f"Finished: {self.stats}")
+        return self.stats
+
+
+def crawl_async(base_url, save_dir, **options):
+    """
+    Mirrors every file below base_url into save_dir on an event loop and returns the CrawlStats.
+
+    Example:
+        crawl_async("http://example.com/files/", "/path/to/save_dir", concurrency=2000)
+    """
+    return asyncio.run(AsyncCrawler(base_url, save_dir, **options).run())
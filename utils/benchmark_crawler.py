@@ -0,0 +1,158 @@
+"""
+Benchmark of the serial downloader, the threaded Crawler and the AsyncCrawler.
+
+Writes a tree of small files to a temporary directory, serves it from a
+separate process and mirrors it with each implementation in turn,
+printing files/sec and bytes/sec. The server is a small aiohttp app with
+Apache-style listings, since `python -m http.server` answers HTTP/1.0
+with a listen backlog of 5 and would be the bottleneck.
+
+Usage: python benchmark_crawler.py [--files 20000] [--dirs 20] [--size 512] [--workers 8] [--concurrency 500]
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import requests
+from bs4 import BeautifulSoup
+from async_crawler import crawl_async
+from crawler import CrawlStats, crawl
+
+
+def serial_download(url, save_dir, stats):
+    """
+    The download_files loop before the crawler: one requests.get per file, depth-first recursion
+    into subfolders. Links are resolved against the listing so that it can mirror nested trees.
+    """
+    response = requests.get(url)
+    response.raise_for_status()
+    stats.add(pages=1)
+    soup = BeautifulSoup(response.content, "html.parser")
+    os.makedirs(save_dir, exist_ok=True)
+    for link in soup.find_all("a"):
+        href = link.get("href")
+        if not href:
+            continue
+        full_url = urllib.parse.urljoin(url, href)
+        if not full_url.startswith(url) or full_url == url:
+            continue
+        if full_url.endswith("/"):
+            serial_download(full_url, os.path.join(save_dir, full_url[len(url):].strip("/")), stats)
+            continue
+        file_response = requests.get(full_url, stream=True)
+        file_response.raise_for_status()
+        size = 0
+        with open(os.path.join(save_dir, urllib.parse.unquote(full_url.split("/")[-1])), "wb") as f:
+            for chunk in file_response.iter_content(chunk_size=8192):
+                f.write(chunk)
+                size += len(chunk)
+        stats.add(files=1, nbytes=size)
+
+
+def serial_crawl(base_url, save_dir):
+    stats = CrawlStats()
+    serial_download(base_url, save_dir, stats)
+    stats.finished = time.monotonic()
+    return stats
+
+
+def build_tree(root, files, dirs, size):
+    """Write `files` files of `size` bytes spread over `dirs` subdirectories."""
+    payload = os.urandom(size)
+    for index in range(files):
+        directory = os.path.join(root, f"dir{index % dirs:03d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{index:06d}.bin"), "wb") as f:
+            f.write(payload)
+
+
+def serve(directory, port):
+    """Serve directory on 127.0.0.1:port with Apache-style listings until terminated."""
+    from aiohttp import web
+
+    async def handle(request):
+        path = os.path.join(directory, *[part for part in request.path.split("/") if part not in ("", ".", "..")])
+        if os.path.isfile(path):
+            return web.FileResponse(path)
+        if not os.path.isdir(path):
+            raise web.HTTPNotFound()
+        links = "".join(f'<a href="{urllib.parse.quote(entry.name)}{"/" if entry.is_dir() else ""}">{entry.name}</a>\n'
+                        for entry in sorted(os.scandir(path), key=lambda entry: entry.name))
+        return web.Response(text=f"<html><body><pre>{links}</pre></body></html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    web.run_app(app, host="127.0.0.1", port=port, backlog=4096, print=None, access_log=None)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(url, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1).raise_for_status()
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the downloaders against a local server.")
+    parser.add_argument("--files", type=int, default=20000, help="number of files to serve (default 20000)")
+    parser.add_argument("--dirs", type=int, default=20, help="number of subdirectories (default 20)")
+    parser.add_argument("--size", type=int, default=512, help="bytes per file (default 512)")
+    parser.add_argument("--workers", type=int, default=8, help="threads for the Crawler (default 8)")
+    parser.add_argument("--concurrency", type=int, default=500,
+                        help="requests in flight for the AsyncCrawler (default 500)")
+    parser.add_argument("--skip-serial", action="store_true", help="do not run the slow serial downloader")
+    parser.add_argument("--serve", nargs=2, metavar=("DIRECTORY", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    work = tempfile.mkdtemp()
+    try:
+        served = os.path.join(work, "served")
+        build_tree(served, args.files, args.dirs, args.size)
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", served, str(port)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f"http://127.0.0.1:{port}/"
+            wait_for_server(base_url)
+            runs = {
+                "threads": lambda out: crawl(base_url, out, workers=args.workers, per_host_limit=args.workers),
+                "async": lambda out: crawl_async(base_url, out, concurrency=args.concurrency,
+                                                 per_host_limit=args.concurrency),
+            }
+            if not args.skip_serial:
+                runs = {"serial": lambda out: serial_crawl(base_url, out), **runs}
+            print(f"{args.files} files of {args.size} bytes in {args.dirs} directories")
+            for name, run in runs.items():
+                out = os.path.join(work, name)
+                stats = run(out)
+                print(f"{name:<8} {stats.elapsed:8.2f}s {stats.files_per_second:9.1f} files/s "
+                      f"{stats.bytes_per_second / 1024:9.1f} KiB/s  ({stats.files} files, {stats.errors} errors)")
+                shutil.rmtree(out)
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
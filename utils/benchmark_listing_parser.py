@@ -0,0 +1,74 @@
+"""
+Benchmark of ListingParser against the BeautifulSoup link extraction it replaced.
+
+Builds an Apache-style listing with the given number of entries and reports,
+for each parser, the time to extract every link and the peak memory it
+allocated while doing so (measured by tracemalloc in a second run).
+ListingParser is fed 64 KiB chunks, as the crawler does while the listing
+downloads.
+
+Usage: python benchmark_listing_parser.py [--entries 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from listing_parser import ListingParser
+
+CHUNK_SIZE = 65536
+
+
+def build_listing(entries):
+    """Return an Apache autoindex page listing `entries` files."""
+    rows = [b'<img src="/icons/text.gif" alt="[TXT]"> <a href="file%07d.bin">file%07d.bin</a>'
+            b'          2024-05-01 12:30  %dK\n' % (index, index, index % 900 + 1) for index in range(entries)]
+    return (b'<html><head><title>Index of /files</title></head><body><h1>Index of /files</h1><pre>'
+            + b"".join(rows) + b"<hr></pre></body></html>")
+
+
+def soup_links(content):
+    """The link extraction download_files used to do."""
+    soup = BeautifulSoup(content, "html.parser")
+    return [link.get("href") for link in soup.find_all("a") if link.get("href")]
+
+
+def streaming_links(content):
+    parser = ListingParser()
+    links = []
+    for start in range(0, len(content), CHUNK_SIZE):
+        links.extend(entry.href for entry in parser.feed(content[start:start + CHUNK_SIZE]))
+    links.extend(entry.href for entry in parser.close())
+    return links
+
+
+def measure(parse, content):
+    """Return (links, seconds, peak bytes allocated); tracemalloc slows parsing, so the time is from a run without it."""
+    start = time.perf_counter()
+    links = parse(content)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return links, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the listing parser.")
+    parser.add_argument("--entries", type=int, default=100000, help="files in the listing (default 100000)")
+    args = parser.parse_args()
+
+    content = build_listing(args.entries)
+    print(f"Listing of {args.entries} entries, {len(content) / 2 ** 20:.1f} MiB")
+    expected = None
+    for name, parse in (("BeautifulSoup", soup_links), ("ListingParser", streaming_links)):
+        links, seconds, peak = measure(parse, content)
+        if expected is None:
+            expected = links
+        status = "" if links == expected else "  (links differ!)"
+        print(f"{name:<14} {seconds:7.2f}s  peak {peak / 2 ** 20:7.1f} MiB  {len(links)} links{status}")
+
+
+if __name__ == "__main__":
+    main()
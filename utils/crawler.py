@@ -0,0 +1,401 @@
+"""
+This module provides a concurrent crawler that mirrors a directory listing served over HTTP.
+"""
+
+import fnmatch
+import os
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from listing_parser import ListingParser, signature
+from manifest import PART_SUFFIX, Manifest, ManifestEntry, PartFile
+
+
+class CrawlStats:
+    """Counters for a crawl, safe to update from several worker threads."""
+
+    def __init__(self):
+        self.pages = 0
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.skipped = 0
+        self.resumed = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, pages=0, files=0, nbytes=0, errors=0, skipped=0, resumed=0):
+        """Add to the counters."""
+        with self._lock:
+            self.pages += pages
+            self.files += files
+            self.bytes += nbytes
+            self.errors += errors
+            self.skipped += skipped
+            self.resumed += resumed
+
+    @property
+    def elapsed(self):
+        """Seconds since the crawl started, or its total duration once finished."""
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def files_per_second(self):
+        """Files downloaded per second."""
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self):
+        """Bytes downloaded per second."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.files} files, {self.bytes} bytes from {self.pages} listings in {self.elapsed:.2f}s "
+                f"({self.files_per_second:.1f} files/s, {self.bytes_per_second / 1024:.1f} KiB/s), "
+                f"{self.skipped} unchanged, {self.resumed} resumed, {self.errors} errors")
+
+
+class RateLimiter:
+    """Spaces requests evenly so no more than `rate` start per second, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next request slot and return the seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+            return slot - now
+
+
+class Crawler:
+    """
+    Mirrors every file below a base URL into a local directory.
+
+    Directory listings (URLs ending in "/") and files are fetched by a bounded pool of
+    worker threads sharing one pooled requests.Session. URLs wait in a frontier queue
+    and each is fetched at most once; no more than per_host_limit requests run against
+    one host at a time. Each host has its own queue, and the hosts with queued URLs and a
+    free slot take turns, so picking the next URL does not depend on how many are queued.
+
+    Files are written to "<name>.part" and renamed into place once complete. With a
+    manifest, each file's ETag, Last-Modified, size and SHA-256 are recorded, and the next
+    run asks the server for changed files only (If-None-Match / If-Modified-Since) and
+    resumes interrupted downloads with a Range request. Files whose date and size in an
+    Apache, nginx or S3 listing are unchanged since they were saved are not requested at all.
+
+    Args:
+        base_url (str): The URL of the listing to mirror. Only URLs below it are fetched.
+        save_dir (str): The directory where the downloaded files will be saved.
+        workers (int): The number of concurrent requests.
+        per_host_limit (int): The most concurrent requests to a single host, or None for workers.
+        timeout (float): Seconds to wait for the server before giving up on a request.
+        chunk_size (int): Bytes read at a time when saving a file.
+        verbose (bool): Print progress messages.
+        manifest (str or Manifest): The manifest database, or None to download every file in full.
+        include (list): Glob patterns; if given, only files whose path below base_url matches one are fetched.
+        exclude (list): Glob patterns of paths below base_url not to fetch.
+        max_depth (int): How many levels of subdirectories to follow, or None for all.
+        rate_limit (float): The most requests started per second, or None for no limit.
+        dry_run (bool): Read the listings and print each file that would be downloaded, verbose or
+            not, without downloading it.
+
+    Example:
+        stats = Crawler("http://example.com/files/", "/path/to/save_dir", workers=16).run()
+    """
+
+    def __init__(self, base_url, save_dir, workers=8, per_host_limit=None, timeout=30.0,
+                 chunk_size=65536, verbose=False, manifest=None, include=None, exclude=None,
+                 max_depth=None, rate_limit=None, dry_run=False):
+        if per_host_limit is None:
+            per_host_limit = workers
+        if workers < 1 or per_host_limit < 1:
+            raise ValueError(f"workers and per_host_limit must be at least 1, got {workers} and {per_host_limit}")
+        if not base_url.endswith("/"):
+            base_url += "/"
+        self.base_url = base_url
+        self.save_dir = save_dir
+        self.workers = workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+        self.stats = CrawlStats()
+        self.session = None
+        self.manifest = manifest
+        self._manifest = None
+        self.include = list(include or ())
+        self.exclude = list(exclude or ())
+        self.max_depth = max_depth
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.dry_run = dry_run
+        # Host -> its queued URLs, only while it has some
+        self._frontier = {}
+        # The hosts with queued URLs and a free slot, each once, in turn
+        self._ready = deque()
+        self._visited = {base_url}
+        self._host_load = {}
+        self._enqueue(base_url)
+        # File URL -> listing_parser.signature of its listing entry
+        self._listed = {}
+
+    def log(self, message):
+        """Print a progress message when verbose."""
+        if self.verbose:
+            print(message)
+
+    def normalize(self, href, page_url):
+        """Return the absolute URL of a link on page_url, or None if it should not be crawled."""
+        try:
+            url, _ = urllib.parse.urldefrag(urllib.parse.urljoin(page_url, href))
+            parts = urllib.parse.urlsplit(url)
+        except ValueError:
+            return None  # A malformed link, such as an unclosed IPv6 host
+        if parts.scheme not in ("http", "https") or not url.startswith(self.base_url):
+            return None
+        if parts.query and parts.path.endswith("/"):
+            return None  # Sort links such as ?C=N;O=D on Apache listings
+        relative = urllib.parse.unquote(url[len(self.base_url):])
+        if url.endswith("/"):
+            if self.max_depth is not None and relative.count("/") > self.max_depth:
+                return None
+        elif self.include and not any(fnmatch.fnmatchcase(relative, pattern) for pattern in self.include):
+            return None
+        elif any(fnmatch.fnmatchcase(relative, pattern) for pattern in self.exclude):
+            return None
+        return url
+
+    def local_path(self, url):
+        """Return where a file URL is saved, keeping its path below the base URL."""
+        relative = urllib.parse.unquote(urllib.parse.urlsplit(url[len(self.base_url):]).path)
+        parts = [part for part in relative.split("/") if part not in ("", ".", "..")]
+        return os.path.join(self.save_dir, *parts)
+
+    def fetch_listing(self, url):
+        """Return the crawlable links found on a directory listing, parsing it as it arrives."""
+        parser = ListingParser()
+        links = []
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                links.extend(self.listed_links(parser.feed(chunk), url))
+        links.extend(self.listed_links(parser.close(), url))
+        self.stats.add(pages=1)
+        return links
+
+    def listed_links(self, entries, page_url):
+        """Return the crawlable URLs of listing entries, remembering what the listing shows for each file."""
+        links = []
+        for entry in entries:
+            url = self.normalize(entry.href, page_url)
+            if url is not None:
+                links.append(url)
+                listed = signature(entry)
+                if listed is not None and not url.endswith("/"):
+                    self._listed[url] = listed
+        return links
+
+    def file_request(self, url):
+        """
+        Return the headers and resume offset for a file request: validators of the saved copy,
+        or a Range continuing an interrupted download. The headers are None when the listing
+        shows the same date, size or ETag as when the saved copy was downloaded, and the file
+        need not be requested at all.
+        """
+        entry = self._manifest.get(url) if self._manifest is not None else None
+        if entry is None:
+            return {}, 0
+        path = self.local_path(url)
+        headers = {}
+        if entry.complete:
+            listed = self._listed.get(url)
+            if entry.listed is not None and listed is not None:
+                # The listing has shown this file before; a different entry means it changed
+                if listed == entry.listed and os.path.exists(path):
+                    return None, 0
+                if listed != entry.listed:
+                    return headers, 0
+            if os.path.exists(path):
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+            return headers, 0
+        # If-Range takes a strong ETag only, otherwise the date
+        validator = entry.etag if entry.etag and not entry.etag.startswith("W/") else entry.last_modified
+        offset = os.path.getsize(path + PART_SUFFIX) if os.path.exists(path + PART_SUFFIX) else 0
+        if validator and offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+            return headers, offset
+        return headers, 0
+
+    def open_file(self, url, status, headers, offset):
+        """
+        Return the PartFile a response is written to, or None when the server answered
+        304 Not Modified and the saved copy is current.
+        """
+        if status == 304:
+            self.skip(url)
+            return None
+        path = self.local_path(url)
+        if status == 416:
+            # The .part file is no longer a prefix of the file; the next run starts over
+            os.remove(path + PART_SUFFIX)
+            raise OSError(f"Range not satisfiable, discarded {path + PART_SUFFIX}")
+        if status == 206:
+            content_range = headers.get("Content-Range", "")
+            if not content_range.startswith(f"bytes {offset}-"):
+                os.remove(path + PART_SUFFIX)
+                raise OSError(f"Unexpected Content-Range {content_range!r} resuming at {offset}")
+            self.stats.add(resumed=1)
+        else:
+            offset = 0
+        if self._manifest is not None:
+            # Saved before the body so an interrupted download can be resumed
+            self._manifest.put(ManifestEntry(url, None, headers.get("ETag"), headers.get("Last-Modified"),
+                                             None, False))
+        return PartFile(path, offset)
+
+    def skip(self, url):
+        """Count a file whose saved copy is current."""
+        self.stats.add(skipped=1)
+        self.log(f"Unchanged: {url}")
+
+    def finish_file(self, url, part, headers):
+        """Move a completed PartFile into place and record it in the manifest."""
+        digest = part.commit()
+        if self._manifest is not None:
+            self._manifest.put(ManifestEntry(url, part.size, headers.get("ETag"), headers.get("Last-Modified"),
+                                             digest, True, self._listed.get(url)))
+        self.stats.add(files=1, nbytes=part.size - part.offset)
+        self.log(f"Downloaded: {url}")
+
+    def fetch_file(self, url):
+        """Download a file below save_dir. Files have no links to follow, so this returns []."""
+        request_headers, offset = self.file_request(url)
+        if request_headers is None:
+            self.skip(url)
+            return []
+        with self.session.get(url, headers=request_headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code != 416:
+                response.raise_for_status()
+            part = self.open_file(url, response.status_code, response.headers, offset)
+            if part is None:
+                return []
+            try:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    part.write(chunk)
+            except BaseException:
+                part.close()
+                raise
+            self.finish_file(url, part, response.headers)
+        return []
+
+    def _fetch(self, url):
+        if self.dry_run and not url.endswith("/"):
+            self.stats.add(files=1)
+            print(f"Would download: {url}")  # The dry run's report, so not left to verbose
+            return []
+        if self.rate_limiter is not None:
+            time.sleep(self.rate_limiter.reserve())
+        try:
+            if url.endswith("/"):
+                self.log(f"Listing {url}")
+                return self.fetch_listing(url)
+            return self.fetch_file(url)
+        except Exception as e:
+            # Any failure is this URL's alone; raised here it would end the crawl
+            self.stats.add(errors=1)
+            print(f"Error downloading {url}: {e}")
+            return []
+
+    def _open_manifest(self):
+        # A dry run writes nothing, not even the save directory
+        if not self.dry_run:
+            os.makedirs(self.save_dir, exist_ok=True)
+            self._manifest = Manifest(self.manifest) if isinstance(self.manifest, str) else self.manifest
+
+    def _close_manifest(self):
+        if isinstance(self.manifest, str) and self._manifest is not None:
+            self._manifest.close()
+        self._manifest = None
+
+    def _enqueue(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        queue = self._frontier.get(host)
+        if queue is None:
+            queue = self._frontier[host] = deque()
+            if self._host_load.get(host, 0) < self.per_host_limit:
+                self._ready.append(host)
+        queue.append(url)
+
+    def _next_url(self):
+        # Take a URL from the next host with a free slot and count it as running there
+        if not self._ready:
+            return None
+        host = self._ready.popleft()
+        queue = self._frontier[host]
+        url = queue.popleft()
+        self._host_load[host] = self._host_load.get(host, 0) + 1
+        if not queue:
+            del self._frontier[host]
+        elif self._host_load[host] < self.per_host_limit:
+            self._ready.append(host)
+        return url
+
+    def _release(self, url):
+        # A request to url has finished; its host may take its turn again
+        host = urllib.parse.urlsplit(url).netloc
+        self._host_load[host] -= 1
+        if self._host_load[host] == self.per_host_limit - 1 and host in self._frontier:
+            self._ready.append(host)
+
+    def run(self):
+        """Crawl until the frontier is empty and return the CrawlStats."""
+        self.stats = CrawlStats()
+        self._open_manifest()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while self._frontier or running:
+                while len(running) < self.workers:
+                    url = self._next_url()
+                    if url is None:
+                        break
+                    running[pool.submit(self._fetch, url)] = url
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._release(running.pop(future))
+                    for link in future.result():
+                        if link not in self._visited:
+                            self._visited.add(link)
+                            self._enqueue(link)
+        self.stats.finished = time.monotonic()
+        self.session.close()
+        self._close_manifest()
+        self.log(f"Finished: {self.stats}")
+        return self.stats
+
+
+def crawl(base_url, save_dir, **options):
+    """
+    Mirrors every file below base_url into save_dir and returns the CrawlStats.
+
+    Example:
+        crawl("http://example.com/files/", "/path/to/save_dir", workers=16, per_host_limit=8)
+    """
+    return Crawler(base_url, save_dir, **options).run()
@@ -1,73 +1,61 @@
 """
 This module provides functionality to download files and subfolders recursively from a given URL.
+
+Importing it has no side effects, and the crawler modules (with requests and aiohttp) are
+only imported when a download starts. Run it as a script for the command line:
+
+    python download_url_files.py http://example.com/files /path/to/save_dir --workers 16 --include "*.pdf"
 """
 
+import argparse
 import os
 import re
-import urllib.parse
-import requests
-from bs4 import BeautifulSoup
+import sys
+from manifest import MANIFEST_NAME
 
-def download_files(url, save_dir):
+def download_files(url, save_dir, workers=8, per_host_limit=None, mode="threads", manifest=MANIFEST_NAME,
+                   verbose=True, **options):
     """
     Downloads files and subfolders recursively from a given URL.
 
+    Listings and files are fetched concurrently by a Crawler (see crawler.py), or with
+    mode="async" by an AsyncCrawler on one event loop (see async_crawler.py). Files that
+    have not changed since the last run are skipped and interrupted downloads resumed,
+    using the manifest kept in save_dir (see manifest.py).
+
     Args:
         url (str): The URL to download files from.
         save_dir (str): The directory where the downloaded files will be saved.
+        workers (int): The number of concurrent requests.
+        per_host_limit (int): The most concurrent requests to a single host, or None for workers.
+        mode (str): "threads", or "async" for thousands of requests in flight.
+        manifest (str): The manifest file, relative to save_dir, or None to download every file in full.
+        verbose (bool): Print progress messages.
+        **options: include and exclude (lists of glob patterns matched against the file's path
+            below url), max_depth, rate_limit (requests per second), dry_run and timeout; see Crawler.
 
-    Raises:
-        requests.exceptions.RequestException: If there is an issue with the HTTP request.
+    Returns:
+        CrawlStats: The number of files and bytes downloaded and the files/sec and bytes/sec rates.
 
     Example:
         download_files("http://example.com/files", "/path/to/save_dir")
+        download_files("http://example.com/files", "/path/to/save_dir", workers=1000, per_host_limit=100, mode="async")
     """
-    print(f"Starting download from {url} to {save_dir}")
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Create save directory if it doesn't exist
-        os.makedirs(save_dir, exist_ok=True)
-        print(f"Created directory {save_dir}")
-
-        # Download files
-        for link in soup.find_all("a"):
-            href = link.get("href")
-            if href:
-                if href.startswith("/"):
-                    # Handle relative links
-                    full_url = urllib.parse.urljoin(url, href)
-                elif href.startswith("http"):
-                    full_url = href
-                else:
-                    # Handle relative paths that do not start with a /
-                    full_url = urllib.parse.urljoin(url, "/" + href)
-
-                if full_url.startswith(url):  # Only download items from the base URL.
-                    if full_url != url + "/":  # Prevent infinite loops.
-                        if not full_url.endswith("/"):  # If a file, download it.
-                            try:
-                                print(f"Downloading file from {full_url}")
-                                file_response = requests.get(full_url, stream=True)
-                                file_response.raise_for_status()
-                                filename = os.path.join(save_dir, full_url.split("/")[-1])
-                                with open(filename, "wb") as f:
-                                    for chunk in file_response.iter_content(chunk_size=8192):
-                                        f.write(chunk)
-                                print(f"Downloaded: {full_url}")
-                            except requests.exceptions.RequestException as e:
-                                print(f"Error downloading {full_url}: {e}")
-                        else:  # If a folder, recurse.
-                            sub_dir = os.path.join(save_dir, full_url[len(url):].strip("/"))
-                            print(f"Recursing into directory {sub_dir}")
-                            download_files(full_url, sub_dir)
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error accessing {url}: {e}")
-
-# Example Usage:
+    if verbose:
+        print(f"Starting download from {url} to {save_dir}")
+    if manifest is not None:
+        manifest = os.path.join(save_dir, manifest)
+    if mode == "async":
+        # Imported here so the threaded mode does not need aiohttp
+        from async_crawler import crawl_async
+        return crawl_async(url, save_dir, concurrency=workers, per_host_limit=per_host_limit, verbose=verbose,
+                           manifest=manifest, **options)
+    if mode != "threads":
+        raise ValueError(f"Unknown mode {mode!r}, expected 'threads' or 'async'")
+    from crawler import Crawler
+    return Crawler(url, save_dir, workers=workers, per_host_limit=per_host_limit, verbose=verbose,
+                   manifest=manifest, **options).run()
+
 def is_valid_url(url):
     """Check if the URL is valid using a regex pattern."""
     regex = re.compile(
@@ -85,18 +73,65 @@ def is_valid_directory(directory):
     """Check if the directory is a valid path."""
     return os.path.isdir(directory) or not os.path.exists(directory)
 
-BASE_URL = input("Enter the URL to download files from: ")
-while not is_valid_url(BASE_URL):
-    print("Invalid URL. Please enter a valid URL.")
-    BASE_URL = input("Enter the URL to download files from: ")
+def _url(value):
+    if not is_valid_url(value):
+        raise argparse.ArgumentTypeError(f"invalid URL: {value!r}")
+    return value
+
+def _directory(value):
+    if not is_valid_directory(value):
+        raise argparse.ArgumentTypeError(f"not a directory: {value!r}")
+    return value
+
+def _positive(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {value!r}")
+    return number
+
+def _count(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value!r}")
+    return number
 
-SAVE_DIRECTORY = input("Enter the directory to save the downloaded files: ")
-while not is_valid_directory(SAVE_DIRECTORY):
-    print("Invalid directory. Please enter a valid directory path.")
-    SAVE_DIRECTORY = input("Enter the directory to save the downloaded files: ")
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Download files and subfolders recursively from a URL.")
+    parser.add_argument("url", type=_url, help="the URL to download files from")
+    parser.add_argument("save_dir", type=_directory, help="the directory to save the downloaded files in")
+    parser.add_argument("-j", "--workers", type=_count, default=8,
+                        help="concurrent requests (default 8; try 500 or more with --mode async)")
+    parser.add_argument("--per-host", type=_count, default=None, dest="per_host_limit",
+                        help="most concurrent requests to one host (default: --workers)")
+    parser.add_argument("--mode", choices=("threads", "async"), default="threads",
+                        help="worker threads or one asyncio event loop (default threads)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only download files whose path below the URL matches GLOB (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="skip files whose path below the URL matches GLOB (repeatable)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="how many levels of subfolders to follow (default unlimited, 0 for none)")
+    parser.add_argument("--rate-limit", type=_positive, default=None, metavar="REQUESTS_PER_SECOND",
+                        help="most requests per second (default unlimited)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="list the files that would be downloaded without downloading them")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="download every file in full instead of skipping unchanged ones")
+    parser.add_argument("--timeout", type=_positive, default=30.0, help="seconds to wait for the server (default 30)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the summary")
+    return parser.parse_args(argv)
 
-# Create save directory if it doesn't exist
-os.makedirs(SAVE_DIRECTORY, exist_ok=True)
-print(f"Save directory {SAVE_DIRECTORY} created")
+def main(argv=None):
+    """Run a download from the command line and return the exit status: 1 if any request failed."""
+    args = parse_args(argv)
+    stats = download_files(args.url, args.save_dir, workers=args.workers,
+                           per_host_limit=args.per_host_limit, mode=args.mode,
+                           manifest=None if args.no_manifest else MANIFEST_NAME, verbose=not args.quiet,
+                           include=args.include, exclude=args.exclude, max_depth=args.max_depth,
+                           rate_limit=args.rate_limit, dry_run=args.dry_run, timeout=args.timeout)
+    print(stats)
+    return 1 if stats.errors else 0
 
-download_files(BASE_URL, SAVE_DIRECTORY)
+if __name__ == "__main__":
+    sys.exit(main())
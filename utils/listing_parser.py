@@ -0,0 +1,159 @@
+"""
+This module provides a streaming parser for directory listing pages.
+
+ListingParser is fed the bytes of a listing as they arrive and returns each entry as soon as it
+is complete, without building a document tree. Besides the link it reads the columns that common
+autoindex formats print after it:
+
+    Apache   <a href="a.txt">a.txt</a>   2024-05-01 12:30  1.2K      (also in a <table>)
+    nginx    <a href="a.txt">a.txt</a>   01-May-2024 12:30   1234
+    S3       <Contents><Key>a.txt</Key><LastModified>..</LastModified><ETag>..</ETag><Size>1234</Size></Contents>
+
+The values are kept as listed: they are compared with what the same listing said on the last run,
+so the server's time zone and size rounding do not matter. S3 keys are read as one flat list
+relative to the bucket URL; truncated S3 listings (IsTruncated) are not continued.
+"""
+
+import codecs
+import re
+import urllib.parse
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# modified and size are the listing's text, e.g. "01-May-2024 12:30" and "1.2K"; etag is S3's only
+Entry = namedtuple("Entry", ["href", "modified", "size", "etag"])
+
+# The date and size columns following a link
+_COLUMNS = re.compile(r"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2})?|\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}(?::\d{2})?)"
+                      r"\s+(\S+)")
+
+_S3_FIELDS = ("key", "lastmodified", "etag", "size")
+
+
+class ListingParser(HTMLParser):
+    """
+    Reads the entries of a directory listing fed to it piece by piece.
+
+    format is "apache", "nginx" or "s3" once the listing has been recognised, otherwise None,
+    in which case every link is an entry without a date or size.
+
+    Example:
+        parser = ListingParser()
+        for chunk in response.iter_content(65536):
+            for entry in parser.feed(chunk):
+                print(entry.href, entry.modified, entry.size)
+        entries = parser.close()
+    """
+
+    def __init__(self, encoding="utf-8"):
+        super().__init__(convert_charrefs=True)
+        self.format = None
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._completed = []
+        # The link whose columns are being read, and the text after it
+        self._href = None
+        self._text = []
+        self._link_text = None
+        # The S3 <Contents> element being read
+        self._object = None
+        self._field = None
+
+    def feed(self, data):
+        """Parse the next piece of the listing (bytes or str) and return the entries it completed."""
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        super().feed(data)
+        completed, self._completed = self._completed, []
+        return completed
+
+    def close(self):
+        """Parse what is left of the listing and return the last entries."""
+        super().feed(self._decoder.decode(b"", final=True))
+        super().close()
+        self._finish_link()
+        completed, self._completed = self._completed, []
+        return completed
+
+    def handle_starttag(self, tag, attrs):
+        self._separate()
+        if tag == "a":
+            self._finish_link()
+            href = dict(attrs).get("href")
+            if href:
+                self._href = href
+                self._link_text = []
+                if self.format is None and href.startswith("?C="):
+                    self.format = "apache"  # Column sort links
+        elif tag == "tr":
+            self._finish_link()
+        elif tag == "listbucketresult":
+            self.format = "s3"
+        elif self.format == "s3":
+            if tag == "contents":
+                self._object = {}
+            elif tag in _S3_FIELDS and self._object is not None:
+                self._field = tag
+                self._object[tag] = ""
+
+    def handle_endtag(self, tag):
+        self._separate()
+        if tag == "a" and self._link_text is not None:
+            text = "".join(self._link_text).strip()
+            self._link_text = None
+            if self.format is None:
+                if text == "Parent Directory":
+                    self.format = "apache"
+                elif text == "../":
+                    self.format = "nginx"
+        elif tag in ("tr", "pre", "table"):
+            self._finish_link()
+        elif self.format == "s3":
+            if tag == self._field:
+                self._field = None
+            elif tag == "contents" and self._object is not None:
+                fields, self._object = self._object, None
+                key = fields.get("key", "").strip()
+                if key:
+                    self._completed.append(Entry(urllib.parse.quote(key), fields.get("lastmodified", "").strip() or None,
+                                                 fields.get("size", "").strip() or None,
+                                                 fields.get("etag", "").strip() or None))
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._object[self._field] += data
+        elif self._link_text is not None:
+            self._link_text.append(data)
+        elif self._href is not None:
+            self._text.append(data)
+
+    def _separate(self):
+        # Text in separate table cells must not run together
+        if self._href is not None and self._link_text is None:
+            self._text.append(" ")
+
+    def _finish_link(self):
+        if self._href is None:
+            return
+        match = _COLUMNS.search("".join(self._text))
+        modified, size = (match.group(1), match.group(2)) if match else (None, None)
+        self._completed.append(Entry(self._href, modified, None if size == "-" else size, None))
+        self._href = None
+        self._text = []
+        self._link_text = None
+
+
+def parse_listing(content):
+    """Return all entries of a listing given as bytes or str."""
+    parser = ListingParser()
+    return parser.feed(content) + parser.close()
+
+
+def signature(entry):
+    """
+    Return a string that changes when the listing shows a file has changed, or None if the
+    listing gives no date, size or ETag for it.
+    """
+    if entry is None or (entry.modified is None and entry.size is None and entry.etag is None):
+        return None
+    return f"{entry.modified}|{entry.size}|{entry.etag}"
+
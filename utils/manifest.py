@@ -0,0 +1,132 @@
+"""
+This module provides the bookkeeping for incremental, resumable mirroring.
+
+A Manifest records, for every downloaded URL, its size, the ETag and Last-Modified headers the
+server sent and a SHA-256 of the content, so a later run can send conditional requests and skip
+files that have not changed. A PartFile writes a download to "<path>.part" and renames it over
+the real path only once it is complete, so an interrupted run never leaves a truncated file.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+MANIFEST_NAME = ".manifest.sqlite"
+PART_SUFFIX = ".part"
+
+# complete is False while the file is still being written to its .part file; listed is what the
+# directory listing showed for the file when it was downloaded (see listing_parser.signature)
+ManifestEntry = namedtuple("ManifestEntry", ["url", "size", "etag", "last_modified", "sha256", "complete", "listed"],
+                           defaults=(None,))
+
+
+class Manifest:
+    """
+    A SQLite table of downloaded URLs, safe to share between threads.
+
+    Args:
+        path (str): The database file. It is created if it does not exist.
+
+    Example:
+        with Manifest("/path/to/save_dir/.manifest.sqlite") as manifest:
+            entry = manifest.get("http://example.com/files/a.txt")
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("""CREATE TABLE IF NOT EXISTS files (
+                                    url TEXT PRIMARY KEY,
+                                    size INTEGER,
+                                    etag TEXT,
+                                    last_modified TEXT,
+                                    sha256 TEXT,
+                                    complete INTEGER NOT NULL,
+                                    updated REAL NOT NULL,
+                                    listed TEXT)""")
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(files)")]
+            if "listed" not in columns:
+                # Manifests written before listings were read
+                self._db.execute("ALTER TABLE files ADD COLUMN listed TEXT")
+
+    def get(self, url):
+        """Return the ManifestEntry for a URL, or None if it has never been downloaded."""
+        with self._lock:
+            row = self._db.execute("SELECT url, size, etag, last_modified, sha256, complete, listed FROM files "
+                                   "WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(*row[:5], bool(row[5]), row[6])
+
+    def put(self, entry):
+        """Insert or replace the ManifestEntry for its URL."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO files (url, size, etag, last_modified, sha256, complete, updated, "
+                             "listed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (*entry[:5], int(entry.complete), time.time(), entry.listed))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PartFile:
+    """
+    A download written to "<path>.part" and renamed over path by commit().
+
+    Args:
+        path (str): Where the finished file goes.
+        offset (int): The number of bytes already in the .part file to keep, 0 to start over.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.temp = path + PART_SUFFIX
+        self.offset = offset
+        self.size = offset
+        self.hasher = hashlib.sha256()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if offset:
+            # The hash covers the whole file, so read back what the last run wrote
+            with open(self.temp, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    self.hasher.update(block)
+            self.file = open(self.temp, "ab")
+        else:
+            self.file = open(self.temp, "wb")
+
+    def write(self, chunk):
+        """Append a chunk of the download."""
+        self.file.write(chunk)
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        """Flush the file to disk, move it into place and return its SHA-256."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.temp, self.path)
+        return self.hasher.hexdigest()
+
+    def close(self):
+        """Close the .part file without committing it, so a later run can resume it."""
+        self.file.close()
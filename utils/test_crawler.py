@@ -0,0 +1,408 @@
+"""
+Unit tests for crawler.py, async_crawler.py and download_url_files.py, against a local http.server serving a temporary directory tree.
+"""
+
+import asyncio
+import contextlib
+import email.utils
+import functools
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import urllib.parse
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from async_crawler import AsyncCrawler
+from crawler import Crawler
+from manifest import MANIFEST_NAME, PART_SUFFIX, Manifest, ManifestEntry
+
+# Relative path -> contents of the tree the server mirrors
+TREE = {
+    "a.txt": b"alpha",
+    "b.bin": bytes(range(256)) * 40,
+    "docs/readme.md": b"# readme",
+    "docs/deep/c.txt": b"gamma",
+    "docs/deep/space name.txt": b"spaces",
+    "empty/.keep": b"",
+}
+
+
+def last_modified(filename):
+    return email.utils.formatdate(os.path.getmtime(filename), usegmt=True)
+
+
+class TrackingHandler(SimpleHTTPRequestHandler):
+    """
+    Serves a directory, with Range requests checked against Last-Modified by If-Range,
+    and records each request and the most requests in flight at once. While server.pair is
+    set, a file request is held until another request is in flight with it.
+    """
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.headers.append((self.path, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            if server.in_flight >= 2:
+                server.overlapped.set()
+        try:
+            if server.pair and not self.path.endswith("/"):
+                server.overlapped.wait(timeout=5)
+            time.sleep(server.delay)
+            filename = self.translate_path(self.path)
+            if "Range" in self.headers and os.path.isfile(filename) \
+                    and self.headers.get("If-Range") == last_modified(filename):
+                self.send_range(filename)
+            else:
+                super().do_GET()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def list_directory(self, path):
+        if not self.server.autoindex:
+            return super().list_directory(path)
+        # nginx's autoindex, with each entry's date and size
+        rows = ['<html><head><title>Index</title></head><body><hr><pre><a href="../">../</a>']
+        for name in sorted(os.listdir(path)):
+            filename = os.path.join(path, name)
+            modified = time.strftime("%d-%b-%Y %H:%M", time.gmtime(os.path.getmtime(filename)))
+            if os.path.isdir(filename):
+                rows.append(f'<a href="{urllib.parse.quote(name)}/">{name}/</a>    {modified}    -')
+            else:
+                rows.append(f'<a href="{urllib.parse.quote(name)}">{name}</a>    {modified}    {os.path.getsize(filename)}')
+        body = ("\n".join(rows) + "\n</pre><hr></body></html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_range(self, filename):
+        with open(filename, "rb") as f:
+            content = f.read()
+        start = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+        if start >= len(content):
+            self.send_error(416)
+            return
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        self.send_header("Content-Length", str(len(content) - start))
+        self.send_header("Last-Modified", last_modified(filename))
+        self.end_headers()
+        self.wfile.write(content[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerTestCase(unittest.TestCase):
+    """Serves TREE below /files/ from a temporary directory for each test."""
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.out = tempfile.TemporaryDirectory()
+        for path, content in TREE.items():
+            filename = os.path.join(self.root.name, "files", *path.split("/"))
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "wb") as f:
+                f.write(content)
+        # A page outside the mirrored tree and a listing that links back up, to itself and to a malformed URL
+        with open(os.path.join(self.root.name, "outside.txt"), "wb") as f:
+            f.write(b"outside")
+        with open(os.path.join(self.root.name, "files", "docs", "index.html"), "w", encoding="utf-8") as f:
+            f.write('<a href="../">Parent</a> <a href="./">Self</a> <a href="?C=N;O=D">Name</a> '
+                    '<a href="/outside.txt">Outside</a> <a href="readme.md">Readme</a> '
+                    '<a href="readme.md#top">Readme again</a> <a href="deep/">deep/</a> '
+                    '<a href="http://[::1/broken">Malformed</a>')
+
+        handler = functools.partial(TrackingHandler, directory=self.root.name)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.lock = threading.Lock()
+        self.server.paths = []
+        self.server.headers = []
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.delay = 0
+        self.server.pair = False
+        self.server.overlapped = threading.Event()
+        self.server.autoindex = False
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/files/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.root.cleanup()
+        self.out.cleanup()
+
+    def mirrored(self):
+        """Relative paths of the files saved in the output directory."""
+        paths = set()
+        for directory, _, filenames in os.walk(self.out.name):
+            for filename in filenames:
+                paths.add(os.path.relpath(os.path.join(directory, filename), self.out.name).replace(os.sep, "/"))
+        return paths
+
+
+class TestCrawler(ServerTestCase):
+    """Unit tests for Crawler."""
+    def crawl(self, save_dir=None, **options):
+        return Crawler(self.base_url, save_dir or self.out.name, **options).run()
+
+    def test_mirrors_tree(self):
+        """Test that every file below the base URL is saved at the same relative path."""
+        stats = self.crawl()
+        for path, content in TREE.items():
+            with open(os.path.join(self.out.name, *path.split("/")), "rb") as f:
+                self.assertEqual(f.read(), content, path)
+        self.assertFalse(os.path.exists(os.path.join(self.out.name, "outside.txt")))
+        self.assertEqual(stats.files, len(TREE))
+        self.assertEqual(stats.bytes, sum(len(content) for content in TREE.values()))
+        self.assertEqual(stats.errors, 0)
+        self.assertGreater(stats.files_per_second, 0)
+        self.assertGreater(stats.bytes_per_second, 0)
+        for _, _, filenames in os.walk(self.out.name):
+            self.assertFalse([name for name in filenames if name.endswith(PART_SUFFIX)])
+
+    def test_each_url_fetched_once(self):
+        """Test that loops, fragments and sort links do not cause repeat requests."""
+        self.crawl()
+        self.assertEqual(len(self.server.paths), len(set(self.server.paths)), self.server.paths)
+        self.assertNotIn("/outside.txt", self.server.paths)
+        self.assertFalse(any("?" in path for path in self.server.paths))
+
+    def test_per_host_limit(self):
+        """Test that requests overlap, but no more than per_host_limit reach the server at once."""
+        self.server.pair = True
+        self.server.delay = 0.05  # Keeps the workers queued behind the limit
+        self.crawl(workers=8, per_host_limit=2)
+        self.assertTrue(self.server.overlapped.is_set())
+        self.assertLessEqual(self.server.max_in_flight, 2)
+
+    def test_errors_counted(self):
+        """Test that a failed request is counted and the crawl goes on."""
+        os.remove(os.path.join(self.root.name, "files", "docs", "deep", "c.txt"))
+        with open(os.path.join(self.root.name, "files", "docs", "index.html"), "a", encoding="utf-8") as f:
+            f.write('<a href="deep/c.txt">Gone</a>')
+        stats = self.crawl()
+        self.assertEqual(stats.errors, 1)
+        self.assertEqual(stats.files, len(TREE) - 1)
+
+    def test_rerun_skips_unchanged(self):
+        """Test that a second run with a manifest downloads only the file that changed."""
+        manifest = os.path.join(self.out.name, MANIFEST_NAME)
+        self.crawl(manifest=manifest)
+        with Manifest(manifest) as entries:
+            self.assertEqual(len(entries), len(TREE))
+            entry = entries.get(self.base_url + "docs/readme.md")
+        self.assertEqual(entry.sha256, hashlib.sha256(TREE["docs/readme.md"]).hexdigest())
+        self.assertTrue(entry.complete)
+
+        changed = os.path.join(self.root.name, "files", "a.txt")
+        with open(changed, "wb") as f:
+            f.write(b"alpha, changed")
+        os.utime(changed, (time.time() + 10, time.time() + 10))
+        self.server.headers.clear()
+        stats = self.crawl(manifest=manifest)
+        self.assertEqual(stats.files, 1)
+        self.assertEqual(stats.skipped, len(TREE) - 1)
+        with open(os.path.join(self.out.name, "a.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"alpha, changed")
+        sent = dict(self.server.headers)["/files/docs/readme.md"]
+        self.assertEqual(sent["If-Modified-Since"], entry.last_modified)
+
+    def test_listing_skips_unchanged(self):
+        """Test that files whose listing entry is unchanged are not requested on the next run."""
+        self.server.autoindex = True
+        manifest = os.path.join(self.out.name, MANIFEST_NAME)
+        self.crawl(manifest=manifest)
+        self.server.paths.clear()
+        stats = self.crawl(manifest=manifest)
+        self.assertEqual(stats.skipped, len(TREE))
+        self.assertEqual(stats.files, 0)
+        # docs/ is served by index.html, which has no dates or sizes
+        self.assertEqual([path for path in self.server.paths if not path.endswith("/")], ["/files/docs/readme.md"])
+
+        with open(os.path.join(self.root.name, "files", "a.txt"), "wb") as f:
+            f.write(b"alpha, changed")
+        self.server.paths.clear()
+        stats = self.crawl(manifest=manifest)
+        self.assertEqual(stats.files, 1)
+        self.assertIn("/files/a.txt", self.server.paths)
+        with open(os.path.join(self.out.name, "a.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"alpha, changed")
+
+    def test_resume_partial(self):
+        """Test that an interrupted download continues from the end of its .part file."""
+        manifest = os.path.join(self.out.name, MANIFEST_NAME)
+        url = self.base_url + "b.bin"
+        with Manifest(manifest) as entries:
+            entries.put(ManifestEntry(url, None, None, last_modified(os.path.join(self.root.name, "files", "b.bin")),
+                                      None, False))
+        with open(os.path.join(self.out.name, "b.bin" + PART_SUFFIX), "wb") as f:
+            f.write(TREE["b.bin"][:1000])
+        stats = self.crawl(manifest=manifest)
+        with open(os.path.join(self.out.name, "b.bin"), "rb") as f:
+            self.assertEqual(f.read(), TREE["b.bin"])
+        self.assertEqual(stats.resumed, 1)
+        self.assertEqual(stats.bytes, sum(len(content) for content in TREE.values()) - 1000)
+        self.assertEqual(dict(self.server.headers)["/files/b.bin"]["Range"], "bytes=1000-")
+        with Manifest(manifest) as entries:
+            self.assertEqual(entries.get(url).sha256, hashlib.sha256(TREE["b.bin"]).hexdigest())
+
+    def test_resume_changed_file(self):
+        """Test that a .part file of an older version is replaced by the whole new file."""
+        manifest = os.path.join(self.out.name, MANIFEST_NAME)
+        url = self.base_url + "b.bin"
+        with Manifest(manifest) as entries:
+            entries.put(ManifestEntry(url, None, None, "Thu, 01 Jan 2015 00:00:00 GMT", None, False))
+        with open(os.path.join(self.out.name, "b.bin" + PART_SUFFIX), "wb") as f:
+            f.write(b"stale")
+        stats = self.crawl(manifest=manifest)
+        with open(os.path.join(self.out.name, "b.bin"), "rb") as f:
+            self.assertEqual(f.read(), TREE["b.bin"])
+        self.assertEqual(stats.resumed, 0)
+
+    def test_unexpected_errors(self):
+        """Test that an unexpected exception while reading a listing or saving a file fails only that URL."""
+        listed_links, open_file = Crawler.listed_links, Crawler.open_file
+
+        def failing_listed_links(crawler, entries, page_url):
+            if page_url.endswith("/deep/"):
+                raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+            return listed_links(crawler, entries, page_url)
+
+        def failing_open_file(crawler, url, *args):
+            if url.endswith("/a.txt"):
+                raise ValueError("unexpected")
+            return open_file(crawler, url, *args)
+
+        with mock.patch.object(Crawler, "listed_links", failing_listed_links), \
+                mock.patch.object(Crawler, "open_file", failing_open_file), \
+                contextlib.redirect_stdout(io.StringIO()):
+            stats = self.crawl()
+        self.assertEqual(stats.errors, 2)
+        self.assertEqual(self.mirrored(), {"b.bin", "docs/readme.md", "empty/.keep"})
+
+    def test_include_exclude(self):
+        """Test that include and exclude globs select files by their path below the base URL."""
+        stats = self.crawl(include=["*.txt", "*.md"], exclude=["docs/deep/*"])
+        self.assertEqual(self.mirrored(), {"a.txt", "docs/readme.md"})
+        self.assertEqual(stats.files, 2)
+
+    def test_max_depth(self):
+        """Test that max_depth stops the crawl from following deeper listings."""
+        self.crawl(max_depth=0)
+        self.assertEqual(self.mirrored(), {"a.txt", "b.bin"})
+        self.crawl(max_depth=1)
+        self.assertEqual(self.mirrored(), {"a.txt", "b.bin", "docs/readme.md", "empty/.keep"})
+
+    def test_dry_run(self):
+        """Test that a dry run reports the files, verbose or not, but neither downloads nor writes anything."""
+        save_dir = os.path.join(self.out.name, "mirror")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            stats = self.crawl(save_dir, manifest=os.path.join(save_dir, MANIFEST_NAME), dry_run=True)
+        self.assertEqual(stats.files, len(TREE))
+        self.assertEqual(output.getvalue().count("Would download: "), len(TREE))
+        self.assertFalse(os.path.exists(save_dir))
+        self.assertTrue(all(path.endswith("/") for path in self.server.paths), self.server.paths)
+
+    def test_rate_limit(self):
+        """Test that rate_limit spaces out the requests."""
+        start = time.monotonic()
+        self.crawl(rate_limit=40)
+        requests_made = len(self.server.paths)
+        self.assertGreaterEqual(time.monotonic() - start, (requests_made - 1) / 40)
+
+
+class TestAsyncCrawler(TestCrawler):
+    """Runs the Crawler tests against AsyncCrawler."""
+    def crawl(self, save_dir=None, workers=8, **options):
+        return asyncio.run(AsyncCrawler(self.base_url, save_dir or self.out.name, concurrency=workers,
+                                        **options).run())
+
+    def test_small_queue(self):
+        """Test that a file queue smaller than a listing still mirrors the whole tree."""
+        stats = self.crawl(queue_size=1, listing_workers=1, write_threads=1)
+        self.assertEqual(stats.files, len(TREE))
+
+
+class TestScheduler(unittest.TestCase):
+    """Unit tests for how Crawler picks the next URL."""
+    def test_hosts_take_turns(self):
+        """Test that hosts with a free slot take turns and a full host waits for a request to finish."""
+        crawler = Crawler("http://a/", "unused", workers=8, per_host_limit=2)
+        for url in ("http://a/1", "http://b/1", "http://a/2", "http://b/2", "http://b/3"):
+            crawler._enqueue(url)
+        taken = [crawler._next_url() for _ in range(5)]
+        self.assertEqual(taken, ["http://a/", "http://b/1", "http://a/1", "http://b/2", None])
+        crawler._release("http://b/1")
+        self.assertEqual(crawler._next_url(), "http://b/3")
+        self.assertIsNone(crawler._next_url())
+        self.assertEqual(list(crawler._frontier), ["a"])
+
+    def test_full_host_is_not_scanned(self):
+        """Test that a host at its limit costs nothing per call, however many of its URLs are queued."""
+        crawler = Crawler("http://a/", "unused", workers=8, per_host_limit=1)
+        for index in range(100000):
+            crawler._enqueue(f"http://a/{index}")
+        crawler._next_url()
+        start = time.perf_counter()
+        for _ in range(10000):
+            self.assertIsNone(crawler._next_url())
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_per_host_limit_defaults_to_workers(self):
+        """Test that a host can use every worker unless limited."""
+        self.assertEqual(Crawler("http://a/", "unused", workers=16).per_host_limit, 16)
+
+    def test_limits_must_be_positive(self):
+        """Test that limits under which nothing could ever run are refused."""
+        for options in ({"workers": 0}, {"per_host_limit": 0}):
+            with self.assertRaises(ValueError):
+                Crawler("http://a/", "unused", **options)
+        with self.assertRaises(ValueError):
+            AsyncCrawler("http://a/", "unused", listing_workers=0)
+
+
+class TestCommandLine(ServerTestCase):
+    """Unit tests for download_url_files.py."""
+    def test_import_has_no_side_effects(self):
+        """Test that importing the module neither prompts nor loads the crawler."""
+        code = "import sys, download_url_files; print('crawler' in sys.modules, 'requests' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=30, check=True)
+        self.assertEqual(result.stdout.strip(), "False False")
+
+    def test_main(self):
+        """Test that the command line mirrors the tree with the given options."""
+        import download_url_files
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            status = download_url_files.main([self.base_url, self.out.name, "-j", "4", "--mode", "async",
+                                              "--exclude", "*.bin", "--max-depth", "1", "--quiet"])
+        self.assertEqual(status, 0)
+        self.assertEqual(self.mirrored(), {"a.txt", "docs/readme.md", "empty/.keep", MANIFEST_NAME})
+        self.assertIn("3 files", output.getvalue())
+
+    def test_invalid_arguments(self):
+        """Test that a bad URL or limit is rejected before anything is downloaded."""
+        import download_url_files
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            download_url_files.main(["not a url", self.out.name])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            download_url_files.main([self.base_url, self.out.name, "--per-host", "0"])
+        self.assertEqual(self.server.paths, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for listing_parser.py, on listings in the formats Apache, nginx, S3 and http.server produce.
+"""
+
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from listing_parser import Entry, ListingParser, parse_listing, signature
+
+APACHE_PRE = b"""<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN">
+<html><head><title>Index of /files</title></head><body><h1>Index of /files</h1>
+<pre><img src="/icons/blank.gif" alt="Icon "> <a href="?C=N;O=D">Name</a>                    <a href="?C=M;O=A">Last modified</a>      <a href="?C=S;O=A">Size</a>  <a href="?C=D;O=A">Description</a><hr><img src="/icons/back.gif" alt="[PARENTDIR]"> <a href="/">Parent Directory</a>                             -
+<img src="/icons/text.gif" alt="[TXT]"> <a href="a.txt">a.txt</a>                   2024-05-01 12:30  1.2K
+<img src="/icons/folder.gif" alt="[DIR]"> <a href="sub/">sub/</a>                    2024-05-02 08:00    -
+<hr></pre>
+<address>Apache/2.4.41 (Ubuntu) Server at localhost Port 80</address>
+</body></html>"""
+
+APACHE_TABLE = b"""<html><head><title>Index of /files</title></head><body><h1>Index of /files</h1><table>
+<tr><th valign="top"><img src="/icons/blank.gif" alt="[ICO]"></th><th><a href="?C=N;O=D">Name</a></th><th><a href="?C=M;O=A">Last modified</a></th><th><a href="?C=S;O=A">Size</a></th><th><a href="?C=D;O=A">Description</a></th></tr>
+<tr><th colspan="5"><hr></th></tr>
+<tr><td valign="top"><img src="/icons/text.gif" alt="[TXT]"></td><td><a href="a%20b.txt">a b.txt</a></td><td align="right">2024-05-01 12:30</td><td align="right">1.2K</td><td>&nbsp;</td></tr>
+<tr><td valign="top"><img src="/icons/folder.gif" alt="[DIR]"></td><td><a href="sub/">sub/</a></td><td align="right">2024-05-02 08:00  </td><td align="right">  - </td><td>&nbsp;</td></tr>
+</table></body></html>"""
+
+NGINX = b"""<html>
+<head><title>Index of /files/</title></head>
+<body>
+<h1>Index of /files/</h1><hr><pre><a href="../">../</a>
+<a href="sub/">sub/</a>                                               02-May-2024 08:00                   -
+<a href="caf%C3%A9.txt">caf\xc3\xa9.txt</a>                                            01-May-2024 12:30                1234
+</pre><hr></body>
+</html>"""
+
+S3 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/"><Name>bucket</Name><Prefix></Prefix><Marker></Marker><MaxKeys>1000</MaxKeys><IsTruncated>false</IsTruncated>
+<Contents><Key>dir/a b.txt</Key><LastModified>2024-05-01T12:30:00.000Z</LastModified><ETag>&quot;9b2cf535f27731c974343645a3985328&quot;</ETag><Size>1234</Size><StorageClass>STANDARD</StorageClass></Contents>
+<Contents><Key>b.bin</Key><LastModified>2024-05-02T08:00:00.000Z</LastModified><ETag>&quot;d41d8cd98f00b204e9800998ecf8427e&quot;</ETag><Size>0</Size><StorageClass>STANDARD</StorageClass></Contents>
+</ListBucketResult>"""
+
+HTTP_SERVER = b"""<!DOCTYPE HTML><html lang="en"><head><meta charset="utf-8"><title>Directory listing for /files/</title></head>
+<body><h1>Directory listing for /files/</h1><hr><ul>
+<li><a href="a.txt">a.txt</a></li>
+<li><a href="sub/">sub/</a></li>
+</ul><hr></body></html>"""
+
+
+def chunked(content, size):
+    """Parse content fed size bytes at a time and return the format and the entries."""
+    parser = ListingParser()
+    entries = []
+    for start in range(0, len(content), size):
+        entries.extend(parser.feed(content[start:start + size]))
+    entries.extend(parser.close())
+    return parser.format, entries
+
+
+class TestListingParser(unittest.TestCase):
+    """Unit tests for ListingParser."""
+    def test_apache(self):
+        """Test both Apache autoindex layouts."""
+        self.assertEqual(chunked(APACHE_PRE, 1 << 16), ("apache", [
+            Entry("?C=N;O=D", None, None, None), Entry("?C=M;O=A", None, None, None),
+            Entry("?C=S;O=A", None, None, None), Entry("?C=D;O=A", None, None, None),
+            Entry("/", None, None, None),
+            Entry("a.txt", "2024-05-01 12:30", "1.2K", None),
+            Entry("sub/", "2024-05-02 08:00", None, None)]))
+        _, entries = chunked(APACHE_TABLE, 1 << 16)
+        self.assertEqual(entries[-2:], [Entry("a%20b.txt", "2024-05-01 12:30", "1.2K", None),
+                                        Entry("sub/", "2024-05-02 08:00", None, None)])
+
+    def test_nginx(self):
+        """Test an nginx autoindex with a UTF-8 name."""
+        self.assertEqual(chunked(NGINX, 1 << 16), ("nginx", [
+            Entry("../", None, None, None),
+            Entry("sub/", "02-May-2024 08:00", None, None),
+            Entry("caf%C3%A9.txt", "01-May-2024 12:30", "1234", None)]))
+
+    def test_s3(self):
+        """Test an S3 ListBucketResult."""
+        self.assertEqual(chunked(S3, 1 << 16), ("s3", [
+            Entry("dir/a%20b.txt", "2024-05-01T12:30:00.000Z", "1234", '"9b2cf535f27731c974343645a3985328"'),
+            Entry("b.bin", "2024-05-02T08:00:00.000Z", "0", '"d41d8cd98f00b204e9800998ecf8427e"')]))
+
+    def test_plain_links(self):
+        """Test that a page without columns gives its links without a date or size."""
+        self.assertEqual(chunked(HTTP_SERVER, 1 << 16), (None, [Entry("a.txt", None, None, None),
+                                                                Entry("sub/", None, None, None)]))
+
+    def test_any_chunk_size(self):
+        """Test that the entries do not depend on how the bytes arrive, even mid-character."""
+        for content in (APACHE_PRE, APACHE_TABLE, NGINX, S3, HTTP_SERVER):
+            expected = chunked(content, 1 << 16)
+            for size in (1, 2, 7, 64):
+                self.assertEqual(chunked(content, size), expected, size)
+
+    def test_entries_arrive_early(self):
+        """Test that an entry is returned once the next link starts, before the listing ends."""
+        parser = ListingParser()
+        head, tail = NGINX.split(b'<a href="caf%C3%A9.txt">')
+        self.assertEqual([entry.href for entry in parser.feed(head)], ["../"])
+        self.assertEqual(parser.feed(b'<a href="caf%C3%A9.txt">'), [Entry("sub/", "02-May-2024 08:00", None, None)])
+        self.assertEqual(len(parser.feed(tail) + parser.close()), 1)
+
+    def test_large_listing(self):
+        """Test a listing with many entries."""
+        rows = b"".join(b'<a href="f%d">f%d</a>  01-May-2024 12:30  %d\n' % (i, i, i) for i in range(20000))
+        entries = parse_listing(b"<pre>" + rows + b"</pre>")
+        self.assertEqual(len(entries), 20000)
+        self.assertEqual(entries[-1], Entry("f19999", "01-May-2024 12:30", "19999", None))
+
+
+class TestSignature(unittest.TestCase):
+    """Unit tests for signature."""
+    def test_signature(self):
+        """Test that only entries with a date, size or ETag have a signature."""
+        self.assertIsNone(signature(Entry("a.txt", None, None, None)))
+        self.assertIsNone(signature(None))
+        self.assertNotEqual(signature(Entry("a.txt", "2024-05-01 12:30", "1.2K", None)),
+                            signature(Entry("a.txt", "2024-05-01 12:30", "1.3K", None)))
+
+
+if __name__ == "__main__":
+    unittest.main()